@@ -0,0 +1,94 @@
+from typing import FrozenSet
+import uuid
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_user
+from app.db.session import get_db, session_factory_for
+from app.models.account import Account
+from app.models.user import User
+from app.services.account_cache import AccountCache, AccountSnapshot
+
+async def get_read_db(current_user: User = Depends(get_current_user)):
+    """
+    Session for read-only endpoints, on the read pool unless the caller wrote recently.
+    Handlers that write must keep using get_db; a request that writes and then reads
+    does both through that one session.
+    """
+    async with session_factory_for(current_user.id)() as session:
+        yield session
+
+async def load_owned_account_ids(session: AsyncSession, user_id: uuid.UUID) -> FrozenSet[uuid.UUID]:
+    """
+    Ids of every account the user owns, from the per-user cache or one query.
+    The cache entry is dropped whenever one of the user's accounts is created or deleted.
+    """
+    cached = AccountCache.get_account_ids(user_id)
+    if cached is not None:
+        return frozenset(cached)
+    generation = AccountCache.generation()
+    result = await session.execute(select(Account.id).where(Account.user_id == user_id))
+    account_ids = result.scalars().all()
+    AccountCache.store_account_ids(user_id, account_ids, generation)
+    return frozenset(account_ids)
+
+async def get_owned_account_ids(
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db)
+) -> FrozenSet[uuid.UUID]:
+    # For write handlers: on a cache miss the ids are read through the handler's own get_db
+    # session, and FastAPI resolves a dependency once per request, so every check shares this set
+    return await load_owned_account_ids(session, current_user.id)
+
+async def ensure_account_owned(
+    session: AsyncSession,
+    owned_account_ids: FrozenSet[uuid.UUID],
+    account_id: uuid.UUID,
+    forbidden_detail: str = "Not authorized to access this account",
+    not_found_detail: str = "Account not found",
+):
+    """
+    Raises 404 or 403 unless account_id is one of the caller's accounts.
+    Only a rejected id costs a query, to tell a missing account from someone else's.
+    """
+    if account_id in owned_account_ids:
+        return
+    exists = await session.scalar(select(Account.id).where(Account.id == account_id))
+    if exists is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden_detail)
+
+class OwnedAccount:
+    """
+    Dependency resolving the `account_id` path parameter to the caller's account.
+
+    The account comes from the snapshot cache when present, so ownership is usually
+    checked without a query; otherwise one lookup loads, checks and caches it.
+    Handlers receive an AccountSnapshot (id, user_id, account_number, balance, currency).
+    """
+
+    def __init__(self, forbidden_detail: str = "Not authorized to access this account"):
+        self.forbidden_detail = forbidden_detail
+
+    async def __call__(
+        self,
+        account_id: uuid.UUID,
+        current_user: User = Depends(get_current_user),
+        session: AsyncSession = Depends(get_read_db)
+    ) -> AccountSnapshot:
+        account = AccountCache.get(account_id)
+        if account is None:
+            generation = AccountCache.generation()
+            result = await session.execute(select(Account).where(Account.id == account_id))
+            found = result.scalar_one_or_none()
+            if found is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
+            account = AccountCache.store([found], generation)[0]
+
+        if account.user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=self.forbidden_detail)
+        return account
+
+get_owned_account = OwnedAccount()
@@ -1,14 +1,18 @@
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, List, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import uuid
 
-from app.db.session import get_db
+from app.db.session import get_db, mark_recent_write
+from app.api.deps import get_owned_account, get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.account import Account
-from app.schemas.account import AccountCreate, AccountResponse
+from app.schemas.account import AccountCreate, AccountResponse, BalanceHistoryResponse
+from app.services.account_cache import AccountCache, AccountSnapshot
+from app.services.balance_history import BalanceHistoryService, BALANCE_HISTORY_DEFAULT_DAYS
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
@@ -27,31 +31,49 @@ async def create_account(
     )
     session.add(new_account)
     await session.commit()
+    mark_recent_write(current_user.id)
     await session.refresh(new_account)
     return new_account
 
 @router.get("/me", response_model=List[AccountResponse])
 async def get_my_accounts(
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = Depends(get_read_db)
 ):
+    # Frontend polls land here; serve snapshots until a commit changes them
+    cached = AccountCache.get_for_user(current_user.id)
+    if cached is not None:
+        return cached
+
+    generation = AccountCache.generation()
     result = await session.execute(select(Account).where(Account.user_id == current_user.id))
     accounts = result.scalars().all()
-    return accounts
+    return AccountCache.store_for_user(current_user.id, accounts, generation)
 
 @router.get("/{account_id}", response_model=AccountResponse)
-async def get_account(
-    account_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
-):
-    result = await session.execute(select(Account).where(Account.id == account_id))
-    account = result.scalar_one_or_none()
-    
-    if not account:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-        
-    if account.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this account")
-        
+async def get_account(account: AccountSnapshot = Depends(get_owned_account)):
     return account
+
+@router.get("/{account_id}/balance-history", response_model=BalanceHistoryResponse)
+async def get_balance_history(
+    start: Optional[date] = Query(default=None, alias="from", description="First day (UTC), inclusive; defaults to 30 days before `to`"),
+    end: Optional[date] = Query(default=None, alias="to", description="Last day (UTC), inclusive; defaults to today"),
+    interval: Literal["day", "week", "month"] = "day",
+    account: AccountSnapshot = Depends(get_owned_account),
+    session: AsyncSession = Depends(get_read_db)
+):
+    """
+    Closing balances for charting, answered from daily checkpoints rather than by replaying transactions.
+    """
+    # Nothing can have changed after today, so the range stops there
+    today = datetime.now(timezone.utc).date()
+    end = min(end or today, today)
+    if start is None:
+        start = end - timedelta(days=BALANCE_HISTORY_DEFAULT_DAYS)
+
+    try:
+        points = await BalanceHistoryService.get_history(session, account.id, account.balance, start, end, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return BalanceHistoryResponse(account_id=account.id, interval=interval, points=points)
@@ -5,13 +5,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.db.session import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.hashing import HashingSaturatedError
+from app.core.security import verify_password_async, get_password_hash_async, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
 from app.schemas.token import Token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+def _hashing_unavailable(e: HashingSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def signup(user_in: UserCreate, session: AsyncSession = Depends(get_db)):
     # Check if user exists
@@ -22,7 +30,10 @@ async def signup(user_in: UserCreate, session: AsyncSession = Depends(get_db)):
             detail="User with this email already exists"
         )
     
-    hashed_password = get_password_hash(user_in.password)
+    try:
+        hashed_password = await get_password_hash_async(user_in.password)
+    except HashingSaturatedError as e:
+        raise _hashing_unavailable(e)
     new_user = User(
         email=user_in.email,
         hashed_password=hashed_password,
@@ -37,7 +48,12 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Async
     result = await session.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except HashingSaturatedError as e:
+        raise _hashing_unavailable(e)
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
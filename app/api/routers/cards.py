@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import FrozenSet, List
 import uuid
 
-from app.db.session import get_db
-from app.core.security import get_current_user
+from app.db.session import get_db, mark_recent_write
+from app.api.deps import ensure_account_owned, get_owned_account_ids, get_read_db
+from app.core.responses import encoded_response
+from app.core.security import get_current_merchant, get_current_user
 from app.models.user import User
 from app.models.account import Account
 from app.models.card import Card
-from app.schemas.card import CardCreate, CardResponse
+from app.schemas.card import (
+    CardCreate,
+    CardResponse,
+    CardAuthorizationRequest,
+    CardAuthorizationResponse,
+    HoldCaptureBatch,
+    HoldReleaseBatch,
+    HoldSettlementResponse,
+    HoldSettlementResult,
+    card_list_adapter,
+)
+from app.services.card_authorization import SettlementResult, card_authorizations
 
 router = APIRouter(prefix="/cards", tags=["cards"])
 
@@ -17,17 +30,16 @@ router = APIRouter(prefix="/cards", tags=["cards"])
 async def create_card(
     card_in: CardCreate,
     current_user: User = Depends(get_current_user),
+    owned_account_ids: FrozenSet[uuid.UUID] = Depends(get_owned_account_ids),
     session: AsyncSession = Depends(get_db)
 ):
     # Verify account ownership
-    result = await session.execute(select(Account).where(Account.id == card_in.account_id))
-    account = result.scalar_one_or_none()
-    
-    if not account:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-        
-    if account.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to issue a card for this account")
+    await ensure_account_owned(
+        session,
+        owned_account_ids,
+        card_in.account_id,
+        forbidden_detail="Not authorized to issue a card for this account",
+    )
     
     # Generate random 16 digit card number, 3 digit cvc, and expiry 3 years from now
     import random
@@ -41,7 +53,7 @@ async def create_card(
     
     try:
         new_card = Card(
-            account_id=account.id,
+            account_id=card_in.account_id,
             card_number=card_number,
             cvc=cvc,
             expiry=expiry
@@ -49,7 +61,10 @@ async def create_card(
         
         session.add(new_card)
         await session.commit()
+        mark_recent_write(current_user.id)
         await session.refresh(new_card)
+        # Authorizations resolve cards from the in-memory index only
+        card_authorizations.register_card(new_card)
         
         return new_card
     except ValueError as e:
@@ -57,25 +72,64 @@ async def create_card(
 
 @router.get("/", response_model=List[CardResponse])
 async def get_cards(
+    request: Request,
     limit: int = 100,
     offset: int = 0,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = Depends(get_read_db)
 ):
-    # Fetch all cards linked to accounts owned by current_user
-    # Using a JOIN equivalent or simply fetching accounts first
-    accounts_result = await session.execute(select(Account).where(Account.user_id == current_user.id))
-    accounts = accounts_result.scalars().all()
-    
-    if not accounts:
-        return []
-        
-    account_ids = [acc.id for acc in accounts]
+    # Fetch all cards linked to accounts owned by current_user, ownership checked by the join
     cards_result = await session.execute(
         select(Card)
-        .where(Card.account_id.in_(account_ids))
+        .join(Account, Card.account_id == Account.id)
+        .where(Account.user_id == current_user.id)
         .offset(offset)
         .limit(limit)
     )
     
-    return cards_result.scalars().all()
+    cards = card_list_adapter.validate_python(cards_result.scalars().all(), from_attributes=True)
+    return encoded_response(request, card_list_adapter.dump_python(cards))
+
+def _settlement_response(hold_ids: List[uuid.UUID], outcomes: List[SettlementResult]) -> HoldSettlementResponse:
+    results = [
+        HoldSettlementResult(index=index, hold_id=hold_id, status=status_, detail=detail)
+        for index, (hold_id, (status_, detail)) in enumerate(zip(hold_ids, outcomes))
+    ]
+    failed = sum(1 for result in results if result.status == "failed")
+    return HoldSettlementResponse(settled=len(results) - failed, failed=failed, results=results)
+
+@router.post("/authorize", response_model=CardAuthorizationResponse, status_code=status.HTTP_200_OK)
+async def authorize_card(
+    authorization_in: CardAuthorizationRequest,
+    merchant_id: str = Depends(get_current_merchant),
+    session: AsyncSession = Depends(get_db)
+):
+    # Declines are answers, not errors: they come back as 200 with a reason
+    decision = await card_authorizations.authorize(
+        session,
+        authorization_in.card_number,
+        authorization_in.cvc,
+        authorization_in.expiry,
+        authorization_in.amount,
+        merchant_id,
+    )
+    return CardAuthorizationResponse(approved=decision.approved, hold_id=decision.hold_id, reason=decision.reason)
+
+@router.post("/holds/capture", response_model=HoldSettlementResponse, status_code=status.HTTP_200_OK)
+async def capture_holds(
+    batch_in: HoldCaptureBatch,
+    merchant_id: str = Depends(get_current_merchant),
+    session: AsyncSession = Depends(get_db)
+):
+    # Merchants settle only the holds they placed; anyone else's are reported as not found
+    outcomes = await card_authorizations.capture(session, [(item.hold_id, item.amount) for item in batch_in.captures], merchant_id)
+    return _settlement_response([item.hold_id for item in batch_in.captures], outcomes)
+
+@router.post("/holds/release", response_model=HoldSettlementResponse, status_code=status.HTTP_200_OK)
+async def release_holds(
+    batch_in: HoldReleaseBatch,
+    merchant_id: str = Depends(get_current_merchant),
+    session: AsyncSession = Depends(get_db)
+):
+    outcomes = await card_authorizations.release(session, batch_in.hold_ids, merchant_id)
+    return _settlement_response(batch_in.hold_ids, outcomes)
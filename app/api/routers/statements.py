@@ -1,59 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-import uuid
-
-from app.db.session import get_db
-from app.core.security import get_current_user
-from app.models.user import User
-from app.models.account import Account
-from app.models.transaction import Transaction
+from datetime import datetime
+from typing import Literal, Optional
+
+from app.api.deps import OwnedAccount, get_read_db
+from app.core.responses import encoded_response
 from app.schemas.statement import StatementResponse
-from app.schemas.transaction import TransactionResponse
+from app.schemas.transaction import transaction_list_adapter
+from app.services.account_cache import AccountSnapshot
+from app.services.account_service import AccountService, to_db_timestamp
+from app.services.statement_export import StatementExportService, EXPORT_MEDIA_TYPES
 
 router = APIRouter(prefix="/accounts/{account_id}/statement", tags=["statements"])
 
+get_statement_account = OwnedAccount("Not authorized to view statement for this account")
+
 @router.get("/", response_model=StatementResponse)
 async def get_statement(
-    account_id: uuid.UUID,
+    request: Request,
+    period_start: Optional[datetime] = Query(default=None, alias="from", description="Inclusive start of the statement period"),
+    period_end: Optional[datetime] = Query(default=None, alias="to", description="Exclusive end of the statement period"),
     limit: int = 100,
-    offset: int = 0,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    after: Optional[str] = Query(default=None, description="Opaque cursor from next_cursor of the previous page"),
+    offset: int = Query(default=0, deprecated=True, description="Use `after` instead; cost grows with the offset"),
+    account: AccountSnapshot = Depends(get_statement_account),
+    session: AsyncSession = Depends(get_read_db)
 ):
-    # Verify account ownership
-    result = await session.execute(select(Account).where(Account.id == account_id))
-    account = result.scalar_one_or_none()
-    
-    if not account:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-        
-    if account.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view statement for this account")
-        
-    # Fetch transactions for statement mock
-    tx_result = await session.execute(
-        select(Transaction)
-        .where(Transaction.account_id == account_id)
-        .order_by(Transaction.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-    )
-    transactions = tx_result.scalars().all()
-    
-    total_credits = sum(tx.amount for tx in transactions if tx.type == "credit")
-    total_debits = sum(tx.amount for tx in transactions if tx.type == "debit")
-    net_change = total_credits - total_debits
-    starting_balance = account.balance - net_change
+    if period_start is not None and period_end is not None and to_db_timestamp(period_start) >= to_db_timestamp(period_end):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Statement period must end after it starts")
+
+    # Summary over the whole period, computed in SQL; the transaction list is paginated separately
+    summary = await AccountService.get_period_summary(session, account.id, account.balance, period_start, period_end)
+
+    try:
+        transactions = await AccountService.get_transactions(
+            session, account.id, limit, offset, after=after, start=period_start, end=period_end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    return StatementResponse(
+    statement = StatementResponse(
         account_id=account.id,
         account_number=account.account_number,
         currency=account.currency,
-        starting_balance=starting_balance,
-        ending_balance=account.balance,
-        total_credits=total_credits,
-        total_debits=total_debits,
-        transaction_count=len(transactions),
-        transactions=[TransactionResponse.model_validate(tx) for tx in transactions]
+        period_start=period_start,
+        period_end=period_end,
+        **summary,
+        transactions=transaction_list_adapter.validate_python(transactions, from_attributes=True),
+        next_cursor=AccountService.next_cursor(transactions, limit)
+    )
+    return encoded_response(request, statement.model_dump())
+
+@router.get("/export")
+async def export_statement(
+    request: Request,
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    period_start: Optional[datetime] = Query(default=None, alias="from", description="Inclusive start of the export period"),
+    period_end: Optional[datetime] = Query(default=None, alias="to", description="Exclusive end of the export period"),
+    account: AccountSnapshot = Depends(get_statement_account),
+    session: AsyncSession = Depends(get_read_db)
+):
+    """
+    Streams every transaction in the period, oldest first, without building the list in memory.
+    """
+    if period_start is not None and period_end is not None and to_db_timestamp(period_start) >= to_db_timestamp(period_end):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Statement period must end after it starts")
+
+    # The session stays open until the response has been sent, so the stream can keep using it
+    return StreamingResponse(
+        StatementExportService.iter_export(
+            session, account.id, export_format, period_start, period_end, is_disconnected=request.is_disconnected
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="statement-{account.account_number}.{export_format}"'}
     )
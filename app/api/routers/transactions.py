@@ -1,56 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
-import uuid
+from typing import List, Optional
 
-from app.db.session import get_db
-from app.core.security import get_current_user
-from app.models.user import User
-from app.models.account import Account
-from app.schemas.transaction import TransactionResponse
+from app.api.deps import OwnedAccount, get_read_db
+from app.core.responses import encoded_response
+from app.schemas.transaction import TransactionResponse, transaction_list_adapter
+from app.services.account_cache import AccountSnapshot
 from app.services.account_service import AccountService
 
 router = APIRouter(prefix="/accounts/{account_id}/transactions", tags=["transactions"])
 
+get_transactions_account = OwnedAccount("Not authorized to view transactions for this account")
+
 @router.get("/", response_model=List[TransactionResponse])
 async def get_transactions(
-    account_id: uuid.UUID,
+    request: Request,
     limit: int = 100,
-    offset: int = 0,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    after: Optional[str] = Query(default=None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    offset: int = Query(default=0, deprecated=True, description="Use `after` instead; cost grows with the offset"),
+    account: AccountSnapshot = Depends(get_transactions_account),
+    session: AsyncSession = Depends(get_read_db)
 ):
-    # Verify account ownership first
-    result = await session.execute(select(Account).where(Account.id == account_id))
-    account = result.scalar_one_or_none()
-    
-    if not account:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
-        
-    if account.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view transactions for this account")
-        
     try:
-        transactions = await AccountService.get_transactions(session, account_id, limit, offset)
+        transactions = await AccountService.get_transactions(session, account.id, limit, offset, after=after)
+        next_cursor = AccountService.next_cursor(transactions, limit)
         
-        response_data = []
-        for tx in transactions:
-            counterparty = None
-            if tx.related_account_id:
-                # Resolve the linked Account and then the User to get the email
-                acc_result = await session.execute(select(Account).where(Account.id == tx.related_account_id))
-                related_acc = acc_result.scalar_one_or_none()
-                if related_acc:
-                    user_result = await session.execute(select(User).where(User.id == related_acc.user_id))
-                    related_user = user_result.scalar_one_or_none()
-                    if related_user:
-                        counterparty = related_user.email
-            
-            tx_dict = TransactionResponse.model_validate(tx).model_dump()
-            tx_dict["counterparty_name"] = counterparty
-            response_data.append(tx_dict)
-            
-        return response_data
+        # Resolve every counterparty on the page at once instead of two queries per row
+        counterparties = await AccountService.get_counterparty_names(
+            session, (tx.related_account_id for tx in transactions if tx.related_account_id)
+        )
+
+        # One validation pass for the whole page; the encoded response skips response_model
+        response_data = transaction_list_adapter.validate_python(transactions, from_attributes=True)
+        for tx in response_data:
+            tx.counterparty_name = counterparties.get(tx.related_account_id)
+
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return encoded_response(request, transaction_list_adapter.dump_python(response_data), headers=headers)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,61 +1,259 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
-from app.db.session import get_db
+from app.api.deps import ensure_account_owned, get_owned_account_ids
+from app.db.session import get_db, mark_recent_write
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.account import Account
-from app.schemas.transfer import TransferCreate
-from app.services.transfer_service import TransferService
+from app.models.transfer_job import TransferJob
+from app.schemas.transfer import (
+    TransferCreate, TransferBatchCreate, TransferBatchResponse, TransferLegResult,
+    TransferAcceptedResponse, TransferJobResponse
+)
+from app.services.account_locks import account_locks
+from app.services.group_commit import transfer_group_commit
+from app.services.idempotency_service import IdempotencyService
+from app.services.transfer_service import TransferService, TransferConflictError
+from app.services.transfer_worker import TransferQueue, transfer_workers
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 import uuid
 
 router = APIRouter(prefix="/transfers", tags=["transfers"])
 
-@router.post("/", status_code=status.HTTP_200_OK)
-async def create_transfer(
-    transfer_in: TransferCreate,
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
-):
-    # Fetch from_account to verify ownership
-    result = await session.execute(select(Account).where(Account.id == transfer_in.from_account_id))
-    from_account = result.scalar_one_or_none()
-    
-    if not from_account:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Source account not found")
-        
-    if from_account.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to transfer from this account")
-        
-    to_account_id = None
+def _pick_primary_account(accounts: List[Tuple[uuid.UUID, str]]) -> uuid.UUID:
+    # Safely prioritize pushing funds into their primary checking (100) or gracefully falling back
+    return next((acc_id for acc_id, number in accounts if number.startswith("100")), accounts[0][0])
+
+async def _verify_source_account(session: AsyncSession, from_account_id: uuid.UUID, owned_account_ids: FrozenSet[uuid.UUID]):
+    await ensure_account_owned(
+        session,
+        owned_account_ids,
+        from_account_id,
+        forbidden_detail="Not authorized to transfer from this account",
+        not_found_detail="Source account not found",
+    )
+
+async def _resolve_destination(session: AsyncSession, to_identifier: str) -> uuid.UUID:
     try:
-        to_account_id = uuid.UUID(transfer_in.to_identifier)
+        return uuid.UUID(to_identifier)
     except ValueError:
         # Not a valid UUID; assume it's an email search string
-        user_result = await session.execute(select(User).where(User.email == transfer_in.to_identifier))
+        user_result = await session.execute(select(User).where(User.email == to_identifier))
         to_user = user_result.scalar_one_or_none()
-        
+
         if not to_user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Destination user not found via email")
-            
+
         accounts_result = await session.execute(select(Account).where(Account.user_id == to_user.id))
         user_accounts = accounts_result.scalars().all()
-        
+
         if not user_accounts:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Destination user has no active accounts")
-            
-        # Safely prioritize pushing funds into their primary checking (100) or gracefully falling back
-        primary_acc = next((a for a in user_accounts if a.account_number.startswith("100")), user_accounts[0])
-        to_account_id = primary_acc.id
+
+        return _pick_primary_account([(a.id, a.account_number) for a in user_accounts])
+
+def _replay(stored, request_hash: str) -> JSONResponse:
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Idempotency-Key was already used with a different request body"
+        )
+    return JSONResponse(content=stored.body, status_code=stored.status_code, headers={"Idempotent-Replayed": "true"})
+
+@router.post("/", status_code=status.HTTP_200_OK)
+async def create_transfer(
+    transfer_in: TransferCreate,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255),
+    current_user: User = Depends(get_current_user),
+    owned_account_ids: FrozenSet[uuid.UUID] = Depends(get_owned_account_ids),
+    session: AsyncSession = Depends(get_db)
+):
+    # Captured up front: a rolled-back transfer expires the ORM instance
+    user_id = current_user.id
+
+    # A replayed key returns the stored response without touching accounts or balances
+    request_hash = IdempotencyService.hash_request(transfer_in.model_dump_json())
+    if idempotency_key:
+        stored = await IdempotencyService.lookup(session, user_id, idempotency_key)
+        if stored is not None:
+            return _replay(stored, request_hash)
+
+    await _verify_source_account(session, transfer_in.from_account_id, owned_account_ids)
+    to_account_id = await _resolve_destination(session, transfer_in.to_identifier)
+
+    response_body = {"status": "success", "message": "Transfer completed successfully"}
+    # The key is committed together with the transfer, so a crash can never separate them
+    records = []
+    if idempotency_key:
+        records.append(IdempotencyService.build_record(
+            user_id, idempotency_key, request_hash, status.HTTP_200_OK, response_body
+        ))
 
     try:
-        await TransferService.transfer_funds(
-            from_account_id=transfer_in.from_account_id,
-            to_account_id=to_account_id,
-            amount=transfer_in.amount,
-            session=session
+        if transfer_group_commit.enabled:
+            # Shares a commit with other transfers arriving in the same window
+            await transfer_group_commit.submit(transfer_in.from_account_id, to_account_id, transfer_in.amount, records)
+        else:
+            await account_locks.transfer_funds(
+                from_account_id=transfer_in.from_account_id,
+                to_account_id=to_account_id,
+                amount=transfer_in.amount,
+                session=session,
+                records=records
+            )
+        for record in records:
+            IdempotencyService.remember(record)
+        mark_recent_write(user_id)
+        return response_body
+    except IntegrityError:
+        # A concurrent request with the same key committed first; our transfer was rolled back
+        stored = await IdempotencyService.lookup(session, user_id, idempotency_key) if idempotency_key else None
+        if stored is None:
+            raise
+        return _replay(stored, request_hash)
+    except TransferConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post("/batch", response_model=TransferBatchResponse, status_code=status.HTTP_200_OK)
+async def create_transfer_batch(
+    batch_in: TransferBatchCreate,
+    current_user: User = Depends(get_current_user),
+    owned: FrozenSet[uuid.UUID] = Depends(get_owned_account_ids),
+    session: AsyncSession = Depends(get_db)
+):
+    """
+    Applies up to MAX_BATCH_LEGS transfers in one database transaction.
+    Ownership and destination lookups cost one query each for the whole batch.
+    """
+    atomic = batch_in.mode == "all_or_nothing"
+    legs = batch_in.legs
+
+    # Sources are checked against the caller's (usually cached) account ids; only
+    # foreign ones cost a query, to tell a missing account from someone else's
+    foreign_ids = {leg.from_account_id for leg in legs} - owned
+    existing: Set[uuid.UUID] = set()
+    if foreign_ids:
+        existing_result = await session.execute(select(Account.id).where(Account.id.in_(foreign_ids)))
+        existing = set(existing_result.scalars().all())
+
+    # One query for every destination given as an email address
+    destinations: List[Optional[uuid.UUID]] = []
+    emails = set()
+    for leg in legs:
+        try:
+            destinations.append(uuid.UUID(leg.to_identifier))
+        except ValueError:
+            destinations.append(None)
+            emails.add(leg.to_identifier)
+
+    accounts_by_email: Dict[str, List[Tuple[uuid.UUID, str]]] = {}
+    if emails:
+        email_result = await session.execute(
+            select(User.email, Account.id, Account.account_number)
+            .outerjoin(Account, Account.user_id == User.id)
+            .where(User.email.in_(emails))
         )
-        return {"status": "success", "message": "Transfer completed successfully"}
+        for email, acc_id, account_number in email_result.all():
+            user_accounts = accounts_by_email.setdefault(email, [])
+            if acc_id is not None:
+                user_accounts.append((acc_id, account_number))
+
+    # Reject legs that fail ownership or destination checks before touching any balance
+    rejections: Dict[int, str] = {}
+    for index, leg in enumerate(legs):
+        if leg.from_account_id not in owned:
+            if leg.from_account_id in existing:
+                rejections[index] = "Not authorized to transfer from this account"
+            else:
+                rejections[index] = "Source account not found"
+        elif destinations[index] is None:
+            if leg.to_identifier not in accounts_by_email:
+                rejections[index] = "Destination user not found via email"
+            elif not accounts_by_email[leg.to_identifier]:
+                rejections[index] = "Destination user has no active accounts"
+            else:
+                destinations[index] = _pick_primary_account(accounts_by_email[leg.to_identifier])
+
+    outcomes: Dict[int, Optional[str]] = dict(rejections)
+    if not (atomic and rejections):
+        pending = [index for index in range(len(legs)) if index not in rejections]
+        try:
+            errors = await TransferService.transfer_funds_batch(
+                [(legs[i].from_account_id, destinations[i], legs[i].amount) for i in pending],
+                session,
+                atomic=atomic
+            )
+        except TransferConflictError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        for index, error in zip(pending, errors):
+            outcomes[index] = str(error) if error is not None else None
+        mark_recent_write(current_user.id)
+
+    failed = sum(1 for detail in outcomes.values() if detail is not None)
+    committed = not (atomic and failed)
+
+    results = []
+    for index in range(len(legs)):
+        if index not in outcomes:
+            # all_or_nothing stopped before reaching this leg
+            results.append(TransferLegResult(index=index, status="skipped"))
+        elif outcomes[index] is not None:
+            results.append(TransferLegResult(index=index, status="failed", detail=outcomes[index]))
+        elif committed:
+            results.append(TransferLegResult(index=index, status="applied"))
+        else:
+            results.append(TransferLegResult(index=index, status="rolled_back"))
+
+    return TransferBatchResponse(
+        mode=batch_in.mode,
+        committed=committed,
+        applied=sum(1 for r in results if r.status == "applied"),
+        failed=failed,
+        results=results
+    )
+
+@router.post("/async", response_model=TransferAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_transfer_async(
+    transfer_in: TransferCreate,
+    current_user: User = Depends(get_current_user),
+    owned_account_ids: FrozenSet[uuid.UUID] = Depends(get_owned_account_ids),
+    session: AsyncSession = Depends(get_db)
+):
+    """
+    Validates and queues a transfer; a background worker applies it.
+    Poll GET /transfers/{transfer_id} for the outcome.
+    """
+    user_id = current_user.id
+    await _verify_source_account(session, transfer_in.from_account_id, owned_account_ids)
+    to_account_id = await _resolve_destination(session, transfer_in.to_identifier)
+
+    try:
+        job = await TransferQueue.enqueue(session, user_id, transfer_in.from_account_id, to_account_id, transfer_in.amount)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    transfer_workers.notify()
+    return TransferAcceptedResponse(transfer_id=job.id, status="Transfer Initiated")
+
+@router.get("/{transfer_id}", response_model=TransferJobResponse)
+async def get_transfer_status(
+    transfer_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db)
+):
+    result = await session.execute(select(TransferJob).where(TransferJob.id == transfer_id))
+    job = result.scalar_one_or_none()
+
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transfer not found")
+
+    if job.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this transfer")
+
+    return job
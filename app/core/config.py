@@ -0,0 +1,188 @@
+from functools import lru_cache
+from typing import Dict, Literal, Optional, Union
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
+
+Profile = Literal["dev", "prod", "bench"]
+JournalMode = Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]
+Synchronous = Literal["OFF", "NORMAL", "FULL", "EXTRA"]
+
+# Defaults per profile; any of them can be overridden by the matching environment variable.
+#   dev:   SQL echo on, durable enough for local work
+#   prod:  WAL with synchronous=FULL so a committed transfer survives power loss
+#   bench: WAL with synchronous=OFF and larger pools; never point it at real data
+PROFILE_DEFAULTS: Dict[str, dict] = {
+    "dev": {
+        "db_echo": True,
+        "slow_query_threshold_ms": 100,
+        "db_pool_size": 5,
+        "db_max_overflow": 10,
+        "db_read_pool_size": 5,
+        "db_read_max_overflow": 10,
+        "sqlite_journal_mode": "WAL",
+        "sqlite_synchronous": "NORMAL",
+        "sqlite_busy_timeout_ms": 5000,
+        "sqlite_cache_size_kib": 16 * 1024,
+        "sqlite_mmap_size_bytes": 0,
+    },
+    "prod": {
+        "db_echo": False,
+        "slow_query_threshold_ms": 250,
+        "db_pool_size": 10,
+        "db_max_overflow": 20,
+        "db_read_pool_size": 20,
+        "db_read_max_overflow": 20,
+        "sqlite_journal_mode": "WAL",
+        "sqlite_synchronous": "FULL",
+        "sqlite_busy_timeout_ms": 5000,
+        "sqlite_cache_size_kib": 64 * 1024,
+        "sqlite_mmap_size_bytes": 256 * 1024 * 1024,
+    },
+    "bench": {
+        "db_echo": False,
+        "slow_query_threshold_ms": 250,
+        "db_pool_size": 20,
+        "db_max_overflow": 40,
+        "db_read_pool_size": 40,
+        "db_read_max_overflow": 40,
+        "sqlite_journal_mode": "WAL",
+        "sqlite_synchronous": "OFF",
+        "sqlite_busy_timeout_ms": 10000,
+        "sqlite_cache_size_kib": 64 * 1024,
+        "sqlite_mmap_size_bytes": 256 * 1024 * 1024,
+    },
+}
+
+class Settings(BaseSettings):
+    """
+    Process configuration read from the environment (and an optional .env file).
+    Fields left unset fall back to the selected profile's defaults.
+    """
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    app_profile: Profile = "dev"
+    database_url: str = "sqlite+aiosqlite:///./data/banking.db"
+    # Replica for read endpoints; defaults to read-only connections to database_url
+    read_database_url: Optional[str] = None
+    # How long a user's reads stay on the primary after they write
+    read_your_writes_window_seconds: float = 5.0
+
+    db_echo: Optional[bool] = None
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_read_pool_size: Optional[int] = None
+    db_read_max_overflow: Optional[int] = None
+    db_pool_timeout_seconds: float = 30.0
+    log_level: str = "INFO"
+    # Records buffered for the background log writer before new ones are dropped
+    log_queue_size: int = 10000
+    # Logger name prefix -> fraction of sub-WARNING records kept, e.g. {"sqlalchemy.engine": 0.1}
+    log_sample_rates: Dict[str, float] = {}
+
+    # POST /transfers/ requests arriving within this window share one commit, up to
+    # transfer_group_commit_max_batch of them; 0 commits every transfer on its own
+    transfer_group_commit_window_ms: float = 0.0
+    transfer_group_commit_max_batch: int = 100
+
+    # Idempotency keys older than this are ignored and may be reused
+    idempotency_key_retention_hours: float = 24.0
+    # In-memory front for the idempotency_keys table
+    idempotency_cache_max_entries: int = 10000
+    idempotency_cache_ttl_seconds: float = 15 * 60
+
+    # API key -> merchant id, for the card authorization and settlement endpoints
+    merchant_api_keys: Dict[str, str] = {}
+
+    # Statements at least this slow are logged with their route; 0 disables the log
+    slow_query_threshold_ms: Optional[float] = None
+
+    sqlite_journal_mode: Optional[JournalMode] = None
+    sqlite_synchronous: Optional[Synchronous] = None
+    sqlite_busy_timeout_ms: Optional[int] = None
+    sqlite_cache_size_kib: Optional[int] = None
+    sqlite_mmap_size_bytes: Optional[int] = None
+
+    def resolved(self, name: str):
+        value = getattr(self, name)
+        return PROFILE_DEFAULTS[self.app_profile][name] if value is None else value
+
+    def url(self, read_only: bool = False) -> str:
+        return (self.read_database_url or self.database_url) if read_only else self.database_url
+
+    def is_sqlite(self, read_only: bool = False) -> bool:
+        return make_url(self.url(read_only)).get_backend_name() == "sqlite"
+
+    def is_memory_db(self, read_only: bool = False) -> bool:
+        return self.is_sqlite(read_only) and make_url(self.url(read_only)).database in (None, "", ":memory:")
+
+    def sqlite_pragmas(self, read_only: bool = False) -> Dict[str, Union[int, str]]:
+        """
+        PRAGMAs applied to every new connection, in order.
+        Read-only connections skip the write-side tuning and refuse writes with query_only.
+        """
+        if not self.is_sqlite(read_only):
+            return {}
+        if read_only:
+            return {
+                "busy_timeout": self.resolved("sqlite_busy_timeout_ms"),
+                "query_only": "ON",
+                "cache_size": -self.resolved("sqlite_cache_size_kib"),
+                "mmap_size": self.resolved("sqlite_mmap_size_bytes"),
+            }
+        # busy_timeout goes first so its lock wait also covers switching the journal mode
+        pragmas: Dict[str, Union[int, str]] = {"busy_timeout": self.resolved("sqlite_busy_timeout_ms")}
+        if not self.is_memory_db():
+            # In-memory databases cannot use WAL
+            pragmas["journal_mode"] = self.resolved("sqlite_journal_mode")
+        pragmas["synchronous"] = self.resolved("sqlite_synchronous")
+        # Negative cache_size is in KiB rather than pages
+        pragmas["cache_size"] = -self.resolved("sqlite_cache_size_kib")
+        pragmas["mmap_size"] = self.resolved("sqlite_mmap_size_bytes")
+        return pragmas
+
+    def engine_options(self, read_only: bool = False) -> dict:
+        """
+        Keyword arguments for create_async_engine.
+        """
+        options = {"echo": self.resolved("db_echo")}
+        if self.is_sqlite(read_only):
+            options["connect_args"] = {"check_same_thread": False}
+        if not self.is_memory_db(read_only):
+            # In-memory SQLite gets a StaticPool, which takes no sizing
+            options.update(
+                pool_size=self.resolved("db_read_pool_size" if read_only else "db_pool_size"),
+                max_overflow=self.resolved("db_read_max_overflow" if read_only else "db_max_overflow"),
+                pool_timeout=self.db_pool_timeout_seconds,
+            )
+        return options
+
+    def summary(self) -> dict:
+        """
+        Settings in effect, safe to log (credentials in the URL are masked).
+        """
+        options = self.engine_options()
+        read_options = self.engine_options(read_only=True)
+        return {
+            "profile": self.app_profile,
+            "database_url": make_url(self.database_url).render_as_string(hide_password=True),
+            "read_database_url": make_url(self.url(read_only=True)).render_as_string(hide_password=True),
+            "echo": options["echo"],
+            "pool_size": options.get("pool_size"),
+            "max_overflow": options.get("max_overflow"),
+            "read_pool_size": read_options.get("pool_size"),
+            "read_max_overflow": read_options.get("max_overflow"),
+            "pool_timeout_seconds": options.get("pool_timeout"),
+            "read_your_writes_window_seconds": self.read_your_writes_window_seconds,
+            "slow_query_threshold_ms": self.resolved("slow_query_threshold_ms"),
+            "transfer_group_commit_window_ms": self.transfer_group_commit_window_ms,
+            "transfer_group_commit_max_batch": self.transfer_group_commit_max_batch,
+            "log_queue_size": self.log_queue_size,
+            "log_sample_rates": self.log_sample_rates,
+            "pragmas": self.sqlite_pragmas(),
+            "read_pragmas": self.sqlite_pragmas(read_only=True),
+        }
+
+@lru_cache()
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without blocking the event loop
+HASHING_MAX_WORKERS = 4
+# Requests allowed to wait for a free worker before new ones are rejected
+HASHING_MAX_QUEUE = 32
+
+class HashingSaturatedError(Exception):
+    """
+    Raised when every hashing worker is busy and the wait queue is full.
+    """
+
+class PasswordHasher:
+    """
+    Runs password hashing on a dedicated, bounded thread pool.
+
+    At most max_workers hashes run at once and at most max_queue more may wait;
+    beyond that calls fail fast with HashingSaturatedError so a login burst
+    sheds load instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: int = HASHING_MAX_WORKERS, max_queue: int = HASHING_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HashingSaturatedError("Password hashing capacity exhausted, please retry shortly")
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        job = self._get_executor().submit(fn, *args)
+        # The slot is freed when the job ends, not when the caller stops waiting: a caller
+        # cancelled mid-hash leaves the hash running on the pool until it finishes
+        job.add_done_callback(lambda done: self._call_on_loop(loop, done, started))
+        return await asyncio.wrap_future(job)
+
+    def _call_on_loop(self, loop: asyncio.AbstractEventLoop, job: Future, started: float):
+        # Runs on the worker thread; the counters are only touched on the event loop
+        try:
+            loop.call_soon_threadsafe(self._finished, job, started)
+        except RuntimeError:
+            # The loop closed while the job ran; nothing is left to account for
+            pass
+
+    def _finished(self, job: Future, started: float):
+        self._in_flight -= 1
+        if job.cancelled() or job.exception() is not None:
+            return
+        # Includes time spent queued behind other hashes, which is what callers experience
+        elapsed = time.perf_counter() - started
+        self.completed += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": (self.total_seconds / self.completed) if self.completed else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+password_hasher = PasswordHasher()
@@ -1,24 +1,145 @@
+import atexit
+import copy
 import logging
-from pythonjsonlogger import jsonlogger
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+
+try:
+    # orjson is optional; it roughly halves the cost of encoding each record
+    from pythonjsonlogger.orjson import OrjsonFormatter as JsonFormatter
+except ImportError:
+    from pythonjsonlogger.json import JsonFormatter
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without ever blocking the caller.
+    When the listener falls behind, new records are dropped and counted instead.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments here; JSON encoding happens on the listener thread.
+        # The default prepare() would format the whole record on the calling thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every 1/rate records below WARNING for loggers with a configured rate.
+    The longest matching logger-name prefix wins; warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._counters: Dict[str, int] = {}
+
+    def _rate_for(self, name: str) -> Optional[float]:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        every = round(1 / rate)
+        seen = self._counters.get(record.name, 0)
+        self._counters[record.name] = seen + 1
+        return seen % every == 0
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+
+log_records_dropped = registry.counter(
+    "log_records_dropped_total",
+    "Log records discarded because the logging queue was full.",
+)
+log_queue_depth = registry.gauge(
+    "log_queue_depth",
+    "Log records waiting for the background writer.",
+)
+_reported_drops = 0
+
+def _collect_logging_metrics():
+    global _reported_drops
+    if _queue_handler is None:
+        return
+    dropped = _queue_handler.dropped
+    log_records_dropped.inc(dropped - _reported_drops)
+    _reported_drops = dropped
+    log_queue_depth.set(_queue_handler.queue.qsize())
+
+registry.on_collect(_collect_logging_metrics)
+
+def setup_logging(settings: Optional[Settings] = None):
+    """
+    Routes the root logger through a bounded queue to a background writer thread.
+    Calling it again replaces the previous pipeline.
+    """
+    global _listener, _queue_handler
+    settings = settings or get_settings()
 
-def setup_logging():
     logger = logging.getLogger()
-    
+
     # Set the minimum log level
-    logger.setLevel(logging.INFO)
-    
+    logger.setLevel(settings.log_level)
+
     # Remove all default handlers
-    for handler in logger.handlers:
+    stop_logging()
+    for handler in list(logger.handlers):
         logger.removeHandler(handler)
-        
-    # Create the structured JSON formatter
+
+    # Create the structured JSON formatter; it only ever runs on the listener thread
     log_handler = logging.StreamHandler()
-    formatter = jsonlogger.JsonFormatter(
-        '%(asctime)s %(levelname)s %(name)s %(message)s'
-    )
-    log_handler.setFormatter(formatter)
-    
-    # Add the JSON handler
-    logger.addHandler(log_handler)
-    
+    log_handler.setFormatter(JsonFormatter(LOG_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    if settings.log_sample_rates:
+        _queue_handler.addFilter(SamplingFilter(settings.log_sample_rates))
+
+    _listener = QueueListener(log_queue, log_handler, respect_handler_level=True)
+    _listener.start()
+
+    # Add the queue handler; the caller only pays for filtering and an enqueue
+    logger.addHandler(_queue_handler)
+
     return logger
+
+def stop_logging():
+    """
+    Flushes queued records and stops the writer thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
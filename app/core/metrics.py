@@ -0,0 +1,288 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from contextvars import Context, ContextVar
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format 0.0.4, implemented in-process so a local agent can
+# scrape /metrics and tests can assert on it without any client library.
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+AUTHORIZATION_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0.0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (bucket_counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    """
+    Holds metrics and renders them for a scrape.
+
+    Not thread-safe; like the caches, metrics are updated from the event loop only.
+    Callbacks registered with on_collect() run before each render, for gauges that
+    mirror state owned elsewhere (pool sizes, cache occupancy).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, callback: Callable[[], None]):
+        self._collectors.append(callback)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        for callback in self._collectors:
+            callback()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last body byte, by route template.",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled.",
+    ("method",),
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed while handling one request.",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+transfers_total = registry.counter(
+    "transfers_total",
+    "Transfers attempted, by outcome and failure reason.",
+    ("outcome", "reason"),
+)
+card_authorizations_total = registry.counter(
+    "card_authorizations_total",
+    "Card authorizations decided, by outcome and decline reason.",
+    ("outcome", "reason"),
+)
+card_authorization_duration = registry.histogram(
+    "card_authorization_duration_seconds",
+    "Service time of one card authorization decision, excluding HTTP handling.",
+    buckets=AUTHORIZATION_BUCKETS,
+)
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+    ("pool",),
+    buckets=POOL_WAIT_BUCKETS,
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections",
+    "Pooled database connections by state.",
+    ("pool", "state"),
+)
+
+def _route_template(scope) -> str:
+    # Templates like /accounts/{account_id} keep label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+class RequestStats:
+    """
+    Per-request accumulator. The middleware installs one in a contextvar and database
+    hooks add to it; being mutable, it is shared with tasks and threads spawned by the request.
+    """
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"] if self.scope else ""
+
+    @property
+    def route(self) -> str:
+        # Resolved lazily: routing has not happened yet when the stats are created
+        return _route_template(self.scope) if self.scope else "<unmatched>"
+
+    def server_timing(self, elapsed_seconds: float) -> str:
+        return (
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries", '
+            f"app;dur={elapsed_seconds * 1000:.2f}"
+        )
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+def start_background_task(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    Runs coro as a task in an empty context. Work shared by many requests (a group commit,
+    a write-behind flush) would otherwise inherit the stats of whichever request started it,
+    and its queries would be counted against that request alone.
+    """
+    # A task copies the context it is created in; Task(context=...) needs Python 3.11
+    return Context().run(asyncio.ensure_future, coro)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, in-flight requests and query counts per route.
+    Latency runs until the last body chunk is sent, so streamed responses are timed in full.
+    Responses carry a Server-Timing header with the database time spent before they started.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats(scope)
+        token = current_request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+        http_requests_in_flight.inc(method=method)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = stats.server_timing(time.perf_counter() - start).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = stats.route
+            http_requests_in_flight.dec(method=method)
+            http_request_duration.observe(time.perf_counter() - start, method=method, route=route, status=str(status_code))
+            http_request_db_queries.observe(stats.queries, method=method, route=route)
+            current_request_stats.reset(token)
@@ -0,0 +1,20 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(timestamp: datetime, row_id: uuid.UUID) -> str:
+    """
+    Opaque keyset cursor pointing just past (timestamp, id) in a newest-first listing.
+    """
+    raw = f"{timestamp.isoformat()}|{row_id.hex}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
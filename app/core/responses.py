@@ -0,0 +1,72 @@
+"""
+Response classes for high-volume list endpoints.
+
+Handlers validate their rows once, into the response schema, and hand the plain data to
+encoded_response(). Returning a Response directly skips FastAPI's second pass through
+response_model and jsonable_encoder, which costs more than the validation itself.
+The response_model stays on the route for the OpenAPI schema.
+"""
+import datetime
+import json
+import uuid
+from typing import Any, Mapping, Optional, Type
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    # orjson encodes UUIDs and datetimes natively and is several times faster than json
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # msgpack is optional; without it clients asking for it get JSON
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+def _default(value: Any):
+    # Same text forms as pydantic's JSON mode
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+class MsgPackResponse(Response):
+    """MessagePack response for internal consumers; UUIDs and datetimes are sent as strings."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default, use_bin_type=True)
+
+def wants_msgpack(request: Request) -> bool:
+    if msgpack is None:
+        return False
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+def encoded_response(request: Request, content: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    Encodes already validated content as MessagePack if the client accepts it, JSON otherwise.
+    Headers set on an injected Response parameter are not applied; pass them here instead.
+    """
+    response_class: Type[Response] = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    response = response_class(content, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
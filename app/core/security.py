@@ -1,12 +1,18 @@
 from datetime import datetime, timedelta, timezone
+import hmac
 from passlib.context import CryptContext
 import jwt
+import time
 from typing import Any, Optional
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, select
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.hashing import password_hasher
 from app.db.session import get_db
 from app.models.user import User
 
@@ -16,6 +22,27 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+merchant_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+# Active users keyed by token subject, so repeat requests skip the users lookup.
+# Entries never outlive the token that populated them.
+PRINCIPAL_CACHE_MAX_ENTRIES = 10000
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+
+principal_cache = TTLCache(max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    # Covers is_active flips, email changes and password resets made through the ORM
+    principal_cache.invalidate(str(target.id))
+
+def _cached_user(snapshot: tuple) -> User:
+    # A fresh detached instance per request, so handlers never share mutable state
+    user_id, email, hashed_password, is_active = snapshot
+    user = User(id=user_id, email=email, hashed_password=hashed_password, is_active=is_active)
+    make_transient_to_detached(user)
+    return user
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +50,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Async variants run bcrypt on the bounded hashing pool; use these from request handlers.
+# Both raise HashingSaturatedError when the pool is full.
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -48,7 +83,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSe
         user_id = uuid.UUID(user_id_str)
     except (jwt.InvalidTokenError, ValueError):
         raise credentials_exception
-        
+
+    snapshot = principal_cache.get(user_id_str)
+    if snapshot is not None:
+        return _cached_user(snapshot)
+
     result = await session.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     
@@ -56,4 +95,22 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSe
         raise credentials_exception
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+
+    token_ttl = payload.get("exp", 0) - time.time()
+    principal_cache.set(user_id_str, (user.id, user.email, user.hashed_password, user.is_active), ttl_seconds=token_ttl)
     return user
+
+async def get_current_merchant(api_key: Optional[str] = Depends(merchant_key_scheme)) -> str:
+    """
+    Merchant id for the card network endpoints, from the X-API-Key header.
+    """
+    if api_key:
+        # Compare against every key in constant time so timing reveals nothing about them
+        for key, merchant_id in get_settings().merchant_api_keys.items():
+            if hmac.compare_digest(key.encode(), api_key.encode()):
+                return merchant_id
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid merchant API key",
+        headers={"WWW-Authenticate": "ApiKey"},
+    )
@@ -0,0 +1,95 @@
+import logging
+import re
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.core.metrics import current_request_stats, db_pool_checkout_wait, db_pool_connections, registry
+
+slow_query_logger = logging.getLogger("app.db.slow_query")
+
+# Longest statement text written to a slow-query entry
+SLOW_QUERY_MAX_STATEMENT_CHARS = 2000
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+def normalize_statement(statement: str) -> str:
+    """
+    Collapses a statement to its shape so slow-query entries group together:
+    literals become ?, IN-lists of any length become (?...), whitespace is squeezed.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return normalized[:SLOW_QUERY_MAX_STATEMENT_CHARS]
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a connection.
+    The histogram label is the pool's logging name ("primary", "read").
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start, pool=self.logging_name or "default")
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany, threshold_seconds: Optional[float]):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.db_seconds += elapsed
+
+    if threshold_seconds is not None and elapsed >= threshold_seconds:
+        slow_query_logger.warning("Slow query", extra={
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": normalize_statement(statement),
+            "method": stats.method if stats is not None else None,
+            # Queries outside a request come from background workers
+            "route": stats.route if stats is not None else "<background>",
+        })
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for a failed statement; drop its start time
+    starts = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+def instrument_engine(engine: AsyncEngine, pool_name: str, slow_query_threshold_ms: Optional[float] = None):
+    """
+    Attributes every statement's count and duration to the current request, logs statements
+    slower than slow_query_threshold_ms (None or 0 disables it) and exports the pool's occupancy.
+    """
+    threshold_seconds = slow_query_threshold_ms / 1000.0 if slow_query_threshold_ms else None
+
+    def after_cursor_execute(*args):
+        _after_cursor_execute(*args, threshold_seconds=threshold_seconds)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+    def collect_pool():
+        # dispose() swaps the pool object, so look it up at scrape time
+        pool: Pool = engine.sync_engine.pool
+        if hasattr(pool, "checkedout"):
+            db_pool_connections.set(pool.checkedout(), pool=pool_name, state="checked_out")
+            db_pool_connections.set(pool.checkedin(), pool=pool_name, state="idle")
+            db_pool_connections.set(max(pool.overflow(), 0), pool=pool_name, state="overflow")
+
+    registry.on_collect(collect_pool)
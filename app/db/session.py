@@ -1,12 +1,51 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import logging
+from typing import Hashable
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 
-DATABASE_URL = "sqlite+aiosqlite:///./data/banking.db"
+from app.core.cache import TTLCache
+from app.core.config import Settings, get_settings
+from app.db.instrumentation import TimedAsyncAdaptedQueuePool, instrument_engine
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={"check_same_thread": False}
-)
+def build_engine(settings: Settings, read_only: bool = False, **overrides) -> AsyncEngine:
+    """
+    Creates an engine from the settings' profile; `overrides` win over its engine options.
+    Every new connection gets the profile's PRAGMAs before it is handed out.
+    """
+    options = settings.engine_options(read_only)
+    if "pool_size" in options:
+        # Sized pools record checkout waits under their role's name
+        options.update(poolclass=TimedAsyncAdaptedQueuePool, pool_logging_name="read" if read_only else "primary")
+    options.update(overrides)
+    # echo=True would make SQLAlchemy attach its own synchronous stream handler. Raising the
+    # logger level instead sends SQL through the queued application handlers (and their sampling).
+    if options.pop("echo", False):
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+    engine = create_async_engine(settings.url(read_only), **options)
+    pragmas = settings.sqlite_pragmas(read_only)
+
+    if pragmas:
+        @event.listens_for(engine.sync_engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return engine
+
+settings = get_settings()
+DATABASE_URL = settings.database_url
+
+engine = build_engine(settings)
+instrument_engine(engine, "primary", settings.resolved("slow_query_threshold_ms"))
+
+# Read endpoints get their own pool. With SQLite in WAL mode these connections read
+# concurrently with the writer; pointing READ_DATABASE_URL at a replica needs no code change.
+# A private in-memory database cannot be shared between pools, so it keeps one engine.
+read_engine = engine if settings.is_memory_db(read_only=True) else build_engine(settings, read_only=True)
+if read_engine is not engine:
+    instrument_engine(read_engine, "read", settings.resolved("slow_query_threshold_ms"))
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -16,6 +55,35 @@ AsyncSessionLocal = async_sessionmaker(
     class_=AsyncSession
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession
+)
+
+READ_YOUR_WRITES_MAX_PRINCIPALS = 100000
+
+# Principals who wrote recently; their reads go to the primary so they see their own changes
+# even once a lagging replica sits behind read_engine
+recent_writers = TTLCache(
+    max_entries=READ_YOUR_WRITES_MAX_PRINCIPALS, ttl_seconds=settings.read_your_writes_window_seconds
+)
+
+def mark_recent_write(principal: Hashable):
+    """
+    Call after committing a write on behalf of `principal` (a user id).
+    """
+    recent_writers.set(principal, True)
+
+def session_factory_for(principal: Hashable) -> async_sessionmaker:
+    """
+    Where reads for `principal` should go: the primary inside their read-your-writes window,
+    the read pool otherwise.
+    """
+    return AsyncSessionLocal if principal in recent_writers else AsyncReadSessionLocal
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
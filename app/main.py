@@ -2,12 +2,23 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from app.api.routers import auth, accounts, transfers, transactions, cards, statements
-from app.db.session import engine, get_db
-from app.core.logging import setup_logging
+from app.db.session import engine, read_engine, get_db, settings
+from app.core.logging import setup_logging, stop_logging
+from app.core.hashing import password_hasher
+from app.core.metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, registry
+from app.core.security import principal_cache
+from app.services.account_cache import AccountCache
+from app.services.account_service import counterparty_cache
+from app.services.balance_shards import balance_compactor
+from app.services.card_authorization import card_authorizations
+from app.services.group_commit import transfer_group_commit
+from app.services.idempotency_service import idempotency_cache
+from app.services.transfer_worker import transfer_workers
 
 # Configure structural JSON logging
 logger = setup_logging()
@@ -16,10 +27,22 @@ logger = setup_logging()
 async def lifespan(app: FastAPI):
     # Startup: Initialize resources
     logger.info("Starting up Banking REST Service")
+    logger.info("Database settings in effect", extra=settings.summary())
+    await transfer_workers.start()
+    await card_authorizations.start()
+    await balance_compactor.start()
     yield
     # Shutdown: Clean up resources
     logger.info("Shutting down Banking REST Service")
+    await transfer_group_commit.drain()
+    await transfer_workers.stop()
+    await card_authorizations.stop()
+    await balance_compactor.stop()
+    password_hasher.shutdown()
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    stop_logging()
 
 app = FastAPI(
     title="Banking REST Service",
@@ -43,6 +66,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency covers CORS handling and the full response body
+app.add_middleware(MetricsMiddleware)
+
 # Include all domain routers
 app.include_router(auth.router)
 app.include_router(accounts.router)
@@ -71,3 +97,19 @@ async def health_check(session: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Service is unhealthy or database is unreachable"
         )
+
+@app.get("/health/caches")
+async def cache_stats():
+    # Hit rates and eviction counts for sizing the in-process caches
+    return {
+        **AccountCache.stats(),
+        "principals": principal_cache.stats(),
+        "counterparties": counterparty_cache.stats(),
+        "idempotency": idempotency_cache.stats(),
+        "card_authorizations": card_authorizations.stats(),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus text format for a local scraper
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -3,5 +3,11 @@ from app.models.user import User
 from app.models.account import Account
 from app.models.transaction import Transaction
 from app.models.card import Card
+from app.models.idempotency_key import IdempotencyKey
+from app.models.transfer_job import TransferJob
+from app.models.dead_letter_transfer import DeadLetterTransfer
+from app.models.daily_balance import DailyBalance
+from app.models.card_hold import CardHold
+from app.models.balance_shard import BalanceShard
 
-__all__ = ["Base", "User", "Account", "Transaction", "Card"]
+__all__ = ["Base", "User", "Account", "Transaction", "Card", "IdempotencyKey", "TransferJob", "DeadLetterTransfer", "DailyBalance", "CardHold", "BalanceShard"]
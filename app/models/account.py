@@ -9,5 +9,16 @@ class Account(Base):
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
     account_number: Mapped[str] = mapped_column(unique=True, index=True)
+    # For hot accounts only part of the balance: see total_balance
     balance: Mapped[int] = mapped_column(default=0)
     currency: Mapped[str] = mapped_column(default="USD")
+    # Hot accounts take credits into this many BalanceShard rows instead of this one; 0 for the rest
+    shard_count: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    @property
+    def total_balance(self) -> int:
+        """
+        balance plus the credits still sitting in the account's shards.
+        """
+        # sharded_balance (see BalanceShard) is loaded by every query; other rows have no shards yet
+        return self.balance + (self.__dict__.get("sharded_balance") or 0)
@@ -0,0 +1,31 @@
+import uuid
+from sqlalchemy import ForeignKey, func, select
+from sqlalchemy.orm import Mapped, column_property, mapped_column
+from app.db.base import Base
+from app.models.account import Account
+
+class BalanceShard(Base):
+    """
+    One of a hot account's sub-balances. Credits land on a random shard instead of the
+    accounts row, so they do not queue behind each other; compaction folds the shards
+    back into accounts.balance. A shard may be positive while accounts.balance is
+    negative: only their sum is the account's balance.
+    """
+    __tablename__ = "account_balance_shards"
+
+    account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"), primary_key=True)
+    shard: Mapped[int] = mapped_column(primary_key=True)
+    balance: Mapped[int] = mapped_column(default=0)
+
+def shard_total(account_id):
+    """
+    Scalar subquery for the sum of an account's shards; account_id may be a column.
+    """
+    return (
+        select(func.coalesce(func.sum(BalanceShard.balance), 0))
+        .where(BalanceShard.account_id == account_id)
+        .scalar_subquery()
+    )
+
+# Loaded with every Account, so readers get the full balance from Account.total_balance
+Account.sharded_balance = column_property(shard_total(Account.id))
@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class CardHold(Base):
+    """
+    Amount reserved on an account by an approved card authorization.
+    status: held -> captured | released
+    """
+    __tablename__ = "card_holds"
+    __table_args__ = (
+        # Open holds per account, for transfers; the status prefix serves the reload at startup
+        Index("ix_card_holds_status_account_id", "status", "account_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    card_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("cards.id"))
+    account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"))
+    amount: Mapped[int]
+    captured_amount: Mapped[int] = mapped_column(default=0)
+    # Merchant id behind the API key that placed the hold
+    merchant: Mapped[Optional[str]] = mapped_column(nullable=True)
+    status: Mapped[str] = mapped_column(default="held")
+    created_at: Mapped[datetime] = mapped_column(default=_utcnow)
+    settled_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
@@ -0,0 +1,17 @@
+import uuid
+from datetime import date, datetime, timezone
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class DailyBalance(Base):
+    """
+    Closing balance of an account at the end of a UTC day on which it changed.
+    Days without activity have no row; their balance is the previous checkpoint's.
+    """
+    __tablename__ = "daily_balances"
+
+    account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(primary_key=True)
+    closing_balance: Mapped[int]
+    updated_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,20 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class DeadLetterTransfer(Base):
+    """
+    Transfer jobs that exhausted their retries, kept for manual review.
+    """
+    __tablename__ = "dead_letter_transfers"
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    job_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("transfer_jobs.id"), unique=True)
+    from_account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"))
+    to_account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"))
+    amount: Mapped[int]
+    attempts: Mapped[int]
+    error: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
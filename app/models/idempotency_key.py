@@ -0,0 +1,17 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import ForeignKey, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Keys are scoped per user so clients cannot collide with (or replay) each other's requests
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    key: Mapped[str] = mapped_column(primary_key=True)
+    request_hash: Mapped[str]
+    status_code: Mapped[int]
+    response_body: Mapped[dict] = mapped_column(JSON)
+    # Indexed for the retention purge
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc), index=True)
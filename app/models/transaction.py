@@ -1,12 +1,16 @@
 import uuid
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves newest-first history pages per account without a sort
+        Index("ix_transactions_account_id_timestamp_id", "account_id", "timestamp", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"))
@@ -14,3 +18,6 @@ class Transaction(Base):
     type: Mapped[str]
     timestamp: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
     related_account_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("accounts.id"), nullable=True)
+    # Journal entry shared by the lines of one transfer, whose amounts sum to zero.
+    # Null for single-sided lines: opening deposits and card captures.
+    entry_id: Mapped[Optional[uuid.UUID]] = mapped_column(nullable=True, index=True)
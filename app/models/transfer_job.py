@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class TransferJob(Base):
+    """
+    Durable queue entry for a transfer accepted with 202 and applied by a background worker.
+    status: pending -> processing -> completed | failed | dead_lettered
+    """
+    __tablename__ = "transfer_jobs"
+    __table_args__ = (
+        # Workers poll for the oldest pending job that is due
+        Index("ix_transfer_jobs_status_available_at", "status", "available_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))
+    from_account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"))
+    to_account_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("accounts.id"))
+    amount: Mapped[int]
+    status: Mapped[str] = mapped_column(default="pending")
+    attempts: Mapped[int] = mapped_column(default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(nullable=True)
+    available_at: Mapped[datetime] = mapped_column(default=_utcnow)
+    created_at: Mapped[datetime] = mapped_column(default=_utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=_utcnow)
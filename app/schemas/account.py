@@ -1,4 +1,6 @@
 from pydantic import BaseModel, ConfigDict
+from datetime import date
+from typing import List, Literal
 from uuid import UUID
 
 class AccountBase(BaseModel):
@@ -14,3 +16,13 @@ class AccountResponse(AccountBase):
     account_number: str
     balance: int
     model_config = ConfigDict(from_attributes=True)
+
+class BalancePoint(BaseModel):
+    date: date
+    balance: int
+
+class BalanceHistoryResponse(BaseModel):
+    account_id: UUID
+    interval: Literal["day", "week", "month"]
+    # Closing balance of each bucket, taken at its last day inside the requested range
+    points: List[BalancePoint]
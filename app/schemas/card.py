@@ -1,5 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from uuid import UUID
+from typing import List, Literal, Optional
+
+# Upper bound on holds per capture or release request
+MAX_SETTLEMENT_BATCH = 5000
 
 class CardBase(BaseModel):
     pass # we can add preferences like card limit later if needed
@@ -15,3 +19,39 @@ class CardResponse(CardBase):
     expiry: str
     
     model_config = ConfigDict(from_attributes=True)
+
+card_list_adapter = TypeAdapter(List[CardResponse])
+
+class CardAuthorizationRequest(BaseModel):
+    card_number: str = Field(..., min_length=12, max_length=19, pattern=r"^\d+$")
+    cvc: str = Field(..., min_length=3, max_length=4)
+    expiry: str = Field(..., pattern=r"^\d{2}/\d{2}$", description="MM/YY")
+    amount: int = Field(..., gt=0)
+
+class CardAuthorizationResponse(BaseModel):
+    approved: bool
+    hold_id: Optional[UUID] = None
+    # Set on declines: invalid_card, expired_card, insufficient_funds or too_many_attempts
+    reason: Optional[str] = None
+
+class HoldCapture(BaseModel):
+    hold_id: UUID
+    # Defaults to the full held amount; a smaller capture releases the rest
+    amount: Optional[int] = Field(default=None, gt=0)
+
+class HoldCaptureBatch(BaseModel):
+    captures: List[HoldCapture] = Field(..., min_length=1, max_length=MAX_SETTLEMENT_BATCH)
+
+class HoldReleaseBatch(BaseModel):
+    hold_ids: List[UUID] = Field(..., min_length=1, max_length=MAX_SETTLEMENT_BATCH)
+
+class HoldSettlementResult(BaseModel):
+    index: int
+    hold_id: UUID
+    status: Literal["captured", "released", "failed"]
+    detail: Optional[str] = None
+
+class HoldSettlementResponse(BaseModel):
+    settled: int
+    failed: int
+    results: List[HoldSettlementResult]
@@ -1,16 +1,29 @@
 from pydantic import BaseModel
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
 from app.schemas.transaction import TransactionResponse
 
+class StatementTypeTotal(BaseModel):
+    type: str
+    count: int
+    credits: int
+    debits: int
+
 class StatementResponse(BaseModel):
     account_id: UUID
     account_number: str
     currency: str
-    starting_balance: int # for simplicity, we mock starting_balance as 0 or current balance - net changes
+    # Summary figures cover the whole [period_start, period_end) range, independent of the page below
+    period_start: Optional[datetime] = None
+    period_end: Optional[datetime] = None
+    starting_balance: int
     ending_balance: int
     total_credits: int
     total_debits: int
     transaction_count: int
+    totals_by_type: List[StatementTypeTotal] = []
     transactions: List[TransactionResponse]
+    # Pass as ?after= to fetch the next page of transactions
+    next_cursor: Optional[str] = None
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class TransactionBase(BaseModel):
     amount: int
@@ -18,3 +18,6 @@ class TransactionResponse(TransactionBase):
     related_account_id: Optional[UUID]
     counterparty_name: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
+
+# Validates a whole page of ORM rows in one call, for the fast list responses
+transaction_list_adapter = TypeAdapter(List[TransactionResponse])
@@ -1,7 +1,47 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
 from uuid import UUID
+from typing import List, Literal, Optional
+
+# Upper bound on legs per POST /transfers/batch request
+MAX_BATCH_LEGS = 5000
 
 class TransferCreate(BaseModel):
     from_account_id: UUID
     to_identifier: str
     amount: int
+
+class TransferBatchCreate(BaseModel):
+    # all_or_nothing: any failed leg rejects the whole batch
+    # best_effort: valid legs are applied, failed legs are reported individually
+    mode: Literal["all_or_nothing", "best_effort"] = "best_effort"
+    legs: List[TransferCreate] = Field(..., min_length=1, max_length=MAX_BATCH_LEGS)
+
+class TransferLegResult(BaseModel):
+    index: int
+    status: Literal["applied", "failed", "rolled_back", "skipped"]
+    detail: Optional[str] = None
+
+class TransferBatchResponse(BaseModel):
+    mode: str
+    committed: bool
+    applied: int
+    failed: int
+    results: List[TransferLegResult]
+
+class TransferAcceptedResponse(BaseModel):
+    transfer_id: UUID
+    status: str
+
+class TransferJobResponse(BaseModel):
+    id: UUID
+    from_account_id: UUID
+    to_account_id: UUID
+    amount: int
+    # pending, processing, completed, failed or dead_lettered
+    status: str
+    attempts: int
+    last_error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,156 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.models.account import Account
+
+# Account snapshots served to GET /accounts/me and GET /accounts/{id}.
+#
+# Staleness guarantees:
+# * Balance changes made by TransferService are written through when their transaction
+#   commits, using the balances the database returned, and dropped if it rolls back.
+#   Credits to a hot account's shards drop its snapshot instead.
+# * ORM inserts, updates and deletes of Account rows replace or drop entries on commit.
+# * Anything else (raw SQL, another process) is bounded by ACCOUNT_CACHE_TTL_SECONDS.
+# * A read that raced a write-through is not cached (see generation()).
+ACCOUNT_CACHE_MAX_ENTRIES = 50000
+ACCOUNT_CACHE_TTL_SECONDS = 30
+USER_ACCOUNTS_CACHE_MAX_ENTRIES = 10000
+
+_PENDING_KEY = "account_cache_pending"
+
+class AccountSnapshot(NamedTuple):
+    id: UUID
+    user_id: UUID
+    account_number: str
+    balance: int
+    currency: str
+
+    @classmethod
+    def from_account(cls, account: Account) -> "AccountSnapshot":
+        return cls(account.id, account.user_id, account.account_number, account.total_balance, account.currency)
+
+account_cache = TTLCache(max_entries=ACCOUNT_CACHE_MAX_ENTRIES, ttl_seconds=ACCOUNT_CACHE_TTL_SECONDS)
+# user id -> tuple of that user's account ids
+user_accounts_cache = TTLCache(max_entries=USER_ACCOUNTS_CACHE_MAX_ENTRIES, ttl_seconds=ACCOUNT_CACHE_TTL_SECONDS)
+
+_generation = 0
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(_PENDING_KEY, {"balances": {}, "snapshots": {}, "dropped": set(), "users": set()})
+
+class AccountCache:
+    @staticmethod
+    def generation() -> int:
+        """
+        Bumped on every committed write-through. Capture it before reading accounts from the
+        database and pass it to store(); the result is discarded if a write landed meanwhile.
+        """
+        return _generation
+
+    @staticmethod
+    def get(account_id: UUID) -> Optional[AccountSnapshot]:
+        return account_cache.get(account_id)
+
+    @staticmethod
+    def get_for_user(user_id: UUID) -> Optional[List[AccountSnapshot]]:
+        account_ids = user_accounts_cache.get(user_id)
+        if account_ids is None:
+            return None
+        snapshots = []
+        for account_id in account_ids:
+            snapshot = account_cache.get(account_id)
+            if snapshot is None:
+                return None
+            snapshots.append(snapshot)
+        return snapshots
+
+    @staticmethod
+    def get_account_ids(user_id: UUID) -> Optional[Tuple[UUID, ...]]:
+        return user_accounts_cache.get(user_id)
+
+    @staticmethod
+    def store_account_ids(user_id: UUID, account_ids: Sequence[UUID], seen_generation: int):
+        if seen_generation == _generation:
+            user_accounts_cache.set(user_id, tuple(account_ids))
+
+    @staticmethod
+    def store(accounts: Iterable[Account], seen_generation: int) -> List[AccountSnapshot]:
+        snapshots = [AccountSnapshot.from_account(account) for account in accounts]
+        if seen_generation == _generation:
+            for snapshot in snapshots:
+                account_cache.set(snapshot.id, snapshot)
+        return snapshots
+
+    @staticmethod
+    def store_for_user(user_id: UUID, accounts: Iterable[Account], seen_generation: int) -> List[AccountSnapshot]:
+        snapshots = AccountCache.store(accounts, seen_generation)
+        if seen_generation == _generation:
+            user_accounts_cache.set(user_id, tuple(snapshot.id for snapshot in snapshots))
+        return snapshots
+
+    @staticmethod
+    def stage_balances(session, balances: Dict[UUID, int]):
+        """
+        Records new balances to write through once the session's transaction commits.
+        Accepts an AsyncSession or a sync Session.
+        """
+        session = getattr(session, "sync_session", session)
+        _pending(session)["balances"].update(balances)
+
+    @staticmethod
+    def stage_invalidation(session, account_ids: Iterable[UUID]):
+        """
+        Drops the accounts' snapshots once the session's transaction commits, for changes
+        whose resulting balance is not known without another query.
+        """
+        session = getattr(session, "sync_session", session)
+        _pending(session)["dropped"].update(account_ids)
+
+    @staticmethod
+    def stats() -> dict:
+        return {"accounts": account_cache.stats(), "user_accounts": user_accounts_cache.stats()}
+
+@event.listens_for(Account, "after_insert")
+def _stage_inserted_account(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        pending = _pending(session)
+        pending["snapshots"][target.id] = AccountSnapshot.from_account(target)
+        pending["users"].add(target.user_id)
+
+@event.listens_for(Account, "after_update")
+@event.listens_for(Account, "after_delete")
+def _stage_dropped_account(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        pending = _pending(session)
+        pending["dropped"].add(target.id)
+        pending["users"].add(target.user_id)
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    global _generation
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    _generation += 1
+
+    for account_id, balance in pending["balances"].items():
+        # Only entries we already hold are refreshed; the rest are filled by the next read
+        snapshot = account_cache.peek(account_id)
+        if snapshot is not None:
+            account_cache.set(account_id, snapshot._replace(balance=balance))
+    for account_id, snapshot in pending["snapshots"].items():
+        account_cache.set(account_id, snapshot)
+    for account_id in pending["dropped"]:
+        account_cache.invalidate(account_id)
+    for user_id in pending["users"]:
+        user_accounts_cache.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
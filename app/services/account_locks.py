@@ -0,0 +1,130 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import Base
+from app.models.account import Account
+from app.services.transfer_service import TransferService
+
+# Contention stats are kept for this many of the most recently contended accounts
+LOCK_STATS_MAX_ACCOUNTS = 1000
+
+class _LockEntry:
+    __slots__ = ("lock", "refs", "waiters")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        # Holders plus waiters; the entry is dropped when this reaches zero
+        self.refs = 0
+        self.waiters = 0
+
+class AccountLockManager:
+    """
+    In-process async locks keyed by account id.
+
+    Locks for a transfer are always taken in sorted account-id order, so two
+    transfers touching the same pair of accounts in opposite directions cannot
+    deadlock. Transfers over disjoint accounts never share a lock and run in
+    parallel. Entries exist only while someone holds or waits for them.
+    """
+
+    def __init__(self, stats_max_accounts: int = LOCK_STATS_MAX_ACCOUNTS):
+        self._entries: Dict[UUID, _LockEntry] = {}
+        self._stats: "OrderedDict[UUID, dict]" = OrderedDict()
+        self._stats_max_accounts = stats_max_accounts
+
+        self.acquisitions = 0
+        self.contended_acquisitions = 0
+        self.total_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def acquire(self, *account_ids: UUID):
+        ordered = sorted(set(account_ids), key=str)
+        referenced: List[UUID] = []
+        held: List[asyncio.Lock] = []
+        try:
+            for account_id in ordered:
+                entry = self._entries.get(account_id)
+                if entry is None:
+                    entry = self._entries[account_id] = _LockEntry()
+                entry.refs += 1
+                referenced.append(account_id)
+
+                if not entry.lock.locked() and entry.waiters == 0:
+                    await entry.lock.acquire()
+                    self._record(account_id, 0.0, 0)
+                else:
+                    entry.waiters += 1
+                    depth = entry.waiters
+                    started = time.perf_counter()
+                    try:
+                        await entry.lock.acquire()
+                    finally:
+                        entry.waiters -= 1
+                    self._record(account_id, time.perf_counter() - started, depth)
+                held.append(entry.lock)
+            yield
+        finally:
+            for lock in reversed(held):
+                lock.release()
+            for account_id in referenced:
+                entry = self._entries[account_id]
+                entry.refs -= 1
+                if entry.refs == 0:
+                    del self._entries[account_id]
+
+    def _record(self, account_id: UUID, waited: float, depth: int):
+        self.acquisitions += 1
+        if depth == 0:
+            return
+
+        self.contended_acquisitions += 1
+        self.total_wait_seconds += waited
+
+        stats = self._stats.pop(account_id, None)
+        if stats is None:
+            stats = {"contended_acquisitions": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0, "max_queue_depth": 0}
+        stats["contended_acquisitions"] += 1
+        stats["total_wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], depth)
+        self._stats[account_id] = stats
+        while len(self._stats) > self._stats_max_accounts:
+            self._stats.popitem(last=False)
+
+    async def transfer_funds(self, from_account_id: UUID, to_account_id: UUID, amount: int, session: AsyncSession, records: Sequence[Base] = ()):
+        """
+        TransferService.transfer_funds, serialized against other transfers touching either account.
+        A hot destination (shard_count > 0) is not locked: its credit is a single-row update
+        of a random shard, so concurrent credits to it need no serializing.
+        """
+        TransferService.validate_transfer(from_account_id, to_account_id, amount)
+        shard_count = await session.scalar(select(Account.shard_count).where(Account.id == to_account_id))
+        locked = (from_account_id,) if shard_count else (from_account_id, to_account_id)
+        async with self.acquire(*locked):
+            return await TransferService.transfer_funds(from_account_id, to_account_id, amount, session, records)
+
+    def queue_depth(self, account_id: UUID) -> int:
+        entry = self._entries.get(account_id)
+        return entry.waiters if entry else 0
+
+    def stats(self) -> dict:
+        return {
+            "tracked_locks": len(self._entries),
+            "acquisitions": self.acquisitions,
+            "contended_acquisitions": self.contended_acquisitions,
+            "total_wait_seconds": self.total_wait_seconds,
+            "accounts": {
+                str(account_id): dict(stats, queue_depth=self.queue_depth(account_id))
+                for account_id, stats in self._stats.items()
+            },
+        }
+
+# Shared by every request handled by this process
+account_locks = AccountLockManager()
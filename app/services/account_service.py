@@ -1,8 +1,33 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import case, event, func, inspect, literal, select, tuple_
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
 from uuid import UUID
+from app.core.cache import TTLCache
+from app.core.pagination import decode_cursor, encode_cursor
 from app.models.account import Account
 from app.models.transaction import Transaction
+from app.models.user import User
+
+# account id -> (owner user id, owner email), used to label transaction counterparties
+COUNTERPARTY_CACHE_MAX_ENTRIES = 50000
+COUNTERPARTY_CACHE_TTL_SECONDS = 60 * 60
+
+counterparty_cache = TTLCache(max_entries=COUNTERPARTY_CACHE_MAX_ENTRIES, ttl_seconds=COUNTERPARTY_CACHE_TTL_SECONDS)
+
+@event.listens_for(User, "after_update")
+def _invalidate_counterparty_names(mapper, connection, target):
+    # Account ownership never changes, so only an email change can make an entry stale
+    if inspect(target).attrs.email.history.has_changes():
+        counterparty_cache.invalidate_where(lambda owner: owner[0] == target.id)
+
+def to_db_timestamp(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Transaction timestamps are stored as naive UTC; convert aware inputs to match.
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 class AccountService:
     @staticmethod
@@ -15,15 +40,138 @@ class AccountService:
         account = await AccountService.get_account(session, account_id)
         if not account:
             raise ValueError("Account not found")
-        return account.balance
+        return account.total_balance
         
     @staticmethod
-    async def get_transactions(session: AsyncSession, account_id: UUID, limit: int = 100, offset: int = 0):
-        result = await session.execute(
+    async def get_transactions(
+        session: AsyncSession,
+        account_id: UUID,
+        limit: int = 100,
+        offset: int = 0,
+        after: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ):
+        """
+        Newest-first transaction history, optionally limited to [start, end).
+        Pass the opaque `after` cursor for constant-cost pages; `offset` is kept for older clients
+        and is ignored when a cursor is given.
+        """
+        query = (
             select(Transaction)
             .where(Transaction.account_id == account_id)
-            .order_by(Transaction.timestamp.desc())
-            .offset(offset)
+            .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
             .limit(limit)
         )
+        if start is not None:
+            query = query.where(Transaction.timestamp >= to_db_timestamp(start))
+        if end is not None:
+            query = query.where(Transaction.timestamp < to_db_timestamp(end))
+        if after:
+            timestamp, tx_id = decode_cursor(after)
+            query = query.where(tuple_(Transaction.timestamp, Transaction.id) < tuple_(timestamp, tx_id))
+        elif offset:
+            query = query.offset(offset)
+
+        result = await session.execute(query)
         return result.scalars().all()
+
+    @staticmethod
+    async def get_period_summary(
+        session: AsyncSession,
+        account_id: UUID,
+        current_balance: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> dict:
+        """
+        Statement figures for [start, end) computed in SQL, without loading transaction rows.
+        Totals come from one GROUP BY type aggregate; opening and closing balances are derived
+        from the current balance minus everything booked after each boundary.
+        """
+        start = to_db_timestamp(start)
+        end = to_db_timestamp(end)
+
+        period = [Transaction.account_id == account_id]
+        if start is not None:
+            period.append(Transaction.timestamp >= start)
+        if end is not None:
+            period.append(Transaction.timestamp < end)
+
+        by_type_result = await session.execute(
+            select(
+                Transaction.type,
+                func.count(),
+                func.coalesce(func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)), 0),
+                func.coalesce(func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)), 0),
+            )
+            .where(*period)
+            .group_by(Transaction.type)
+            .order_by(Transaction.type)
+        )
+        totals_by_type = [
+            {"type": tx_type, "count": count, "credits": credits, "debits": debits}
+            for tx_type, count, credits, debits in by_type_result.all()
+        ]
+
+        after_start = (
+            func.sum(case((Transaction.timestamp >= start, Transaction.amount), else_=0))
+            if start is not None else func.sum(Transaction.amount)
+        )
+        after_end = (
+            func.sum(case((Transaction.timestamp >= end, Transaction.amount), else_=0))
+            if end is not None else literal(0)
+        )
+        tail_query = select(
+            func.coalesce(after_start, 0),
+            func.coalesce(after_end, 0),
+        ).where(Transaction.account_id == account_id)
+        if start is not None:
+            # Only rows after the period start matter, which keeps this an index range scan
+            tail_query = tail_query.where(Transaction.timestamp >= start)
+        after_start_total, after_end_total = (await session.execute(tail_query)).one()
+
+        return {
+            "starting_balance": current_balance - after_start_total,
+            "ending_balance": current_balance - after_end_total,
+            "total_credits": sum(t["credits"] for t in totals_by_type),
+            "total_debits": sum(t["debits"] for t in totals_by_type),
+            "transaction_count": sum(t["count"] for t in totals_by_type),
+            "totals_by_type": totals_by_type,
+        }
+
+    @staticmethod
+    def next_cursor(transactions, limit: int) -> Optional[str]:
+        """
+        Cursor for the page after `transactions`, or None once the history is exhausted.
+        """
+        if limit <= 0 or len(transactions) < limit:
+            return None
+        last = transactions[-1]
+        return encode_cursor(last.timestamp, last.id)
+
+    @staticmethod
+    async def get_counterparty_names(session: AsyncSession, account_ids: Iterable[UUID]) -> Dict[UUID, str]:
+        """
+        Maps account ids to their owner's email with at most one joined query for cache misses.
+        """
+        names: Dict[UUID, str] = {}
+        missing = []
+        for account_id in set(account_ids):
+            owner = counterparty_cache.get(account_id)
+            if owner is None:
+                missing.append(account_id)
+            else:
+                names[account_id] = owner[1]
+
+        if missing:
+            result = await session.execute(
+                select(Account.id, User.id, User.email)
+                .join(User, User.id == Account.user_id)
+                .where(Account.id.in_(missing))
+            )
+            for account_id, user_id, email in result.all():
+                counterparty_cache.set(account_id, (user_id, email))
+                names[account_id] = email
+
+        return names
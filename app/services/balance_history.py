@@ -0,0 +1,151 @@
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.models.account import Account
+from app.models.daily_balance import DailyBalance
+from app.models.transaction import Transaction
+
+# Upper bound on days per bucket, used to cap the number of points a request can produce
+BALANCE_HISTORY_INTERVALS = {"day": 1, "week": 7, "month": 31}
+BALANCE_HISTORY_MAX_POINTS = 1000
+BALANCE_HISTORY_DEFAULT_DAYS = 30
+# Rows per upsert statement when backfilling, well under SQLite's bound parameter limit
+BACKFILL_CHUNK_SIZE = 500
+
+def _upsert(rows: List[dict]):
+    stmt = sqlite_insert(DailyBalance).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyBalance.account_id, DailyBalance.day],
+        set_={"closing_balance": stmt.excluded.closing_balance, "updated_at": stmt.excluded.updated_at},
+    )
+
+def _bucket_key(day: date, interval: str) -> Tuple[int, int]:
+    if interval == "week":
+        year, week, _ = day.isocalendar()
+        return year, week
+    if interval == "month":
+        return day.year, day.month
+    return day.toordinal(), 0
+
+class BalanceHistoryService:
+    @staticmethod
+    async def record_checkpoints(session: AsyncSession, balances: Dict[UUID, int], day: date):
+        """
+        Stages the closing balance of `day` for each account without committing.
+        Called inside the transaction that changed the balances, so checkpoints commit
+        (or roll back) together with them and the last writer of the day wins.
+        """
+        now = datetime.now(timezone.utc)
+        await session.execute(_upsert([
+            {"account_id": account_id, "day": day, "closing_balance": balance, "updated_at": now}
+            for account_id, balance in balances.items()
+        ]))
+
+    @staticmethod
+    async def backfill(session: AsyncSession, account_ids: Optional[Iterable[UUID]] = None) -> int:
+        """
+        Rebuilds checkpoints from the transaction history and commits. Returns the rows written.
+        Closing balances are derived backwards from each account's current balance, so run it
+        while no transfers are being applied.
+        """
+        accounts_query = select(Account.id, Account.balance + Account.sharded_balance)
+        tx_query = (
+            select(Transaction.account_id, func.date(Transaction.timestamp), func.sum(Transaction.amount))
+            .group_by(Transaction.account_id, func.date(Transaction.timestamp))
+        )
+        if account_ids is not None:
+            account_ids = list(account_ids)
+            accounts_query = accounts_query.where(Account.id.in_(account_ids))
+            tx_query = tx_query.where(Transaction.account_id.in_(account_ids))
+
+        balances = dict((await session.execute(accounts_query)).all())
+        net_by_account: Dict[UUID, List[Tuple[date, int]]] = {}
+        for account_id, day, net in (await session.execute(tx_query)).all():
+            net_by_account.setdefault(account_id, []).append((date.fromisoformat(day), net))
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for account_id, days in net_by_account.items():
+            if account_id not in balances:
+                continue
+            # Walk newest to oldest: each day closes at the balance before the later days' movements
+            running = balances[account_id]
+            for day, net in sorted(days, reverse=True):
+                rows.append({"account_id": account_id, "day": day, "closing_balance": running, "updated_at": now})
+                running -= net
+
+        for i in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+            await session.execute(_upsert(rows[i:i + BACKFILL_CHUNK_SIZE]))
+        await session.commit()
+        return len(rows)
+
+    @staticmethod
+    async def get_history(
+        session: AsyncSession,
+        account_id: UUID,
+        current_balance: int,
+        start: date,
+        end: date,
+        interval: str = "day"
+    ) -> List[dict]:
+        """
+        Closing balance per day/week/month over [start, end], inclusive.
+        Reads the checkpoints in range plus the last one before it; days without a checkpoint
+        carry the previous balance forward. Only an account with no checkpoint before `start`
+        needs a delta scan: its opening balance is the current one minus everything booked since.
+        """
+        if interval not in BALANCE_HISTORY_INTERVALS:
+            raise ValueError(f"interval must be one of: {', '.join(BALANCE_HISTORY_INTERVALS)}")
+        if start > end:
+            raise ValueError("Balance history range must end on or after its start")
+        if (end - start).days + 1 > BALANCE_HISTORY_MAX_POINTS * BALANCE_HISTORY_INTERVALS[interval]:
+            raise ValueError("Balance history range is too long for this interval, use a coarser one")
+
+        opening = await session.scalar(
+            select(DailyBalance.closing_balance)
+            .where(DailyBalance.account_id == account_id, DailyBalance.day < start)
+            .order_by(DailyBalance.day.desc())
+            .limit(1)
+        )
+        if opening is None:
+            since_start = await session.scalar(
+                select(func.coalesce(func.sum(Transaction.amount), 0))
+                .where(
+                    Transaction.account_id == account_id,
+                    Transaction.timestamp >= datetime.combine(start, time.min)
+                )
+            )
+            opening = current_balance - since_start
+
+        checkpoints = dict((await session.execute(
+            select(DailyBalance.day, DailyBalance.closing_balance)
+            .where(DailyBalance.account_id == account_id, DailyBalance.day >= start, DailyBalance.day <= end)
+        )).all())
+
+        points: List[dict] = []
+        balance = opening
+        day = start
+        while day <= end:
+            balance = checkpoints.get(day, balance)
+            # Each bucket reports the balance at its last day inside the range
+            if points and _bucket_key(points[-1]["date"], interval) == _bucket_key(day, interval):
+                points[-1] = {"date": day, "balance": balance}
+            else:
+                points.append({"date": day, "balance": balance})
+            day += timedelta(days=1)
+        return points
+
+async def backfill_all():
+    async with AsyncSessionLocal() as session:
+        written = await BalanceHistoryService.backfill(session)
+    print(f"Backfilled {written} daily balance checkpoints")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_all())
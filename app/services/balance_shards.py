@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import AsyncSessionLocal
+from app.models.account import Account
+from app.models.balance_shard import BalanceShard, shard_total
+from app.services.account_cache import AccountCache
+from app.services.balance_history import BalanceHistoryService
+from app.services.transfer_service import AccountNotFoundError, TransferService
+
+logger = logging.getLogger(__name__)
+
+MAX_BALANCE_SHARDS = 64
+BALANCE_COMPACTION_INTERVAL_SECONDS = 5.0
+
+_fold_shard = (
+    update(BalanceShard.__table__)
+    .where(
+        BalanceShard.__table__.c.account_id == bindparam("shard_account_id"),
+        BalanceShard.__table__.c.shard == bindparam("shard_index"),
+    )
+    # Subtract what was read rather than zeroing, so a credit landing meanwhile is kept
+    .values(balance=BalanceShard.__table__.c.balance - bindparam("moved"))
+)
+
+class BalanceShardService:
+    @staticmethod
+    async def fold(session: AsyncSession, account_ids: Optional[Iterable[UUID]] = None) -> Dict[UUID, int]:
+        """
+        Stages moving every non-zero shard into its account's balance, without committing.
+        The account's total does not change. Returns the new totals of the accounts touched,
+        which are also checkpointed and written through to the account cache.
+        """
+        query = select(BalanceShard.account_id, BalanceShard.shard, BalanceShard.balance).where(BalanceShard.balance != 0)
+        if account_ids is not None:
+            query = query.where(BalanceShard.account_id.in_(list(account_ids)))
+        rows = (await session.execute(query)).all()
+        if not rows:
+            return {}
+
+        moved: Dict[UUID, int] = {}
+        for account_id, _, balance in rows:
+            moved[account_id] = moved.get(account_id, 0) + balance
+        await session.execute(_fold_shard, [
+            {"shard_account_id": account_id, "shard_index": shard, "moved": balance}
+            for account_id, shard, balance in rows
+        ])
+
+        totals: Dict[UUID, int] = {}
+        for account_id, amount in moved.items():
+            result = await session.execute(
+                update(Account)
+                .where(Account.id == account_id)
+                .values(balance=Account.balance + amount)
+                .returning(Account.balance + shard_total(account_id))
+                .execution_options(synchronize_session=False)
+            )
+            totals[account_id] = result.scalar_one()
+
+        # Credits to shards skip the checkpoint; this is where the day's closing balance catches up
+        await BalanceHistoryService.record_checkpoints(session, totals, datetime.now(timezone.utc).date())
+        AccountCache.stage_balances(session, totals)
+        return totals
+
+    @staticmethod
+    async def compact(session: AsyncSession, account_ids: Optional[Iterable[UUID]] = None) -> int:
+        """
+        Folds shard balances into accounts.balance in one transaction and commits.
+        Returns the number of accounts compacted.
+        """
+        if account_ids is not None:
+            account_ids = list(account_ids)
+
+        async def work():
+            totals = await BalanceShardService.fold(session, account_ids)
+            await session.commit()
+            return len(totals)
+
+        return await TransferService.run_with_retries(session, work)
+
+    @staticmethod
+    async def set_shard_count(session: AsyncSession, account_id: UUID, shards: int):
+        """
+        Designates a hot account with `shards` sub-balances, or makes it a regular account
+        again with 0, and commits. Existing shard balances are folded in first.
+        """
+        if not 0 <= shards <= MAX_BALANCE_SHARDS:
+            raise ValueError(f"Shard count must be between 0 and {MAX_BALANCE_SHARDS}")
+
+        async def work():
+            # Taking the accounts row first makes concurrent credits see the new count
+            result = await session.execute(
+                update(Account)
+                .where(Account.id == account_id)
+                .values(shard_count=shards)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                raise AccountNotFoundError("Account not found")
+            await BalanceShardService.fold(session, [account_id])
+            # Emptied shards go; one still holding a credit that raced the fold stays until the next compaction
+            await session.execute(
+                delete(BalanceShard).where(BalanceShard.account_id == account_id, BalanceShard.balance == 0)
+            )
+            if shards:
+                stmt = sqlite_insert(BalanceShard).values([
+                    {"account_id": account_id, "shard": shard, "balance": 0} for shard in range(shards)
+                ])
+                await session.execute(stmt.on_conflict_do_nothing(index_elements=[BalanceShard.account_id, BalanceShard.shard]))
+            AccountCache.stage_invalidation(session, [account_id])
+            await session.commit()
+
+        await TransferService.run_with_retries(session, work)
+
+class BalanceCompactor:
+    """
+    Background task compacting every hot account's shards at a fixed interval, which
+    keeps their balance checkpoints and cached snapshots current.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        interval_seconds: float = BALANCE_COMPACTION_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.compacted = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as session:
+            compacted = await BalanceShardService.compact(session)
+        self.runs += 1
+        self.compacted += compacted
+        return compacted
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Balance shard compaction failed, will retry: {e}")
+
+balance_compactor = BalanceCompactor()
+
+async def _main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m app.services.balance_shards", description="Manage hot-account balance shards.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    designate = commands.add_parser("designate", help="Spread an account's credits over N shards; 0 makes it a regular account")
+    designate.add_argument("account_id", type=UUID)
+    designate.add_argument("shards", type=int)
+    commands.add_parser("compact", help="Fold every shard into its account's balance")
+    args = parser.parse_args(argv)
+
+    async with AsyncSessionLocal() as session:
+        if args.command == "designate":
+            await BalanceShardService.set_shard_count(session, args.account_id, args.shards)
+            print(f"Account {args.account_id} now has {args.shards} balance shards")
+        else:
+            print(f"Compacted {await BalanceShardService.compact(session)} accounts")
+
+if __name__ == "__main__":
+    asyncio.run(_main())
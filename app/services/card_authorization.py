@@ -0,0 +1,462 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import TTLCache
+from app.core.metrics import card_authorization_duration, card_authorizations_total, start_background_task
+from app.core.security import SECRET_KEY
+from app.db.session import AsyncSessionLocal, mark_recent_write
+from app.models.account import Account
+from app.models.balance_shard import shard_total
+from app.models.card import Card
+from app.models.card_hold import CardHold
+from app.models.transaction import Transaction
+from app.services.account_cache import AccountCache
+from app.services.balance_history import BalanceHistoryService
+from app.services.transfer_service import TransferService
+
+logger = logging.getLogger(__name__)
+
+# Approved holds are saved in batches: after 5 ms or once 500 are waiting, whichever comes first
+CARD_HOLD_FLUSH_WINDOW_MS = 5.0
+CARD_HOLD_FLUSH_MAX_BATCH = 500
+CARD_INDEX_WARM_CHUNK_SIZE = 10000
+# Failed credential checks allowed per card number, and per merchant, before every
+# authorization for it is declined; the count clears after a window without failures
+CARD_AUTH_MAX_CARD_FAILURES = 5
+CARD_AUTH_MAX_MERCHANT_FAILURES = 50
+CARD_AUTH_FAILURE_WINDOW_SECONDS = 15 * 60
+CARD_AUTH_FAILURE_MAX_TRACKED = 100000
+
+# (hold id, amount to capture or None for the full hold) as accepted by capture()
+HoldCapture = Tuple[UUID, Optional[int]]
+# (status, detail) per settled hold
+SettlementResult = Tuple[str, Optional[str]]
+
+_INDEX_KEY = SECRET_KEY.encode()
+
+def pan_digest(card_number: str) -> bytes:
+    """
+    Keyed hash of a card number; the index never holds PANs in the clear.
+    """
+    return hmac.new(_INDEX_KEY, card_number.encode(), hashlib.sha256).digest()
+
+def _credentials_digest(card_number: str, cvc: str, expiry: str) -> bytes:
+    return hmac.new(_INDEX_KEY, f"{card_number}|{cvc}|{expiry}".encode(), hashlib.sha256).digest()
+
+def _is_expired(expiry: str, now: datetime) -> bool:
+    # MM/YY, valid through the end of the expiry month
+    try:
+        month, year = int(expiry[:2]), 2000 + int(expiry[3:])
+    except ValueError:
+        return True
+    return (year, month) < (now.year, now.month)
+
+class IndexedCard(NamedTuple):
+    card_id: UUID
+    account_id: UUID
+    credentials: bytes
+    expiry: str
+
+    @classmethod
+    def from_row(cls, card_id: UUID, account_id: UUID, card_number: str, cvc: str, expiry: str) -> "IndexedCard":
+        return cls(card_id, account_id, _credentials_digest(card_number, cvc, expiry), expiry)
+
+class ActiveHold(NamedTuple):
+    card_id: UUID
+    account_id: UUID
+    amount: int
+    # Merchant that placed the hold; only it may capture or release it
+    merchant: Optional[str]
+
+class AuthorizationDecision(NamedTuple):
+    approved: bool
+    hold_id: Optional[UUID] = None
+    reason: Optional[str] = None
+
+class CardAuthorizationEngine:
+    """
+    Approves or declines card authorizations from memory.
+
+    Cards are found through a hashed-PAN index loaded at startup and extended by
+    register_card(). Open holds are tracked per account, so the available balance
+    (cached balance minus holds) is checked and reserved without a database round trip
+    whenever the account snapshot is cached. Approved holds are written behind in
+    batches; capture() and release() flush them first and settle many holds in one
+    transaction.
+
+    Holds live in this process: run a single API process, as the Dockerfile does.
+    A crash loses at most the last flush window of approved holds; their later
+    capture is rejected, and balances can never go negative because captures and
+    transfers re-check funds in the database.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        flush_window_ms: float = CARD_HOLD_FLUSH_WINDOW_MS,
+        max_batch_size: int = CARD_HOLD_FLUSH_MAX_BATCH,
+        max_card_failures: int = CARD_AUTH_MAX_CARD_FAILURES,
+        max_merchant_failures: int = CARD_AUTH_MAX_MERCHANT_FAILURES,
+    ):
+        self.session_factory = session_factory
+        self.flush_window = flush_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.max_card_failures = max_card_failures
+        self.max_merchant_failures = max_merchant_failures
+        # Failure counts keyed by PAN digest and by merchant id. Unknown card numbers are
+        # counted too, so a throttled decline says nothing about whether the card exists.
+        self._card_failures = TTLCache(max_entries=CARD_AUTH_FAILURE_MAX_TRACKED, ttl_seconds=CARD_AUTH_FAILURE_WINDOW_SECONDS)
+        self._merchant_failures = TTLCache(max_entries=CARD_AUTH_FAILURE_MAX_TRACKED, ttl_seconds=CARD_AUTH_FAILURE_WINDOW_SECONDS)
+
+        self._cards: Dict[bytes, IndexedCard] = {}
+        self._holds: Dict[UUID, ActiveHold] = {}
+        self._held: Dict[UUID, int] = {}
+        self._unsaved: List[dict] = []
+        # Per account, the part of _held not yet in card_holds, which transfers cannot see there
+        self._unsaved_held: Dict[UUID, int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # Locks are created on first use so they bind to the serving event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._settle_lock: Optional[asyncio.Lock] = None
+
+        self.approved = 0
+        self.declined = 0
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+            # Captures and releases run one batch at a time so a hold is never settled twice
+            self._settle_lock = asyncio.Lock()
+
+    async def start(self):
+        await self.warm()
+        logger.info(f"Card index warmed with {len(self._cards)} cards and {len(self._holds)} open holds")
+
+    async def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.flush()
+
+    async def warm(self):
+        """
+        Loads every card and every open hold. Holds approved here but not yet saved are kept.
+        """
+        cards: Dict[bytes, IndexedCard] = {}
+        async with self.session_factory() as session:
+            result = await session.stream(
+                select(Card.id, Card.account_id, Card.card_number, Card.cvc, Card.expiry)
+                .execution_options(yield_per=CARD_INDEX_WARM_CHUNK_SIZE)
+            )
+            async for card_id, account_id, card_number, cvc, expiry in result:
+                cards[pan_digest(card_number)] = IndexedCard.from_row(card_id, account_id, card_number, cvc, expiry)
+            open_holds = await session.execute(
+                select(CardHold.id, CardHold.card_id, CardHold.account_id, CardHold.amount, CardHold.merchant)
+                .where(CardHold.status == "held")
+            )
+            for hold_id, card_id, account_id, amount, merchant in open_holds.all():
+                if hold_id not in self._holds:
+                    self._add_hold(hold_id, ActiveHold(card_id, account_id, amount, merchant))
+        self._cards = cards
+
+    def register_card(self, card: Card):
+        self._cards[pan_digest(card.card_number)] = IndexedCard.from_row(
+            card.id, card.account_id, card.card_number, card.cvc, card.expiry
+        )
+
+    def held(self, account_id: UUID) -> int:
+        return self._held.get(account_id, 0)
+
+    def unsaved_held(self, account_id: UUID) -> int:
+        """
+        Amount held on the account by holds still waiting for the write-behind flush.
+        """
+        return self._unsaved_held.get(account_id, 0)
+
+    def _add_hold(self, hold_id: UUID, hold: ActiveHold):
+        self._holds[hold_id] = hold
+        self._held[hold.account_id] = self._held.get(hold.account_id, 0) + hold.amount
+
+    def _drop_hold(self, hold_id: UUID):
+        hold = self._holds.pop(hold_id, None)
+        if hold is None:
+            return
+        remaining = self._held[hold.account_id] - hold.amount
+        if remaining:
+            self._held[hold.account_id] = remaining
+        else:
+            del self._held[hold.account_id]
+
+    async def _balance(self, session: AsyncSession, account_id: UUID) -> Optional[int]:
+        snapshot = AccountCache.get(account_id)
+        if snapshot is not None:
+            return snapshot.balance
+        generation = AccountCache.generation()
+        account = (await session.execute(select(Account).where(Account.id == account_id))).scalar_one_or_none()
+        if account is None:
+            return None
+        AccountCache.store([account], generation)
+        return account.total_balance
+
+    async def authorize(
+        self,
+        session: AsyncSession,
+        card_number: str,
+        cvc: str,
+        expiry: str,
+        amount: int,
+        merchant: str,
+    ) -> AuthorizationDecision:
+        """
+        Approves by placing a hold for `amount`, or declines with a reason.
+        An unknown card number and wrong card details both decline as invalid_card, so
+        the answer cannot be used to find out which card numbers exist; repeated failures
+        for a card number or a merchant decline as too_many_attempts.
+        `session` is only used when the account's balance is not cached.
+        """
+        started = time.perf_counter()
+        digest = pan_digest(card_number)
+        card = self._cards.get(digest)
+        if (
+            self._card_failures.peek(digest, 0) >= self.max_card_failures
+            or self._merchant_failures.peek(merchant, 0) >= self.max_merchant_failures
+        ):
+            decision = AuthorizationDecision(False, reason="too_many_attempts")
+        elif card is None or not hmac.compare_digest(card.credentials, _credentials_digest(card_number, cvc, expiry)):
+            self._record_failure(digest, merchant)
+            decision = AuthorizationDecision(False, reason="invalid_card")
+        elif _is_expired(card.expiry, datetime.now(timezone.utc)):
+            decision = AuthorizationDecision(False, reason="expired_card")
+        else:
+            balance = await self._balance(session, card.account_id)
+            # Nothing below awaits, so the check and the reservation cannot interleave
+            # with another authorization on the same account
+            if balance is None:
+                decision = AuthorizationDecision(False, reason="invalid_card")
+            elif amount > balance - self.held(card.account_id):
+                decision = AuthorizationDecision(False, reason="insufficient_funds")
+            else:
+                decision = AuthorizationDecision(True, hold_id=self._place_hold(card, amount, merchant))
+
+        if decision.approved:
+            self.approved += 1
+            card_authorizations_total.inc(outcome="approved", reason="")
+        else:
+            self.declined += 1
+            card_authorizations_total.inc(outcome="declined", reason=decision.reason)
+        card_authorization_duration.observe(time.perf_counter() - started)
+        return decision
+
+    def _record_failure(self, digest: bytes, merchant: str):
+        self._card_failures.set(digest, self._card_failures.peek(digest, 0) + 1)
+        self._merchant_failures.set(merchant, self._merchant_failures.peek(merchant, 0) + 1)
+
+    def _place_hold(self, card: IndexedCard, amount: int, merchant: str) -> UUID:
+        hold_id = uuid.uuid4()
+        self._add_hold(hold_id, ActiveHold(card.card_id, card.account_id, amount, merchant))
+        self._unsaved.append({
+            "id": hold_id,
+            "card_id": card.card_id,
+            "account_id": card.account_id,
+            "amount": amount,
+            "captured_amount": 0,
+            "merchant": merchant,
+            "status": "held",
+            "created_at": datetime.now(timezone.utc),
+            "settled_at": None,
+        })
+        self._unsaved_held[card.account_id] = self._unsaved_held.get(card.account_id, 0) + amount
+        if len(self._unsaved) >= self.max_batch_size:
+            self._cut_batch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_window, self._cut_batch)
+        return hold_id
+
+    def _cut_batch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = start_background_task(self._flush_in_background())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_in_background(self):
+        try:
+            await self.flush()
+        except Exception:
+            # Already logged; the holds stay queued for the next attempt
+            pass
+
+    async def flush(self):
+        """
+        Saves every approved hold not yet in the database. On failure they are kept for the next flush.
+        """
+        self._bind_loop()
+        async with self._flush_lock:
+            rows, self._unsaved = self._unsaved, []
+            if not rows:
+                return
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(CardHold), rows)
+                    await session.commit()
+                # Only now, so a transfer never sees the holds in neither place; seeing them in both is harmless
+                for row in rows:
+                    remaining = self._unsaved_held[row["account_id"]] - row["amount"]
+                    if remaining:
+                        self._unsaved_held[row["account_id"]] = remaining
+                    else:
+                        del self._unsaved_held[row["account_id"]]
+            except Exception as e:
+                logger.error(f"Saving {len(rows)} card holds failed, will retry: {e}")
+                self._unsaved[:0] = rows
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(self.flush_window, self._cut_batch)
+                raise
+
+    async def capture(self, session: AsyncSession, captures: Sequence[HoldCapture], merchant: str) -> List[SettlementResult]:
+        """
+        Settles holds in one transaction: debits each account, books a card_capture
+        transaction and closes the hold. A capture may be for less than the hold; the
+        remainder is released. Holds placed by another merchant fail as not found.
+        Returns ("captured" | "failed", detail) per entry.
+        """
+        await self.flush()
+        self._bind_loop()
+        async with self._settle_lock:
+            now = datetime.now(timezone.utc)
+            state: dict = {}
+
+            async def work():
+                results: List[SettlementResult] = []
+                balances: Dict[UUID, int] = {}
+                owners: Set[UUID] = set()
+                settled: List[UUID] = []
+                for hold_id, amount in captures:
+                    hold = self._holds.get(hold_id)
+                    if hold is None or hold.merchant != merchant or hold_id in settled:
+                        results.append(("failed", "Hold not found or already settled"))
+                        continue
+                    amount = hold.amount if amount is None else amount
+                    if amount <= 0 or amount > hold.amount:
+                        results.append(("failed", "Capture amount must be positive and at most the held amount"))
+                        continue
+
+                    debited = await session.execute(
+                        update(Account)
+                        .where(Account.id == hold.account_id, Account.balance + shard_total(hold.account_id) >= amount)
+                        .values(balance=Account.balance - amount)
+                        .returning(Account.balance + shard_total(hold.account_id), Account.user_id)
+                        .execution_options(synchronize_session=False)
+                    )
+                    row = debited.one_or_none()
+                    if row is None:
+                        results.append(("failed", "Insufficient Funds"))
+                        continue
+                    closed = await session.execute(
+                        update(CardHold)
+                        .where(CardHold.id == hold_id, CardHold.status == "held")
+                        .values(status="captured", captured_amount=amount, settled_at=now)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if closed.rowcount != 1:
+                        # Not saved, or settled elsewhere: give the money back
+                        await session.execute(
+                            update(Account)
+                            .where(Account.id == hold.account_id)
+                            .values(balance=Account.balance + amount)
+                            .execution_options(synchronize_session=False)
+                        )
+                        results.append(("failed", "Hold not found or already settled"))
+                        continue
+
+                    session.add(Transaction(
+                        account_id=hold.account_id,
+                        amount=-amount,
+                        type="card_capture",
+                        timestamp=now,
+                        related_account_id=None,
+                    ))
+                    balances[hold.account_id], user_id = row
+                    owners.add(user_id)
+                    settled.append(hold_id)
+                    results.append(("captured", None))
+
+                if balances:
+                    await BalanceHistoryService.record_checkpoints(session, balances, now.date())
+                    AccountCache.stage_balances(session, balances)
+                # One commit for the whole batch
+                await session.commit()
+                state.update(settled=settled, owners=owners)
+                return results
+
+            results = await TransferService.run_with_retries(session, work)
+            for hold_id in state["settled"]:
+                self._drop_hold(hold_id)
+            for user_id in state["owners"]:
+                mark_recent_write(user_id)
+            return results
+
+    async def release(self, session: AsyncSession, hold_ids: Sequence[UUID], merchant: str) -> List[SettlementResult]:
+        """
+        Frees holds placed by `merchant` without moving money.
+        Returns ("released" | "failed", detail) per entry.
+        """
+        await self.flush()
+        self._bind_loop()
+        async with self._settle_lock:
+            now = datetime.now(timezone.utc)
+            released: List[UUID] = []
+
+            async def work():
+                released.clear()
+                results: List[SettlementResult] = []
+                for hold_id in hold_ids:
+                    hold = self._holds.get(hold_id)
+                    if hold is None or hold.merchant != merchant or hold_id in released:
+                        results.append(("failed", "Hold not found or already settled"))
+                        continue
+                    closed = await session.execute(
+                        update(CardHold)
+                        .where(CardHold.id == hold_id, CardHold.status == "held")
+                        .values(status="released", settled_at=now)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if closed.rowcount != 1:
+                        results.append(("failed", "Hold not found or already settled"))
+                        continue
+                    released.append(hold_id)
+                    results.append(("released", None))
+                await session.commit()
+                return results
+
+            results = await TransferService.run_with_retries(session, work)
+            for hold_id in released:
+                self._drop_hold(hold_id)
+            return results
+
+    def stats(self) -> dict:
+        return {
+            "cards": len(self._cards),
+            "open_holds": len(self._holds),
+            "unsaved_holds": len(self._unsaved),
+            "approved": self.approved,
+            "declined": self.declined,
+        }
+
+card_authorizations = CardAuthorizationEngine()
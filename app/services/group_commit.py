@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.core.metrics import start_background_task
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal
+from app.services.transfer_service import TransferService
+
+logger = logging.getLogger(__name__)
+
+# Defaults: flush after 5 ms or as soon as 100 transfers are waiting, whichever comes first
+GROUP_COMMIT_MAX_BATCH_SIZE = 100
+GROUP_COMMIT_WINDOW_MS = 5.0
+
+# A transfer leg plus the records to insert with it
+_Submission = Tuple[UUID, UUID, int, Sequence[Base]]
+
+class GroupCommitTransferEngine:
+    """
+    Collects concurrent transfer requests and applies them in one database transaction.
+
+    On SQLite every commit takes the single writer lock and pays for an fsync, so
+    sharing one commit between many transfers raises throughput considerably.
+    Each caller still gets its own result: `submit` returns True or raises the
+    ValueError that rejected that particular transfer. If the shared commit hits an
+    IntegrityError (say, two callers inserting the same idempotency key), the batch is
+    applied again one transfer per commit so that only the offending caller fails.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_batch_size: int = GROUP_COMMIT_MAX_BATCH_SIZE,
+        window_ms: float = GROUP_COMMIT_WINDOW_MS,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000.0
+
+        self._pending: List[Tuple[_Submission, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # Batches commit one at a time, in the order they were cut
+        self._commit_lock = asyncio.Lock()
+
+        self.batches_committed = 0
+        self.transfers_committed = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the transfer endpoint should submit here; a window of 0 turns group commit off.
+        """
+        return self.window > 0
+
+    async def submit(self, from_account_id: UUID, to_account_id: UUID, amount: int, records: Sequence[Base] = ()) -> bool:
+        """
+        Queues a transfer for the next batch and waits for its outcome. Any `records` are
+        inserted in the same transaction as the transfer.
+        """
+        # Reject malformed requests immediately instead of spending a batch slot on them
+        TransferService.validate_transfer(from_account_id, to_account_id, amount)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((from_account_id, to_account_id, amount, records), future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._cut_batch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._cut_batch)
+
+        return await future
+
+    def _cut_batch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = start_background_task(self._flush(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[_Submission, asyncio.Future]]):
+        async with self._commit_lock:
+            # Callers that were cancelled while queued are dropped before anything is applied
+            batch = [(submission, future) for submission, future in batch if not future.done()]
+            if not batch:
+                return
+
+            try:
+                async with self.session_factory() as session:
+                    try:
+                        outcomes = await self._apply_together(session, batch)
+                    except IntegrityError:
+                        await self._apply_separately(session, batch)
+                        return
+            except Exception as e:
+                # The shared commit failed, so none of the transfers were applied
+                logger.error(f"Group commit of {len(batch)} transfers failed: {e}")
+                TransferService.record_outcome(e, count=len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self.batches_committed += 1
+            for (_, future), error in zip(batch, outcomes):
+                TransferService.record_outcome(error)
+                if error is None:
+                    self.transfers_committed += 1
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(True)
+                else:
+                    future.set_exception(error)
+
+    @staticmethod
+    async def _apply_together(session: AsyncSession, batch: List[Tuple[_Submission, asyncio.Future]]) -> List[Optional[Exception]]:
+        """
+        Applies every transfer of the batch and commits once. Returns None or the
+        ValueError that rejected it, per transfer.
+        """
+        async def work():
+            outcomes: List[Optional[Exception]] = []
+            for (from_account_id, to_account_id, amount, records), _ in batch:
+                try:
+                    await TransferService.apply_transfer(from_account_id, to_account_id, amount, session)
+                except ValueError as e:
+                    outcomes.append(e)
+                    continue
+                session.add_all(records)
+                outcomes.append(None)
+            await session.commit()
+            return outcomes
+
+        return await TransferService.run_with_retries(session, work)
+
+    async def _apply_separately(self, session: AsyncSession, batch: List[Tuple[_Submission, asyncio.Future]]):
+        for (from_account_id, to_account_id, amount, records), future in batch:
+            try:
+                # Records outcomes for /metrics itself
+                await TransferService.transfer_funds(from_account_id, to_account_id, amount, session, records)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.batches_committed += 1
+            self.transfers_committed += 1
+            if not future.done():
+                future.set_result(True)
+
+    async def drain(self):
+        """
+        Flushes anything still queued and waits for in-flight batches to commit.
+        """
+        self._cut_batch()
+        while self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "batches_committed": self.batches_committed,
+            "transfers_committed": self.transfers_committed,
+            "avg_batch_size": (self.transfers_committed / self.batches_committed) if self.batches_committed else 0.0,
+        }
+
+def _from_settings() -> GroupCommitTransferEngine:
+    settings = get_settings()
+    return GroupCommitTransferEngine(
+        max_batch_size=settings.transfer_group_commit_max_batch,
+        window_ms=settings.transfer_group_commit_window_ms,
+    )
+
+# Used by POST /transfers/ when enabled; drained by the application lifespan
+transfer_group_commit = _from_settings()
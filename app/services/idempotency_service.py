@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+_settings = get_settings()
+idempotency_cache = TTLCache(
+    max_entries=_settings.idempotency_cache_max_entries,
+    ttl_seconds=_settings.idempotency_cache_ttl_seconds,
+)
+
+class StoredResponse:
+    __slots__ = ("request_hash", "status_code", "body")
+
+    def __init__(self, request_hash: str, status_code: int, body: dict):
+        self.request_hash = request_hash
+        self.status_code = status_code
+        self.body = body
+
+def _retention_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=get_settings().idempotency_key_retention_hours)
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands DateTime columns back without a timezone; they are stored in UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def _retention_left_seconds(created_at: Optional[datetime]) -> Optional[float]:
+    # How long a key created at created_at may still be replayed; None when not known yet
+    if created_at is None:
+        return None
+    expires_at = _as_utc(created_at) + timedelta(hours=get_settings().idempotency_key_retention_hours)
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+class IdempotencyService:
+    @staticmethod
+    def hash_request(payload: str) -> str:
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    async def lookup(session: AsyncSession, user_id: UUID, key: str) -> Optional[StoredResponse]:
+        """
+        Returns the response stored for this key, checking the cache before the database.
+        A key past the retention window counts as unused: its row is deleted and committed
+        so the request it comes with can store the key again.
+        """
+        stored = idempotency_cache.get((user_id, key))
+        if stored is not None:
+            return stored
+
+        result = await session.execute(
+            select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        )
+        record = result.scalar_one_or_none()
+        if record is None:
+            return None
+        cutoff = _retention_cutoff()
+        if _as_utc(record.created_at) < cutoff:
+            # Detached first, so the caller can add a new row under the same key to this session
+            session.expunge(record)
+            await session.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.created_at < cutoff)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            return None
+
+        stored = StoredResponse(record.request_hash, record.status_code, record.response_body)
+        # A key close to expiry is not replayed from the cache past its retention window
+        idempotency_cache.set((user_id, key), stored, ttl_seconds=_retention_left_seconds(record.created_at))
+        return stored
+
+    @staticmethod
+    def build_record(user_id: UUID, key: str, request_hash: str, status_code: int, body: dict) -> IdempotencyKey:
+        """
+        Row to commit in the same transaction as the operation it guards.
+        """
+        return IdempotencyKey(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            status_code=status_code,
+            response_body=body
+        )
+
+    @staticmethod
+    def remember(record: IdempotencyKey):
+        """
+        Caches a record once its transaction has committed.
+        """
+        idempotency_cache.set(
+            (record.user_id, record.key),
+            StoredResponse(record.request_hash, record.status_code, record.response_body),
+            ttl_seconds=_retention_left_seconds(record.created_at)
+        )
+
+    @staticmethod
+    async def purge_expired(session: AsyncSession) -> int:
+        """
+        Deletes every key past the retention window and commits. Returns how many were deleted.
+        """
+        result = await session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.created_at < _retention_cutoff())
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount
+
+async def _main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m app.services.idempotency_service", description="Maintain stored idempotency keys.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("purge", help="Delete keys older than IDEMPOTENCY_KEY_RETENTION_HOURS")
+    parser.parse_args(argv)
+
+    async with AsyncSessionLocal() as session:
+        print(f"Purged {await IdempotencyService.purge_expired(session)} idempotency keys")
+
+if __name__ == "__main__":
+    asyncio.run(_main())
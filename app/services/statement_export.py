@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
+from app.services.account_service import AccountService, to_db_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor and written to the client per chunk
+STATEMENT_EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = ("id", "timestamp", "type", "amount", "related_account_id", "counterparty_name")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows)
+
+class StatementExportService:
+    @staticmethod
+    async def iter_export(
+        session: AsyncSession,
+        account_id: UUID,
+        fmt: str = "csv",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Oldest-first export of [start, end) as CSV or NDJSON text chunks.
+        Rows come off a server-side cursor STATEMENT_EXPORT_CHUNK_SIZE at a time, so memory
+        stays flat whatever the history length. Stops between chunks once is_disconnected()
+        reports the client has gone away.
+        """
+        if fmt not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}")
+
+        query = (
+            select(Transaction.id, Transaction.timestamp, Transaction.type, Transaction.amount, Transaction.related_account_id)
+            .where(Transaction.account_id == account_id)
+            .order_by(Transaction.timestamp, Transaction.id)
+            .execution_options(yield_per=STATEMENT_EXPORT_CHUNK_SIZE)
+        )
+        if start is not None:
+            query = query.where(Transaction.timestamp >= to_db_timestamp(start))
+        if end is not None:
+            query = query.where(Transaction.timestamp < to_db_timestamp(end))
+
+        encode = _csv_chunk if fmt == "csv" else _ndjson_chunk
+        if fmt == "csv":
+            yield _csv_chunk([EXPORT_COLUMNS])
+
+        result = await session.stream(query)
+        exported = 0
+        try:
+            async for partition in result.partitions():
+                if is_disconnected is not None and await is_disconnected():
+                    logger.info(f"Statement export for account {account_id} abandoned by client after {exported} rows")
+                    return
+
+                # One counterparty lookup per chunk, served mostly from the cache
+                counterparties = await AccountService.get_counterparty_names(
+                    session, (row.related_account_id for row in partition if row.related_account_id)
+                )
+                yield encode([
+                    (
+                        str(row.id),
+                        row.timestamp.isoformat(),
+                        row.type,
+                        row.amount,
+                        str(row.related_account_id) if row.related_account_id else None,
+                        counterparties.get(row.related_account_id),
+                    )
+                    for row in partition
+                ])
+                exported += len(partition)
+        finally:
+            # Also runs when the response task is cancelled mid-stream, releasing the cursor
+            await result.close()
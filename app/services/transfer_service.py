@@ -1,66 +1,314 @@
+import asyncio
+import random
+import uuid
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import OperationalError
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
 from uuid import UUID
+from app.core.metrics import transfers_total
+from app.db.base import Base
 from app.models.account import Account
+from app.models.balance_shard import BalanceShard, shard_total
+from app.models.card_hold import CardHold
 from app.models.transaction import Transaction
+from app.services.account_cache import AccountCache
+from app.services.balance_history import BalanceHistoryService
+
+# (from_account_id, to_account_id, amount) as accepted by the batch APIs
+TransferLeg = Tuple[UUID, UUID, int]
+
+T = TypeVar("T")
+
+# Retry policy for losing the SQLite writer lock to a concurrent transaction
+TRANSFER_MAX_ATTEMPTS = 3
+TRANSFER_RETRY_BACKOFF_MS = 20
+
+class TransferConflictError(Exception):
+    """
+    Raised when a transfer keeps losing write races after all retries.
+    Nothing was applied; the caller may safely retry later.
+    """
+
+class InvalidTransferError(ValueError):
+    """
+    The transfer request itself is malformed (non-positive amount, same account).
+    """
+
+class AccountNotFoundError(ValueError):
+    pass
+
+class InsufficientFundsError(ValueError):
+    pass
+
+class BalanceShardMissingError(Exception):
+    """
+    Raised when a hot account's shard row is missing, so a credit could not be applied or
+    undone. Not a ValueError: the transaction is no longer consistent and must be rolled back.
+    """
+
+class ImmutableJournalError(Exception):
+    """
+    Raised on an attempt to change or delete a booked transaction through the ORM.
+    """
+
+@event.listens_for(Transaction, "before_update")
+@event.listens_for(Transaction, "before_delete")
+def _reject_journal_changes(mapper, connection, target):
+    # Transactions are the journal: mistakes are corrected by booking an offsetting entry
+    raise ImmutableJournalError("Booked transactions cannot be changed or deleted")
+
+def transfer_failure_reason(error: BaseException) -> str:
+    if isinstance(error, InsufficientFundsError):
+        return "insufficient_funds"
+    if isinstance(error, AccountNotFoundError):
+        return "not_found"
+    if isinstance(error, InvalidTransferError):
+        return "invalid"
+    if isinstance(error, TransferConflictError):
+        return "conflict"
+    return "error"
+
+def open_holds_total(account_id: UUID):
+    """
+    Scalar subquery for the amount reserved on an account by open card holds.
+    """
+    return (
+        select(func.coalesce(func.sum(CardHold.amount), 0))
+        .where(CardHold.status == "held", CardHold.account_id == account_id)
+        .scalar_subquery()
+    )
+
+def _is_lock_conflict(error: OperationalError) -> bool:
+    message = str(error.orig).lower()
+    return "database is locked" in message or "database table is locked" in message
 
 class TransferService:
     @staticmethod
-    async def transfer_funds(from_account_id: UUID, to_account_id: UUID, amount: int, session: AsyncSession):
+    def validate_transfer(from_account_id: UUID, to_account_id: UUID, amount: int):
         """
-        Executes a money transfer atomically.
+        Stateless checks that can reject a transfer before touching the database.
         """
-        # Basic Validation
         if amount <= 0:
-            raise ValueError("Transfer amount must be strictly positive")
+            raise InvalidTransferError("Transfer amount must be strictly positive")
         if from_account_id == to_account_id:
-            raise ValueError("Cannot transfer to the same account")
+            raise InvalidTransferError("Cannot transfer to the same account")
 
-        try:
-            # Fetch both accounts without FOR UPDATE (SQLite doesn't support row-level locking)
-            from_account_result = await session.execute(select(Account).where(Account.id == from_account_id))
-            from_account = from_account_result.scalar_one_or_none()
-            
-            to_account_result = await session.execute(select(Account).where(Account.id == to_account_id))
-            to_account = to_account_result.scalar_one_or_none()
-            
-            # Validate existence
-            if not from_account or not to_account:
-                raise ValueError("Account not found")
-            
-            # Check sufficient balance
-            if from_account.balance < amount:
-                raise ValueError("Insufficient Funds")
-                
-            # Update account balances
-            from_account.balance -= amount
-            to_account.balance += amount
-            
-            # Create offsetting Transaction records
-            # Debit transaction for sender
-            debit_tx = Transaction(
-                account_id=from_account_id,
-                amount=-amount,
-                type="transfer_out",
-                related_account_id=to_account_id
+    @staticmethod
+    async def apply_transfer(from_account_id: UUID, to_account_id: UUID, amount: int, session: AsyncSession):
+        """
+        Stages a transfer in the session without committing, together with both accounts'
+        daily balance checkpoints and their cached snapshots' new balances. A credit to a
+        hot account goes to one of its shards and leaves its checkpoint to compaction.
+        A ValueError leaves the session's balances exactly as they were before the call.
+        """
+        TransferService.validate_transfer(from_account_id, to_account_id, amount)
+        now = datetime.now(timezone.utc)
+
+        # Compare-and-set balance updates instead of read-modify-write: the database applies
+        # each change atomically, so concurrent transfers can never overwrite each other's
+        # balances and no Account rows need to be loaded. The credit goes first so that a
+        # missing account is reported ahead of insufficient funds, as before. RETURNING hands
+        # back the new balances for the checkpoints without another round trip.
+        credited = await session.execute(
+            update(Account)
+            .where(Account.id == to_account_id, Account.shard_count == 0)
+            .values(balance=Account.balance + amount)
+            .returning(Account.balance)
+            .execution_options(synchronize_session=False)
+        )
+        to_balance = credited.scalar_one_or_none()
+        credited_shard = None
+        if to_balance is None:
+            shard_count = await session.scalar(select(Account.shard_count).where(Account.id == to_account_id))
+            if shard_count is None:
+                raise AccountNotFoundError("Account not found")
+            # A hot account: credit a random shard so concurrent credits do not all wait on one row
+            credited_shard = random.randrange(shard_count)
+            result = await session.execute(
+                update(BalanceShard)
+                .where(BalanceShard.account_id == to_account_id, BalanceShard.shard == credited_shard)
+                .values(balance=BalanceShard.balance + amount)
+                .execution_options(synchronize_session=False)
             )
-            
-            # Credit transaction for receiver
-            credit_tx = Transaction(
-                account_id=to_account_id,
-                amount=amount,
-                type="credit",
-                related_account_id=from_account_id
+            if result.rowcount != 1:
+                raise BalanceShardMissingError(f"Balance shard {credited_shard} of account {to_account_id} is missing")
+
+        # Imported here: the card engine builds on TransferService
+        from app.services.card_authorization import card_authorizations
+
+        # Money reserved by card holds is not available for transfers, including holds approved
+        # in the last write-behind window and not yet in card_holds; credits still sitting in
+        # shards are. Debits always come off the accounts row, which may go negative on a hot
+        # account as long as the shards cover it.
+        unsaved_holds = card_authorizations.unsaved_held(from_account_id)
+        debited = await session.execute(
+            update(Account)
+            .where(
+                Account.id == from_account_id,
+                Account.balance + shard_total(from_account_id) - open_holds_total(from_account_id) - unsaved_holds >= amount
             )
-            
-            session.add_all([debit_tx, credit_tx])
-            
+            .values(balance=Account.balance - amount)
+            .returning(Account.balance + shard_total(from_account_id))
+            .execution_options(synchronize_session=False)
+        )
+        from_balance = debited.scalar_one_or_none()
+        if from_balance is None:
+            # Undo the credit so the session is left exactly as we found it
+            if credited_shard is None:
+                await session.execute(
+                    update(Account)
+                    .where(Account.id == to_account_id)
+                    .values(balance=Account.balance - amount)
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                result = await session.execute(
+                    update(BalanceShard)
+                    .where(BalanceShard.account_id == to_account_id, BalanceShard.shard == credited_shard)
+                    .values(balance=BalanceShard.balance - amount)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount != 1:
+                    raise BalanceShardMissingError(f"Balance shard {credited_shard} of account {to_account_id} is missing")
+            # Only the failure path pays for a lookup to tell the two cases apart
+            exists = await session.scalar(select(Account.id).where(Account.id == from_account_id))
+            if exists is None:
+                raise AccountNotFoundError("Account not found")
+            raise InsufficientFundsError("Insufficient Funds")
+
+        # Book the transfer as one journal entry: a debit line for the sender and a
+        # credit line for the receiver, which sum to zero
+        entry_id = uuid.uuid4()
+        debit_tx = Transaction(
+            account_id=from_account_id,
+            amount=-amount,
+            type="transfer_out",
+            timestamp=now,
+            related_account_id=to_account_id,
+            entry_id=entry_id
+        )
+
+        credit_tx = Transaction(
+            account_id=to_account_id,
+            amount=amount,
+            type="credit",
+            timestamp=now,
+            related_account_id=from_account_id,
+            entry_id=entry_id
+        )
+
+        session.add_all([debit_tx, credit_tx])
+        new_balances = {from_account_id: from_balance}
+        if credited_shard is None:
+            new_balances[to_account_id] = to_balance
+        else:
+            # The hot account's total is not known without summing its shards; its checkpoint
+            # is written by the next compaction and its cached snapshot is dropped instead
+            AccountCache.stage_invalidation(session, [to_account_id])
+        await BalanceHistoryService.record_checkpoints(session, new_balances, now.date())
+        # Written through to cached account snapshots only if this transaction commits
+        AccountCache.stage_balances(session, new_balances)
+
+    @staticmethod
+    def record_outcome(error: Optional[BaseException] = None, count: int = 1):
+        """
+        Counts finished transfers for /metrics: successes, or failures by reason.
+        """
+        if count <= 0:
+            return
+        if error is None:
+            transfers_total.inc(count, outcome="success", reason="")
+        else:
+            transfers_total.inc(count, outcome="failure", reason=transfer_failure_reason(error))
+
+    @staticmethod
+    async def run_with_retries(session: AsyncSession, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs work() and rolls back on failure.
+        Lock conflicts are retried with exponential backoff before TransferConflictError is raised.
+        """
+        for attempt in range(1, TRANSFER_MAX_ATTEMPTS + 1):
+            try:
+                return await work()
+
+            except OperationalError as e:
+                await session.rollback()
+                if not _is_lock_conflict(e):
+                    raise e
+                if attempt == TRANSFER_MAX_ATTEMPTS:
+                    raise TransferConflictError("Transfer could not be applied due to concurrent updates, please retry") from e
+                await asyncio.sleep(TRANSFER_RETRY_BACKOFF_MS / 1000.0 * 2 ** (attempt - 1))
+
+            except Exception as e:
+                # Rollback in case of any failure ensuring atomicity
+                await session.rollback()
+                raise e
+
+    @staticmethod
+    async def transfer_funds(from_account_id: UUID, to_account_id: UUID, amount: int, session: AsyncSession, records: Sequence[Base] = ()):
+        """
+        Executes a money transfer atomically.
+        Any extra `records` are inserted in the same transaction (and re-added on retry).
+        """
+        async def work():
+            await TransferService.apply_transfer(from_account_id, to_account_id, amount, session)
+            session.add_all(records)
+
             # Explicitly commit the transaction block
             await session.commit()
-            
+
             return True
-            
+
+        try:
+            # Basic Validation
+            TransferService.validate_transfer(from_account_id, to_account_id, amount)
+            result = await TransferService.run_with_retries(session, work)
         except Exception as e:
-            # Rollback in case of any failure ensuring atomicity
-            await session.rollback()
-            raise e
+            TransferService.record_outcome(e)
+            raise
+        TransferService.record_outcome()
+        return result
+
+    @staticmethod
+    async def transfer_funds_batch(legs: Sequence[TransferLeg], session: AsyncSession, atomic: bool = False) -> List[Optional[Exception]]:
+        """
+        Applies many transfers in a single database transaction.
+        Legs run in order; a leg failing validation is skipped without affecting the others.
+        With atomic=True any failed leg rolls the whole batch back instead of committing the rest.
+        Returns one entry per attempted leg: None on success, or the ValueError that rejected it.
+        In atomic mode the list stops at the first failure.
+        """
+        async def work():
+            outcomes: List[Optional[Exception]] = []
+            for from_account_id, to_account_id, amount in legs:
+                try:
+                    await TransferService.apply_transfer(from_account_id, to_account_id, amount, session)
+                    outcomes.append(None)
+                except ValueError as e:
+                    outcomes.append(e)
+                    if atomic:
+                        # No point applying the remaining legs, they would be rolled back anyway
+                        break
+
+            if atomic and any(outcome is not None for outcome in outcomes):
+                await session.rollback()
+                return outcomes
+
+            # One commit (and one fsync) for the whole batch
+            await session.commit()
+            return outcomes
+
+        try:
+            outcomes = await TransferService.run_with_retries(session, work)
+        except Exception as e:
+            TransferService.record_outcome(e, count=len(legs))
+            raise
+
+        failures = [outcome for outcome in outcomes if outcome is not None]
+        for failure in failures:
+            TransferService.record_outcome(failure)
+        if not (atomic and failures):
+            TransferService.record_outcome(count=len(outcomes) - len(failures))
+        return outcomes
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.session import AsyncSessionLocal, mark_recent_write
+from app.models.dead_letter_transfer import DeadLetterTransfer
+from app.models.transfer_job import TransferJob
+from app.services.transfer_service import TransferService
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_WORKER_CONCURRENCY = 4
+TRANSFER_WORKER_POLL_INTERVAL_MS = 250
+TRANSFER_JOB_MAX_ATTEMPTS = 5
+TRANSFER_JOB_BACKOFF_BASE_MS = 200
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class TransferQueue:
+    @staticmethod
+    async def enqueue(session: AsyncSession, user_id: UUID, from_account_id: UUID, to_account_id: UUID, amount: int) -> TransferJob:
+        """
+        Persists a transfer for background processing and returns the queued job.
+        """
+        TransferService.validate_transfer(from_account_id, to_account_id, amount)
+        job = TransferJob(
+            user_id=user_id,
+            from_account_id=from_account_id,
+            to_account_id=to_account_id,
+            amount=amount
+        )
+        session.add(job)
+        await session.commit()
+        return job
+
+class TransferWorkerPool:
+    """
+    asyncio workers draining the transfer_jobs table through TransferService.
+
+    A job is claimed with a conditional UPDATE (pending -> processing) so two workers
+    never apply the same job. Marking it completed happens in the same transaction
+    as the balance change, so a job left in 'processing' after a crash was never
+    applied and is safely re-queued on start.
+
+    Business rejections (insufficient funds, unknown account) fail the job at once.
+    Anything else is retried with exponential backoff and moved to the dead-letter
+    table after max_attempts.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        concurrency: int = TRANSFER_WORKER_CONCURRENCY,
+        poll_interval_ms: float = TRANSFER_WORKER_POLL_INTERVAL_MS,
+        max_attempts: int = TRANSFER_JOB_MAX_ATTEMPTS,
+        backoff_base_ms: float = TRANSFER_JOB_BACKOFF_BASE_MS,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval_ms / 1000.0
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base_ms / 1000.0
+
+        self._tasks: List[asyncio.Task] = []
+        # Created in start() so it binds to the serving event loop
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        await self.requeue_stale()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        logger.info(f"Started {self.concurrency} transfer workers")
+
+    async def stop(self):
+        self._stopping = True
+        self.notify()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """
+        Wakes idle workers right away instead of waiting for the next poll.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def requeue_stale(self):
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(TransferJob)
+                .where(TransferJob.status == "processing")
+                .values(status="pending", updated_at=_utcnow())
+            )
+            await session.commit()
+            if result.rowcount:
+                logger.warning(f"Re-queued {result.rowcount} transfer jobs left in processing")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                processed = await self.process_one()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transfer worker error: {e}")
+                processed = False
+
+            if not processed:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _claim(self) -> Optional[TransferJob]:
+        async with self.session_factory() as session:
+            while True:
+                now = _utcnow()
+                result = await session.execute(
+                    select(TransferJob)
+                    .where(TransferJob.status == "pending", TransferJob.available_at <= now)
+                    .order_by(TransferJob.available_at)
+                    .limit(1)
+                )
+                job = result.scalar_one_or_none()
+                if job is None:
+                    return None
+
+                claimed = await session.execute(
+                    update(TransferJob)
+                    .where(TransferJob.id == job.id, TransferJob.status == "pending")
+                    .values(status="processing", attempts=TransferJob.attempts + 1, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    job.status = "processing"
+                    job.attempts += 1
+                    return job
+                # Another worker got there first; look again
+
+    async def process_one(self) -> bool:
+        """
+        Claims and processes a single due job. Returns False when none is due.
+        """
+        job = await self._claim()
+        if job is None:
+            return False
+
+        async with self.session_factory() as session:
+            async def work():
+                await TransferService.apply_transfer(job.from_account_id, job.to_account_id, job.amount, session)
+                await session.execute(
+                    update(TransferJob)
+                    .where(TransferJob.id == job.id)
+                    .values(status="completed", last_error=None, updated_at=_utcnow())
+                )
+                await session.commit()
+
+            try:
+                await TransferService.run_with_retries(session, work)
+                # The submitter's next balance reads should see this transfer
+                mark_recent_write(job.user_id)
+                TransferService.record_outcome()
+                self.completed += 1
+            except ValueError as e:
+                # Deterministic rejection; retrying cannot help
+                await self._finish(session, job, "failed", str(e))
+                TransferService.record_outcome(e)
+                self.failed += 1
+            except Exception as e:
+                await self._retry_or_dead_letter(session, job, e)
+        return True
+
+    async def _finish(self, session: AsyncSession, job: TransferJob, status: str, error: str):
+        await session.execute(
+            update(TransferJob)
+            .where(TransferJob.id == job.id)
+            .values(status=status, last_error=error, updated_at=_utcnow())
+        )
+        await session.commit()
+
+    async def _retry_or_dead_letter(self, session: AsyncSession, job: TransferJob, error: Exception):
+        message = str(error) or error.__class__.__name__
+        if job.attempts >= self.max_attempts:
+            session.add(DeadLetterTransfer(
+                job_id=job.id,
+                from_account_id=job.from_account_id,
+                to_account_id=job.to_account_id,
+                amount=job.amount,
+                attempts=job.attempts,
+                error=message
+            ))
+            await self._finish(session, job, "dead_lettered", message)
+            TransferService.record_outcome(error)
+            self.dead_lettered += 1
+            logger.error(f"Transfer job {job.id} dead-lettered after {job.attempts} attempts: {message}")
+            return
+
+        delay = self.backoff_base * 2 ** (job.attempts - 1)
+        await session.execute(
+            update(TransferJob)
+            .where(TransferJob.id == job.id)
+            .values(
+                status="pending",
+                last_error=message,
+                available_at=_utcnow() + timedelta(seconds=delay),
+                updated_at=_utcnow()
+            )
+        )
+        await session.commit()
+        self.retried += 1
+
+    async def run_until_empty(self) -> int:
+        """
+        Processes due jobs inline until none remain. Returns how many were processed.
+        """
+        processed = 0
+        while await self.process_one():
+            processed += 1
+        return processed
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+        }
+
+# Started and stopped by the application lifespan
+transfer_workers = TransferWorkerPool()
@@ -0,0 +1,111 @@
+"""
+In-process load benchmark for the API.
+
+    python -m benchmarks --users 200 --requests 5000 --concurrency 32 \
+        --mix login=1,dashboard=4,history=2,transfer=2,statement=1 \
+        --output bench.json --baseline benchmarks/baseline.json
+
+Requests go through httpx's ASGI transport straight into app.main:app, so the numbers
+cover routing, validation, serialization and the database but no network or server.
+The database at --database-url is dropped and re-seeded on every run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List, Optional
+
+from benchmarks.report import DEFAULT_TOLERANCE, compare
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///./data/bench.db"
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run a mixed API workload and report latency and throughput as JSON.")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Scratch database; it is wiped and re-seeded")
+    parser.add_argument("--users", type=int, default=100, help="Seeded users, one funded account each")
+    parser.add_argument("--requests", type=int, default=2000, help="Timed requests")
+    parser.add_argument("--warmup", type=int, default=200, help="Untimed requests sent first")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--mix", default="login=1,dashboard=4,history=2,transfer=2,statement=1", help="Operation weights")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the data and the request schedule")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Compare against this stored report; exits 1 on regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run's report at --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative change before a metric counts as a regression")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+    if args.users < 2:
+        parser.error("--users must be at least 2")
+    return args
+
+def _configure_environment(args: argparse.Namespace):
+    # Must run before anything imports app.db.session, which builds its engines on import
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("READ_DATABASE_URL", None)
+    os.environ.setdefault("APP_PROFILE", "bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+async def run(args: argparse.Namespace) -> dict:
+    from httpx import AsyncClient, ASGITransport
+
+    from app.db.base import Base
+    from app.db.session import AsyncSessionLocal, engine, settings
+    from app.main import app
+    from benchmarks.workload import parse_mix, run_workload, seed_users
+
+    if settings.app_profile != "bench":
+        raise SystemExit(f"Refusing to wipe {args.database_url} under the {settings.app_profile!r} profile; use APP_PROFILE=bench")
+    mix = parse_mix(args.mix)
+
+    if settings.is_sqlite() and not settings.is_memory_db():
+        os.makedirs(os.path.dirname(os.path.abspath(engine.url.database)), exist_ok=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    # The lifespan starts and stops the same background workers and pools as under uvicorn
+    async with app.router.lifespan_context(app):
+        users = await seed_users(AsyncSessionLocal, args.users, seed=args.seed)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            report = await run_workload(
+                client,
+                users,
+                mix,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+                seed=args.seed,
+            )
+    report["config"]["profile"] = settings.app_profile
+    report["config"]["database_url"] = settings.summary()["database_url"]
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    _configure_environment(args)
+    report = asyncio.run(run(args))
+
+    exit_code = 0
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+    for regression in report.get("regressions", []):
+        print(f"REGRESSION {regression['scope']} {regression['metric']}: {regression['baseline']} -> {regression['current']}", file=sys.stderr)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import math
+from typing import Dict, List, NamedTuple, Optional
+
+# Relative change against the baseline tolerated before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.15
+# Latency moves smaller than this are scheduler noise, whatever their relative size
+LATENCY_NOISE_FLOOR_MS = 1.0
+
+class Sample(NamedTuple):
+    seconds: float
+    status: int
+    # Statements the request executed, from its Server-Timing header; None if absent
+    queries: Optional[int]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list; 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def _summarize_samples(samples: List[Sample], elapsed_seconds: float) -> dict:
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample.status >= 400),
+        "throughput_rps": round(len(samples) / elapsed_seconds, 2) if elapsed_seconds > 0 else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+def summarize(samples: Dict[str, List[Sample]], elapsed_seconds: float, config: Optional[dict] = None) -> dict:
+    """
+    Builds the JSON report: overall figures plus a breakdown per operation.
+    """
+    everything = [sample for operation_samples in samples.values() for sample in operation_samples]
+    report = {
+        "config": config or {},
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "overall": _summarize_samples(everything, elapsed_seconds),
+        "operations": {
+            operation: _summarize_samples(operation_samples, elapsed_seconds)
+            for operation, operation_samples in sorted(samples.items())
+        },
+    }
+    return report
+
+def _regression(scope: str, metric: str, baseline: float, current: float) -> dict:
+    change = (current - baseline) / baseline if baseline else math.inf
+    return {
+        "scope": scope,
+        "metric": metric,
+        "baseline": baseline,
+        "current": current,
+        "change": round(change, 4) if change != math.inf else None,
+    }
+
+def _compare_figures(scope: str, current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    regressions = []
+
+    if baseline.get("throughput_rps") and current["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(_regression(scope, "throughput_rps", baseline["throughput_rps"], current["throughput_rps"]))
+
+    for metric in ("p50_ms", "p95_ms", "p99_ms"):
+        before, after = baseline.get(metric), current[metric]
+        if before is None:
+            continue
+        if after > before * (1 + tolerance) and after - before > LATENCY_NOISE_FLOOR_MS:
+            regressions.append(_regression(scope, metric, before, after))
+
+    # Query counts are deterministic, so any growth beyond rounding is a real change (an N+1, a lost cache)
+    before, after = baseline.get("queries_per_request"), current["queries_per_request"]
+    if before is not None and after is not None and after > before * (1 + tolerance) + 0.01:
+        regressions.append(_regression(scope, "queries_per_request", before, after))
+
+    before, after = baseline.get("errors", 0), current["errors"]
+    if after > before and after / max(current["requests"], 1) > tolerance / 10:
+        regressions.append(_regression(scope, "errors", before, after))
+
+    return regressions
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """
+    Lists metrics that moved the wrong way by more than the tolerance, overall and
+    per operation. Operations missing from either report are not compared.
+    """
+    regressions = _compare_figures("overall", current["overall"], baseline["overall"], tolerance)
+    for operation, figures in current["operations"].items():
+        if operation in baseline.get("operations", {}):
+            regressions.extend(_compare_figures(operation, figures, baseline["operations"][operation], tolerance))
+    return regressions
@@ -0,0 +1,186 @@
+import asyncio
+import random
+import re
+import time
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from httpx import AsyncClient, Response
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, get_password_hash
+from app.models.account import Account
+from app.models.user import User
+from benchmarks.report import Sample, summarize
+
+BENCH_PASSWORD = "benchmark-password"
+# Large enough that a run never fails a transfer on funds
+BENCH_OPENING_BALANCE = 10 ** 12
+SEED_CHUNK_SIZE = 1000
+
+# Relative weights; "login" runs a real bcrypt verification, so it dominates CPU per request
+DEFAULT_MIX = {"login": 1, "dashboard": 4, "history": 2, "transfer": 2, "statement": 1}
+
+_QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+
+class VirtualUser(NamedTuple):
+    user_id: uuid.UUID
+    email: str
+    account_id: uuid.UUID
+    token: str
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+async def seed_users(
+    session_factory: async_sessionmaker,
+    count: int,
+    seed: int = 0,
+    email_prefix: str = "bench",
+) -> List[VirtualUser]:
+    """
+    Inserts `count` users with one funded account each and returns them with ready tokens.
+    Rows go in through Core in chunks, sharing a single password hash.
+    """
+    rng = random.Random(seed)
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    token_lifetime = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    users = []
+    for index in range(count):
+        user_id = _uuid(rng)
+        email = f"{email_prefix}-{index}@example.com"
+        token = create_access_token(data={"sub": str(user_id), "email": email}, expires_delta=token_lifetime)
+        users.append(VirtualUser(user_id, email, _uuid(rng), token))
+
+    async with session_factory() as session:
+        for start in range(0, count, SEED_CHUNK_SIZE):
+            chunk = users[start:start + SEED_CHUNK_SIZE]
+            await session.execute(insert(User.__table__), [
+                {"id": user.user_id, "email": user.email, "hashed_password": hashed_password, "is_active": True}
+                for user in chunk
+            ])
+            await session.execute(insert(Account.__table__), [
+                {
+                    "id": user.account_id,
+                    "user_id": user.user_id,
+                    "account_number": f"{email_prefix}-{start + offset:08d}",
+                    "currency": "USD",
+                    "balance": BENCH_OPENING_BALANCE,
+                }
+                for offset, user in enumerate(chunk)
+            ])
+        await session.commit()
+    return users
+
+Operation = Callable[[AsyncClient, VirtualUser, VirtualUser], Awaitable[Response]]
+
+async def _login(client: AsyncClient, user: VirtualUser, peer: VirtualUser) -> Response:
+    return await client.post("/auth/login", data={"username": user.email, "password": BENCH_PASSWORD})
+
+async def _dashboard(client: AsyncClient, user: VirtualUser, peer: VirtualUser) -> Response:
+    return await client.get("/accounts/me", headers=user.headers)
+
+async def _history(client: AsyncClient, user: VirtualUser, peer: VirtualUser) -> Response:
+    return await client.get(f"/accounts/{user.account_id}/transactions/", params={"limit": 20}, headers=user.headers)
+
+async def _transfer(client: AsyncClient, user: VirtualUser, peer: VirtualUser) -> Response:
+    payload = {"from_account_id": str(user.account_id), "to_identifier": str(peer.account_id), "amount": 1}
+    return await client.post("/transfers/", json=payload, headers=user.headers)
+
+async def _statement(client: AsyncClient, user: VirtualUser, peer: VirtualUser) -> Response:
+    return await client.get(f"/accounts/{user.account_id}/statement/", params={"limit": 50}, headers=user.headers)
+
+OPERATIONS: Dict[str, Operation] = {
+    "login": _login,
+    "dashboard": _dashboard,
+    "history": _history,
+    "transfer": _transfer,
+    "statement": _statement,
+}
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parses "login=1,dashboard=4,transfer=2" into operation weights.
+    """
+    mix = {}
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Weight for {name!r} must be a number, got {weight!r}")
+        if mix[name] < 0:
+            raise ValueError(f"Weight for {name!r} must not be negative")
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one operation with a positive weight")
+    return mix
+
+def _queries(response: Response) -> Optional[int]:
+    match = _QUERIES_PATTERN.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else None
+
+async def run_workload(
+    client: AsyncClient,
+    users: List[VirtualUser],
+    mix: Dict[str, float],
+    requests: int,
+    concurrency: int = 1,
+    warmup: int = 0,
+    seed: int = 0,
+) -> dict:
+    """
+    Issues `warmup` unrecorded requests, then `requests` timed ones from `concurrency`
+    concurrent workers, each picking an operation by weight and a random user and peer.
+    Returns the report built by benchmarks.report.summarize().
+    """
+    if len(users) < 2:
+        raise ValueError("The workload needs at least two users so transfers have a counterparty")
+
+    rng = random.Random(seed)
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    # The schedule is fixed up front so a given seed replays the same requests
+    schedule = []
+    for _ in range(warmup + requests):
+        user, peer = rng.sample(users, 2)
+        schedule.append((rng.choices(names, weights)[0], user, peer))
+
+    samples: Dict[str, List[Sample]] = {name: [] for name in names}
+
+    async def drain(jobs, record: bool):
+        for name, user, peer in jobs:
+            start = time.perf_counter()
+            response = await OPERATIONS[name](client, user, peer)
+            elapsed = time.perf_counter() - start
+            if record:
+                samples[name].append(Sample(elapsed, response.status_code, _queries(response)))
+
+    async def run_phase(jobs, record: bool) -> float:
+        iterator = iter(jobs)
+        start = time.perf_counter()
+        # Workers share one iterator, so a slow request never leaves the others idle
+        await asyncio.gather(*(drain(iterator, record) for _ in range(max(1, concurrency))))
+        return time.perf_counter() - start
+
+    await run_phase(schedule[:warmup], record=False)
+    elapsed = await run_phase(schedule[warmup:], record=True)
+
+    config = {
+        "users": len(users),
+        "requests": requests,
+        "warmup": warmup,
+        "concurrency": concurrency,
+        "seed": seed,
+        "mix": {name: mix[name] for name in names},
+    }
+    return summarize({name: values for name, values in samples.items() if values}, elapsed, config)
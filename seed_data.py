@@ -1,128 +1,244 @@
+"""
+Synthetic data generator.
+
+    python seed_data.py                                  # 5 demo users, as before
+    python seed_data.py --users 1000000 --transfers-per-user 20 --workers 8
+
+Users are generated in fixed-size shards by worker processes and written with Core
+executemany inserts, one database transaction per shard. Every shard draws from its
+own generator seeded with (--seed, shard index), so a given seed and --end-date
+produce the same rows whatever the worker count. Transfers stay inside a shard,
+which lets each worker keep balances consistent: every account's balance equals the
+sum of its transactions, no balance ever goes negative, and daily_balances holds the
+closing balance of each day an account changed.
+"""
+import argparse
 import asyncio
-import uuid
-import sys
+import os
 import random
-from datetime import datetime
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy import text
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
 
-from app.models.user import User
+from sqlalchemy import delete, insert
+
+from app.core.config import get_settings
+from app.core.security import get_password_hash
+from app.db.base import Base
+from app.db.session import build_engine
 from app.models.account import Account
-from app.models.transaction import Transaction
 from app.models.card import Card
-from app.core.security import get_password_hash
+from app.models.daily_balance import DailyBalance
+from app.models.transaction import Transaction
+from app.models.user import User
+
+DEMO_NAMES = ["karan", "lava", "alice", "bob", "charlie"]
+DEMO_PASSWORD = "securepassword123"
+
+# Users per shard; fixed so the output does not depend on the number of workers
+SHARD_USERS = 10000
+# Rows per executemany call
+INSERT_CHUNK_SIZE = 5000
+
+# Insert order; children after the rows they reference
+SHARD_TABLES = [
+    ("users", User.__table__),
+    ("accounts", Account.__table__),
+    ("transactions", Transaction.__table__),
+    ("cards", Card.__table__),
+    ("daily_balances", DailyBalance.__table__),
+]
+
+class SeedOptions(NamedTuple):
+    users: int
+    transfers_per_user: float
+    days: int
+    # Exclusive end of the generated history, naive UTC midnight
+    end: datetime
+    seed: int
+    hashed_password: str
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+def _email(index: int) -> str:
+    # The first users keep the demo addresses the quickstart documents
+    name = DEMO_NAMES[index] if index < len(DEMO_NAMES) else f"user{index}"
+    return f"{name}@example.com"
+
+def _card(rng: random.Random, account_id: uuid.UUID, account_index: int, slot: int, expiry: str) -> dict:
+    # Account index and slot make the number unique without a lookup
+    card_number = f"4{account_index:012d}{slot}{rng.randint(0, 99):02d}"
+    return {
+        "id": _uuid(rng),
+        "account_id": account_id,
+        "card_number": card_number,
+        "cvc": f"{rng.randint(0, 999):03d}",
+        "expiry": expiry,
+    }
+
+def build_shard(options: SeedOptions, shard: int) -> Dict[str, List[dict]]:
+    """
+    Rows for users [shard * SHARD_USERS, ...) and their accounts, transfers, cards and
+    daily balances. Pure function of (options, shard); runs in a worker process.
+    """
+    rng = random.Random(f"{options.seed}:{shard}")
+    first = shard * SHARD_USERS
+    last = min(first + SHARD_USERS, options.users)
+    start = options.end - timedelta(days=options.days)
+    expiry_year = options.end.year + 3
+    expiry = f"{options.end.month:02d}/{str(expiry_year)[-2:]}"
+
+    users, accounts, transactions, cards = [], [], [], []
+    for index in range(first, last):
+        user_id = _uuid(rng)
+        users.append({"id": user_id, "email": _email(index), "hashed_password": options.hashed_password, "is_active": True})
+        # Checking with $10,000 to $50,000 and savings with $5,000 to $20,000, opened by a deposit
+        for prefix, low, high in (("100", 1000000, 5000000), ("200", 500000, 2000000)):
+            accounts.append({
+                "id": _uuid(rng),
+                "user_id": user_id,
+                "account_number": f"{prefix}{index:09d}",
+                "currency": "USD",
+                "balance": rng.randint(low, high),
+            })
+
+    balances = {account["id"]: 0 for account in accounts}
+    closing: Dict[tuple, int] = {}
+
+    def book(account_id, amount, tx_type, timestamp, related_account_id=None, entry_id=None):
+        transactions.append({
+            "id": _uuid(rng),
+            "account_id": account_id,
+            "amount": amount,
+            "type": tx_type,
+            "timestamp": timestamp,
+            "related_account_id": related_account_id,
+            "entry_id": entry_id,
+        })
+        balances[account_id] += amount
+        closing[(account_id, timestamp.date())] = balances[account_id]
+
+    for account in accounts:
+        book(account["id"], account["balance"], "deposit", start)
+
+    # Transfers in time order, so a sender never spends money it does not have yet
+    transfer_count = round((last - first) * options.transfers_per_user)
+    window_seconds = options.days * 86400
+    moments = sorted(rng.randrange(1, window_seconds) for _ in range(transfer_count))
+    for offset in moments:
+        timestamp = start + timedelta(seconds=offset)
+        sender, receiver = rng.sample(accounts, 2)
+        amount = rng.randint(1000, 50000)  # $10.00 to $500.00
+        if balances[sender["id"]] < amount:
+            continue
+        # Both lines of a transfer belong to one journal entry, as TransferService books them
+        entry_id = _uuid(rng)
+        book(sender["id"], -amount, "transfer_out", timestamp, receiver["id"], entry_id)
+        book(receiver["id"], amount, "credit", timestamp, sender["id"], entry_id)
+
+    for account_index, account in enumerate(accounts, start=first * 2):
+        account["balance"] = balances[account["id"]]
+        # Every checking account gets a debit card; half of them a supplementary one
+        if account["account_number"].startswith("100"):
+            for slot in range(2 if rng.random() < 0.5 else 1):
+                cards.append(_card(rng, account["id"], account_index, slot, expiry))
+
+    updated_at = options.end
+    daily_balances = [
+        {"account_id": account_id, "day": day, "closing_balance": balance, "updated_at": updated_at}
+        for (account_id, day), balance in closing.items()
+    ]
+    return {
+        "users": users,
+        "accounts": accounts,
+        "transactions": transactions,
+        "cards": cards,
+        "daily_balances": daily_balances,
+    }
+
+async def _insert_shard(engine, rows: Dict[str, List[dict]], chunk_size: int):
+    async with engine.begin() as conn:
+        for name, table in SHARD_TABLES:
+            table_rows = rows[name]
+            for offset in range(0, len(table_rows), chunk_size):
+                await conn.execute(insert(table), table_rows[offset:offset + chunk_size])
+
+async def seed_database(options: SeedOptions, workers: int, chunk_size: int = INSERT_CHUNK_SIZE, wipe: bool = True) -> Dict[str, int]:
+    # Same database and PRAGMAs as the app; per-row SQL logging would drown the progress output
+    engine = build_engine(get_settings(), echo=False)
+    counts = {name: 0 for name, _ in SHARD_TABLES}
+    shards = range((options.users + SHARD_USERS - 1) // SHARD_USERS)
+
+    try:
+        if wipe:
+            print("WARNING: Wiping existing database records...")
+            async with engine.begin() as conn:
+                for table in reversed(Base.metadata.sorted_tables):
+                    await conn.execute(delete(table))
 
-# Configure Database Connection
-DATABASE_URL = "sqlite+aiosqlite:///./data/banking.db"
-engine = create_async_engine(DATABASE_URL, echo=False)
-SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            # Keep a few shards ahead of the writer, but not the whole dataset in memory
+            pending: List[asyncio.Future] = []
+            shard_iter = iter(shards)
+            for shard in shard_iter:
+                pending.append(loop.run_in_executor(executor, build_shard, options, shard))
+                if len(pending) >= max(2, workers * 2):
+                    break
+            while pending:
+                rows = await pending.pop(0)
+                next_shard = next(shard_iter, None)
+                if next_shard is not None:
+                    pending.append(loop.run_in_executor(executor, build_shard, options, next_shard))
+                await _insert_shard(engine, rows, chunk_size)
+                for name, table_rows in rows.items():
+                    counts[name] += len(table_rows)
+                print(f"  {counts['users']}/{options.users} users written ({time.perf_counter() - started:.1f}s)")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    finally:
+        await engine.dispose()
+    return counts
 
-def generate_card():
-    card_number = "".join([str(random.randint(0, 9)) for _ in range(16)])
-    cvc = "".join([str(random.randint(0, 9)) for _ in range(3)])
-    expiry_year = datetime.now().year + 3
-    expiry_month = f"{datetime.now().month:02d}"
-    expiry = f"{expiry_month}/{str(expiry_year)[-2:]}"
-    return card_number, cvc, expiry
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fill the configured database with consistent synthetic data.")
+    parser.add_argument("--users", type=int, default=len(DEMO_NAMES), help="Users to create; each gets a checking and a savings account")
+    parser.add_argument("--transfers-per-user", type=float, default=4.0, help="Average transfers sent per user")
+    parser.add_argument("--days", type=int, default=90, help="Days of history to spread transfers over")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=datetime.now(timezone.utc).date(), help="Day after the last generated transfer (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed; the same seed and end date reproduce the same data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes building rows; 1 builds in-process")
+    parser.add_argument("--chunk-size", type=int, default=INSERT_CHUNK_SIZE, help="Rows per executemany call")
+    parser.add_argument("--no-wipe", action="store_true", help="Keep existing rows (fails on clashing demo emails)")
+    args = parser.parse_args(argv)
+    if args.users < 1 or args.days < 1 or args.chunk_size < 1 or args.transfers_per_user < 0:
+        parser.error("--users, --days and --chunk-size must be positive and --transfers-per-user not negative")
+    return args
 
-async def seed_database():
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    options = SeedOptions(
+        users=args.users,
+        transfers_per_user=args.transfers_per_user,
+        days=args.days,
+        end=datetime.combine(args.end_date, datetime.min.time()),
+        seed=args.seed,
+        # One bcrypt hash shared by every user; hashing per user would dominate the run
+        hashed_password=get_password_hash(DEMO_PASSWORD),
+    )
     print("Connecting to database...")
-    async with SessionLocal() as session:
-        print("WARNING: Wiping existing database records...")
-        await session.execute(text("DELETE FROM cards"))
-        await session.execute(text("DELETE FROM transactions"))
-        await session.execute(text("DELETE FROM accounts"))
-        await session.execute(text("DELETE FROM users"))
-        await session.commit()
-        print("Database wiped successfully.")
-
-        print("Seeding 5 Complex Users...")
-        users = []
-        names = ["karan", "lava", "alice", "bob", "charlie"]
-        for name in names:
-            user = User(
-                id=uuid.uuid4(),
-                email=f"{name}@example.com",
-                hashed_password=get_password_hash("securepassword123"),
-                is_active=True
-            )
-            users.append(user)
-        session.add_all(users)
-        await session.flush()
-
-        print("Seeding Accounts (Checking & Savings)...")
-        accounts = []
-        for user in users:
-            # Everyone gets a checking account with $10,000 to $50,000
-            checking = Account(
-                id=uuid.uuid4(),
-                user_id=user.id,
-                account_number=f"100{random.randint(1000000, 9999999)}",
-                currency="USD",
-                balance=random.randint(1000000, 5000000) 
-            )
-            accounts.append(checking)
-            
-            # Everyone gets a savings account with $5,000 to $20,000
-            savings = Account(
-                id=uuid.uuid4(),
-                user_id=user.id,
-                account_number=f"200{random.randint(1000000, 9999999)}",
-                currency="USD",
-                balance=random.randint(500000, 2000000)
-            )
-            accounts.append(savings)
-        session.add_all(accounts)
-        await session.flush()
-
-        print("Seeding Complex Transaction Matrix...")
-        transactions = []
-        # Generate 20 random cross-account transfers
-        for _ in range(20):
-            sender_acc = random.choice(accounts)
-            receiver_acc = random.choice([a for a in accounts if a.id != sender_acc.id])
-            transfer_amount = random.randint(1000, 50000) # $10.00 to $500.00
-
-            tx_out = Transaction(account_id=sender_acc.id, related_account_id=receiver_acc.id, amount=transfer_amount, type="transfer_out")
-            tx_in = Transaction(account_id=receiver_acc.id, related_account_id=sender_acc.id, amount=transfer_amount, type="transfer_in")
-            transactions.extend([tx_out, tx_in])
-        session.add_all(transactions)
-        await session.flush()
-
-        print("Seeding Dynamically Generated Debit Cards...")
-        cards = []
-        for account in accounts:
-            # We will attach a debit card to every CHECKING account (which start with '100')
-            if account.account_number.startswith("100"):
-                c_num, cvc, exp = generate_card()
-                card = Card(
-                    id=uuid.uuid4(),
-                    account_id=account.id,
-                    card_number=c_num,
-                    cvc=cvc,
-                    expiry=exp
-                )
-                cards.append(card)
-                
-                # Randomly give half of the checking accounts a SECOND supplementary card
-                if random.choice([True, False]):
-                    c_num2, cvc2, exp2 = generate_card()
-                    card2 = Card(
-                        id=uuid.uuid4(),
-                        account_id=account.id,
-                        card_number=c_num2,
-                        cvc=cvc2,
-                        expiry=exp2
-                    )
-                    cards.append(card2)
-        session.add_all(cards)
-
-        await session.commit()
-        print(f"✅ Database successfully seeded with {len(users)} Users, {len(accounts)} Accounts, {len(transactions)//2} distinct Transfers, and {len(cards)} Cards.")
-
-    await engine.dispose()
+    counts = asyncio.run(seed_database(options, workers=max(1, args.workers), chunk_size=args.chunk_size, wipe=not args.no_wipe))
+    transfers = (counts["transactions"] - counts["accounts"]) // 2
+    print(f"✅ Database successfully seeded with {counts['users']} Users, {counts['accounts']} Accounts, {transfers} distinct Transfers, and {counts['cards']} Cards.")
 
 if __name__ == "__main__":
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(seed_database())
+    main()
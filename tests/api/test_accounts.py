@@ -1,4 +1,5 @@
 import pytest
+import uuid
 
 @pytest.mark.asyncio
 async def test_create_and_get_account(client):
@@ -31,3 +32,71 @@ async def test_get_account_unauthorized(client):
     get_res = await client.get(f"/accounts/{random_id}", headers=headers)
     # Should be 404 since it doesn't exist, if it existed but belonged to someone else it would be 403
     assert get_res.status_code == 404
+
+@pytest.mark.asyncio
+async def test_balance_history(client):
+    await client.post("/auth/signup", json={"email": "history_api@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "history_api@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers)).json()["id"]
+
+    res = await client.get(f"/accounts/{acc_id}/balance-history", headers=headers, params={"interval": "week"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["interval"] == "week"
+    assert body["points"] and all(p["balance"] == 0 for p in body["points"])
+
+    bad = await client.get(
+        f"/accounts/{acc_id}/balance-history", headers=headers, params={"from": "2026-02-01", "to": "2026-01-01"}
+    )
+    assert bad.status_code == 400
+
+@pytest.mark.asyncio
+async def test_account_polls_served_from_cache(client, query_counter):
+    await client.post("/auth/signup", json={"email": "acc_poll@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "acc_poll@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers)).json()["id"]
+
+    # Warm the principal and account-list caches
+    assert len((await client.get("/accounts/me", headers=headers)).json()) == 1
+
+    query_counter.reset()
+    me = await client.get("/accounts/me", headers=headers)
+    single = await client.get(f"/accounts/{acc_id}", headers=headers)
+    assert me.json()[0]["id"] == acc_id
+    assert single.json()["balance"] == 0
+    assert query_counter.count == 0
+
+    stats = (await client.get("/health/caches")).json()
+    assert stats["accounts"]["hits"] >= 2
+
+@pytest.mark.asyncio
+async def test_account_routes_share_ownership_checks(client):
+    await client.post("/auth/signup", json={"email": "owner_check@test.com", "password": "pw"})
+    owner_login = await client.post("/auth/login", data={"username": "owner_check@test.com", "password": "pw"})
+    owner_headers = {"Authorization": f"Bearer {owner_login.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=owner_headers)).json()["id"]
+    card_res = await client.post("/cards/", headers=owner_headers, json={"account_id": acc_id})
+    assert card_res.status_code == 201
+
+    await client.post("/auth/signup", json={"email": "intruder_check@test.com", "password": "pw"})
+    intruder_login = await client.post("/auth/login", data={"username": "intruder_check@test.com", "password": "pw"})
+    intruder_headers = {"Authorization": f"Bearer {intruder_login.json()['access_token']}"}
+
+    for path, detail in [
+        (f"/accounts/{acc_id}", "Not authorized to access this account"),
+        (f"/accounts/{acc_id}/balance-history", "Not authorized to access this account"),
+        (f"/accounts/{acc_id}/transactions/", "Not authorized to view transactions for this account"),
+        (f"/accounts/{acc_id}/statement/", "Not authorized to view statement for this account"),
+    ]:
+        res = await client.get(path, headers=intruder_headers)
+        assert res.status_code == 403
+        assert res.json()["detail"] == detail
+    assert (await client.get(f"/accounts/{uuid.uuid4()}/statement/", headers=intruder_headers)).status_code == 404
+
+    intruder_card = await client.post("/cards/", headers=intruder_headers, json={"account_id": acc_id})
+    assert intruder_card.status_code == 403
+    # The cards listing joins through accounts, so only the owner sees the card
+    assert (await client.get("/cards/", headers=intruder_headers)).json() == []
+    assert [card["id"] for card in (await client.get("/cards/", headers=owner_headers)).json()] == [card_res.json()["id"]]
@@ -1,4 +1,5 @@
 import pytest
+import uuid
 
 @pytest.mark.asyncio
 async def test_create_and_get_cards(client):
@@ -29,3 +30,57 @@ async def test_create_card_invalid_account(client):
     import uuid
     card_res = await client.post("/cards/", headers=headers, json={"account_id": str(uuid.uuid4())})
     assert card_res.status_code == 404
+
+@pytest.mark.asyncio
+async def test_authorize_and_capture_issued_card(client, session, session_factory, monkeypatch):
+    from app.core.config import get_settings
+    from app.services.card_authorization import card_authorizations
+    monkeypatch.setattr(card_authorizations, "session_factory", session_factory)
+    monkeypatch.setattr(get_settings(), "merchant_api_keys", {"shop-key": "shop", "rival-key": "rival"})
+    merchant = {"X-API-Key": "shop-key"}
+    rival = {"X-API-Key": "rival-key"}
+
+    await client.post("/auth/signup", json={"email": "card_auth@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "card_auth@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+    card = (await client.post("/cards/", headers=headers, json={"account_id": acc_id})).json()
+
+    # New accounts start empty, so any amount is declined
+    payload = {"card_number": card["card_number"], "cvc": card["cvc"], "expiry": card["expiry"], "amount": 500}
+    assert (await client.post("/cards/authorize", json=payload)).status_code == 401
+    assert (await client.post("/cards/authorize", json=payload, headers={"X-API-Key": "nope"})).status_code == 401
+    declined = await client.post("/cards/authorize", json=payload, headers=merchant)
+    assert declined.status_code == 200
+    assert declined.json() == {"approved": False, "hold_id": None, "reason": "insufficient_funds"}
+
+    assert (await client.post("/cards/authorize", json={**payload, "amount": 0}, headers=merchant)).status_code == 422
+
+    from app.models.account import Account
+    account = await session.get(Account, uuid.UUID(acc_id))
+    account.balance = 10000
+    await session.commit()
+
+    approved = await client.post("/cards/authorize", json=payload, headers=merchant)
+    assert approved.json()["approved"] is True
+    hold_id = approved.json()["hold_id"]
+
+    capture_body = {"captures": [{"hold_id": hold_id, "amount": 300}]}
+    assert (await client.post("/cards/holds/capture", json=capture_body)).status_code == 401
+    # Another merchant cannot settle this hold, or even learn that it exists
+    stolen = await client.post("/cards/holds/capture", json=capture_body, headers=rival)
+    assert stolen.json()["results"][0]["detail"] == "Hold not found or already settled"
+    assert (await client.post("/cards/holds/release", json={"hold_ids": [hold_id]}, headers=rival)).json()["failed"] == 1
+
+    capture_res = await client.post("/cards/holds/capture", json=capture_body, headers=merchant)
+    assert capture_res.status_code == 200
+    assert capture_res.json()["settled"] == 1
+    assert capture_res.json()["results"][0] == {"index": 0, "hold_id": hold_id, "status": "captured", "detail": None}
+
+    balance_res = await client.get(f"/accounts/{acc_id}", headers=headers)
+    assert balance_res.json()["balance"] == 9700
+
+    release_res = await client.post("/cards/holds/release", json={"hold_ids": [hold_id, str(uuid.uuid4())]}, headers=merchant)
+    assert release_res.status_code == 200
+    # The hold was closed by its capture
+    assert release_res.json()["failed"] == 2
@@ -0,0 +1,40 @@
+import pytest
+from app.core.metrics import http_request_db_queries, http_request_duration, transfers_total
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_queries_and_transfers(client):
+    await client.post("/auth/signup", json={"email": "metrics@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "metrics@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers)).json()["id"]
+
+    await client.post("/auth/signup", json={"email": "metrics_payee@test.com", "password": "pw"})
+    payee_login = await client.post("/auth/login", data={"username": "metrics_payee@test.com", "password": "pw"})
+    await client.post("/accounts/", headers={"Authorization": f"Bearer {payee_login.json()['access_token']}"})
+
+    route = "/accounts/{account_id}/transactions/"
+    requests_before = http_request_duration.count(method="GET", route=route, status="200")
+    queries_before = http_request_db_queries.sum(method="GET", route=route)
+    rejected_before = transfers_total.value(outcome="failure", reason="insufficient_funds")
+
+    tx_res = await client.get(f"/accounts/{acc_id}/transactions/", headers=headers)
+    assert tx_res.status_code == 200
+    # At least the page query ran before the response started
+    timing = tx_res.headers["server-timing"]
+    assert timing.startswith("db;dur=") and "app;dur=" in timing
+    assert int(timing.split('desc="')[1].split(" ")[0]) >= 1
+    transfer_res = await client.post("/transfers/", headers=headers, json={
+        "from_account_id": acc_id, "to_identifier": "metrics_payee@test.com", "amount": 500
+    })
+    assert transfer_res.status_code == 400
+
+    # Labelled by template, not by the concrete account id
+    assert http_request_duration.count(method="GET", route=route, status="200") == requests_before + 1
+    assert http_request_db_queries.sum(method="GET", route=route) > queries_before
+    assert transfers_total.value(outcome="failure", reason="insufficient_funds") == rejected_before + 1
+
+    res = await client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert f'http_request_duration_seconds_count{{method="GET",route="{route}",status="200"}}' in res.text
+    assert 'http_requests_in_flight{method="GET"} 1' in res.text
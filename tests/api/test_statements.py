@@ -27,3 +27,57 @@ async def test_get_statement_unauthorized(client):
     import uuid
     stmt_res = await client.get(f"/accounts/{uuid.uuid4()}/statement/", headers=headers)
     assert stmt_res.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_statement_invalid_period(client):
+    await client.post("/auth/signup", json={"email": "stmt_period@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "stmt_period@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+
+    ok = await client.get(f"/accounts/{acc_id}/statement/", headers=headers, params={"from": "2026-01-01T00:00:00Z", "to": "2026-02-01T00:00:00Z"})
+    assert ok.status_code == 200
+    assert ok.json()["transaction_count"] == 0
+
+    backwards = await client.get(f"/accounts/{acc_id}/statement/", headers=headers, params={"from": "2026-02-01", "to": "2026-01-01"})
+    assert backwards.status_code == 400
+
+@pytest.mark.asyncio
+async def test_export_statement_csv_and_ndjson(client, session):
+    import csv
+    import io
+    import json
+    import uuid
+    from datetime import datetime
+    from app.models.transaction import Transaction
+
+    await client.post("/auth/signup", json={"email": "stmt_export@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "stmt_export@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+
+    session.add_all([
+        Transaction(account_id=uuid.UUID(acc_id), amount=500, type="credit", timestamp=datetime(2026, 1, 5)),
+        Transaction(account_id=uuid.UUID(acc_id), amount=-200, type="transfer_out", timestamp=datetime(2026, 2, 5)),
+        Transaction(account_id=uuid.UUID(acc_id), amount=300, type="credit", timestamp=datetime(2026, 3, 5)),
+    ])
+    await session.commit()
+
+    csv_res = await client.get(f"/accounts/{acc_id}/statement/export", headers=headers)
+    assert csv_res.status_code == 200
+    assert csv_res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(csv_res.text)))
+    # Oldest first
+    assert [int(r["amount"]) for r in rows] == [500, -200, 300]
+
+    ndjson_res = await client.get(
+        f"/accounts/{acc_id}/statement/export",
+        headers=headers,
+        params={"format": "ndjson", "from": "2026-02-01T00:00:00Z", "to": "2026-04-01T00:00:00Z"}
+    )
+    assert ndjson_res.status_code == 200
+    lines = [json.loads(line) for line in ndjson_res.text.splitlines()]
+    assert [(l["type"], l["amount"]) for l in lines] == [("transfer_out", -200), ("credit", 300)]
+
+    bad_format = await client.get(f"/accounts/{acc_id}/statement/export", headers=headers, params={"format": "xml"})
+    assert bad_format.status_code == 422
@@ -41,3 +41,86 @@ async def test_get_transactions_unauthorized(client):
     import uuid
     tx_res = await client.get(f"/accounts/{uuid.uuid4()}/transactions/", headers=headers)
     assert tx_res.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_transactions_invalid_cursor(client):
+    await client.post("/auth/signup", json={"email": "tx_cursor@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "tx_cursor@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+    acc_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+
+    tx_res = await client.get(f"/accounts/{acc_id}/transactions/", headers=headers, params={"after": "garbage"})
+    assert tx_res.status_code == 400
+    assert "X-Next-Cursor" not in tx_res.headers
+
+@pytest.mark.asyncio
+async def test_get_transactions_constant_query_count(client, session, query_counter):
+    import uuid
+    from app.models.account import Account
+    from app.services.account_service import counterparty_cache
+
+    await client.post("/auth/signup", json={"email": "tx_hub@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "tx_hub@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    hub_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+
+    account = await session.get(Account, uuid.UUID(hub_id))
+    account.balance = 10000
+    await session.commit()
+
+    # Several distinct counterparties, each of which used to cost two queries per row
+    for i in range(4):
+        email = f"tx_spoke{i}@test.com"
+        await client.post("/auth/signup", json={"email": email, "password": "pw"})
+        login = await client.post("/auth/login", data={"username": email, "password": "pw"})
+        await client.post("/accounts/", headers={"Authorization": f"Bearer {login.json()['access_token']}"})
+        await client.post("/transfers/", headers=headers, json={
+            "from_account_id": hub_id, "to_identifier": email, "amount": 100
+        })
+
+    counterparty_cache.clear()
+    query_counter.reset()
+    cold = await client.get(f"/accounts/{hub_id}/transactions/", headers=headers)
+    cold_queries = query_counter.count
+
+    query_counter.reset()
+    warm = await client.get(f"/accounts/{hub_id}/transactions/", headers=headers)
+    warm_queries = query_counter.count
+
+    assert len(cold.json()) == 4
+    assert {tx["counterparty_name"] for tx in cold.json()} == {f"tx_spoke{i}@test.com" for i in range(4)}
+    assert warm.json() == cold.json()
+
+    # Principal lookup + ownership check + page + one counterparty join
+    assert cold_queries <= 4
+    # Repeat reads only run the page query: the account and the counterparties are cached
+    assert warm_queries == 1
+
+@pytest.mark.asyncio
+async def test_get_transactions_negotiates_msgpack(client, session):
+    msgpack = pytest.importorskip("msgpack")
+    import uuid
+    from app.models.transaction import Transaction
+
+    await client.post("/auth/signup", json={"email": "tx_pack@test.com", "password": "pw"})
+    login_res = await client.post("/auth/login", data={"username": "tx_pack@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+    acc_id = (await client.post("/accounts/", headers=headers)).json()["id"]
+
+    for amount in (500, -200, 300):
+        session.add(Transaction(account_id=uuid.UUID(acc_id), amount=amount, type="deposit" if amount > 0 else "withdrawal"))
+    await session.commit()
+
+    as_json = await client.get(f"/accounts/{acc_id}/transactions/", headers=headers, params={"limit": 2})
+    as_msgpack = await client.get(
+        f"/accounts/{acc_id}/transactions/", headers={**headers, "Accept": "application/x-msgpack"}, params={"limit": 2}
+    )
+
+    assert as_json.headers["content-type"] == "application/json"
+    assert as_msgpack.headers["content-type"] == "application/x-msgpack"
+    assert as_msgpack.headers["vary"] == "Accept"
+    # Same rows and the same cursor header, whichever encoding was asked for
+    assert len(as_json.json()) == 2
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+    assert as_msgpack.headers["X-Next-Cursor"] == as_json.headers["X-Next-Cursor"]
@@ -91,3 +91,227 @@ async def test_transfer_insufficient_funds_integration(client):
     
     assert transfer_res.status_code == 400
     assert "Insufficient Funds" in transfer_res.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_transfer_batch_best_effort_and_all_or_nothing(client, session):
+    from app.models.account import Account
+
+    await client.post("/auth/signup", json={"email": "payroll@test.com", "password": "pw"})
+    login1 = await client.post("/auth/login", data={"username": "payroll@test.com", "password": "pw"})
+    headers1 = {"Authorization": f"Bearer {login1.json()['access_token']}"}
+    acc1_id = (await client.post("/accounts/", headers=headers1, params={"currency": "USD"})).json()["id"]
+
+    await client.post("/auth/signup", json={"email": "payee@test.com", "password": "pw"})
+    login2 = await client.post("/auth/login", data={"username": "payee@test.com", "password": "pw"})
+    headers2 = {"Authorization": f"Bearer {login2.json()['access_token']}"}
+    acc2_id = (await client.post("/accounts/", headers=headers2, params={"currency": "USD"})).json()["id"]
+
+    # Fund the payroll account directly; there is no deposit endpoint
+    import uuid
+    account = await session.get(Account, uuid.UUID(acc1_id))
+    account.balance = 1000
+    await session.commit()
+
+    legs = [
+        {"from_account_id": acc1_id, "to_identifier": "payee@test.com", "amount": 300},
+        {"from_account_id": acc1_id, "to_identifier": acc2_id, "amount": 5000},
+        {"from_account_id": acc2_id, "to_identifier": acc1_id, "amount": 1},
+        {"from_account_id": acc1_id, "to_identifier": "nobody@vacuum.com", "amount": 1},
+    ]
+
+    # all_or_nothing: any bad leg means nothing is applied
+    res = await client.post("/transfers/batch", headers=headers1, json={"mode": "all_or_nothing", "legs": legs})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["committed"] is False
+    assert body["applied"] == 0
+    assert [r["status"] for r in body["results"]][2:] == ["failed", "failed"]
+
+    # best_effort: the good leg goes through, bad legs are reported individually
+    res = await client.post("/transfers/batch", headers=headers1, json={"mode": "best_effort", "legs": legs})
+    body = res.json()
+    assert body["committed"] is True
+    assert body["applied"] == 1
+    statuses = [(r["status"], r["detail"]) for r in body["results"]]
+    assert statuses[0] == ("applied", None)
+    assert statuses[1] == ("failed", "Insufficient Funds")
+    assert statuses[2] == ("failed", "Not authorized to transfer from this account")
+    assert statuses[3] == ("failed", "Destination user not found via email")
+
+    # The test client shares one session across requests; drop the instance funded above
+    session.expire_all()
+    balance1 = (await client.get(f"/accounts/{acc1_id}", headers=headers1)).json()["balance"]
+    balance2 = (await client.get(f"/accounts/{acc2_id}", headers=headers2)).json()["balance"]
+    assert balance1 == 700
+    assert balance2 == 300
+
+@pytest.mark.asyncio
+async def test_transfer_idempotency_key_replays_response(client, session):
+    from app.models.account import Account
+    import uuid
+
+    await client.post("/auth/signup", json={"email": "retry_sender@test.com", "password": "pw"})
+    login1 = await client.post("/auth/login", data={"username": "retry_sender@test.com", "password": "pw"})
+    headers1 = {"Authorization": f"Bearer {login1.json()['access_token']}"}
+    acc1_id = (await client.post("/accounts/", headers=headers1, params={"currency": "USD"})).json()["id"]
+
+    await client.post("/auth/signup", json={"email": "retry_receiver@test.com", "password": "pw"})
+    login2 = await client.post("/auth/login", data={"username": "retry_receiver@test.com", "password": "pw"})
+    headers2 = {"Authorization": f"Bearer {login2.json()['access_token']}"}
+    await client.post("/accounts/", headers=headers2, params={"currency": "USD"})
+
+    account = await session.get(Account, uuid.UUID(acc1_id))
+    account.balance = 1000
+    await session.commit()
+
+    payload = {"from_account_id": acc1_id, "to_identifier": "retry_receiver@test.com", "amount": 400}
+    retry_headers = dict(headers1, **{"Idempotency-Key": "payout-42"})
+
+    first = await client.post("/transfers/", headers=retry_headers, json=payload)
+    second = await client.post("/transfers/", headers=retry_headers, json=payload)
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers.get("Idempotent-Replayed") == "true"
+
+    # Only the first request moved money
+    session.expire_all()
+    balance = (await client.get(f"/accounts/{acc1_id}", headers=headers1)).json()["balance"]
+    assert balance == 600
+
+    # Same key, different body
+    mismatch = await client.post("/transfers/", headers=retry_headers, json=dict(payload, amount=1))
+    assert mismatch.status_code == 422
+
+@pytest.mark.asyncio
+async def test_async_transfer_accepted_and_processed(client, session, session_factory):
+    from app.models.account import Account
+    from app.services.transfer_worker import TransferWorkerPool
+    import uuid
+
+    await client.post("/auth/signup", json={"email": "async_sender@test.com", "password": "pw"})
+    login1 = await client.post("/auth/login", data={"username": "async_sender@test.com", "password": "pw"})
+    headers1 = {"Authorization": f"Bearer {login1.json()['access_token']}"}
+    acc1_id = (await client.post("/accounts/", headers=headers1, params={"currency": "USD"})).json()["id"]
+
+    await client.post("/auth/signup", json={"email": "async_receiver@test.com", "password": "pw"})
+    login2 = await client.post("/auth/login", data={"username": "async_receiver@test.com", "password": "pw"})
+    headers2 = {"Authorization": f"Bearer {login2.json()['access_token']}"}
+    await client.post("/accounts/", headers=headers2, params={"currency": "USD"})
+
+    account = await session.get(Account, uuid.UUID(acc1_id))
+    account.balance = 1000
+    await session.commit()
+
+    ok = await client.post("/transfers/async", headers=headers1, json={
+        "from_account_id": acc1_id, "to_identifier": "async_receiver@test.com", "amount": 600
+    })
+    too_much = await client.post("/transfers/async", headers=headers1, json={
+        "from_account_id": acc1_id, "to_identifier": "async_receiver@test.com", "amount": 600
+    })
+    assert ok.status_code == 202
+    assert ok.json()["status"] == "Transfer Initiated"
+
+    ok_id = ok.json()["transfer_id"]
+    pending = await client.get(f"/transfers/{ok_id}", headers=headers1)
+    assert pending.json()["status"] == "pending"
+
+    # Other users cannot poll someone else's transfer
+    assert (await client.get(f"/transfers/{ok_id}", headers=headers2)).status_code == 403
+
+    workers = TransferWorkerPool(session_factory=session_factory)
+    assert await workers.run_until_empty() == 2
+
+    session.expire_all()
+    done = (await client.get(f"/transfers/{ok_id}", headers=headers1)).json()
+    assert done["status"] == "completed"
+    assert done["attempts"] == 1
+
+    rejected = (await client.get(f"/transfers/{too_much.json()['transfer_id']}", headers=headers1)).json()
+    assert rejected["status"] == "failed"
+    assert rejected["last_error"] == "Insufficient Funds"
+
+@pytest.mark.asyncio
+async def test_concurrent_credits_to_hot_account_skip_its_lock(client, session, session_factory):
+    from app.db.session import get_db
+    from app.main import app
+    from app.models.account import Account
+    from app.services.account_locks import account_locks
+    from app.services.balance_shards import BalanceShardService
+    import asyncio
+    import uuid
+
+    await client.post("/auth/signup", json={"email": "hot_merchant@test.com", "password": "pw"})
+    login = await client.post("/auth/login", data={"username": "hot_merchant@test.com", "password": "pw"})
+    merchant_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    merchant_id = (await client.post("/accounts/", headers=merchant_headers, params={"currency": "USD"})).json()["id"]
+    await BalanceShardService.set_shard_count(session, uuid.UUID(merchant_id), 4)
+
+    payers = []
+    for i in range(6):
+        await client.post("/auth/signup", json={"email": f"hot_payer{i}@test.com", "password": "pw"})
+        login = await client.post("/auth/login", data={"username": f"hot_payer{i}@test.com", "password": "pw"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        account_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+        account = await session.get(Account, uuid.UUID(account_id))
+        account.balance = 1000
+        payers.append((headers, account_id))
+    await session.commit()
+
+    # Concurrent requests cannot share the fixture's session; give each its own
+    async def session_per_request():
+        async with session_factory() as request_session:
+            yield request_session
+    app.dependency_overrides[get_db] = session_per_request
+
+    responses = await asyncio.gather(*(
+        client.post("/transfers/", headers=headers, json={"from_account_id": account_id, "to_identifier": merchant_id, "amount": 250})
+        for headers, account_id in payers
+    ))
+    assert [r.status_code for r in responses] == [200] * len(payers)
+    # Senders are all different, so nothing queued; in particular not on the merchant
+    assert merchant_id not in account_locks.stats()["accounts"]
+
+    session.expire_all()
+    merchant = await session.get(Account, uuid.UUID(merchant_id))
+    assert (merchant.balance, merchant.total_balance) == (0, 250 * len(payers))
+
+    # Fold the shards so no other test's compaction picks this account up
+    assert await BalanceShardService.compact(session, [merchant.id]) == 1
+
+@pytest.mark.asyncio
+async def test_transfers_share_a_group_commit_when_enabled(client, session, session_factory, monkeypatch):
+    from app.db.session import get_db
+    from app.main import app
+    from app.models.account import Account
+    from app.services.group_commit import transfer_group_commit
+    import asyncio
+    import uuid
+
+    await client.post("/auth/signup", json={"email": "grouped_sender@test.com", "password": "pw"})
+    login = await client.post("/auth/login", data={"username": "grouped_sender@test.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    sender_id = (await client.post("/accounts/", headers=headers, params={"currency": "USD"})).json()["id"]
+    await client.post("/auth/signup", json={"email": "grouped_receiver@test.com", "password": "pw"})
+    login = await client.post("/auth/login", data={"username": "grouped_receiver@test.com", "password": "pw"})
+    await client.post("/accounts/", headers={"Authorization": f"Bearer {login.json()['access_token']}"}, params={"currency": "USD"})
+
+    account = await session.get(Account, uuid.UUID(sender_id))
+    account.balance = 1000
+    await session.commit()
+
+    monkeypatch.setattr(transfer_group_commit, "session_factory", session_factory)
+    monkeypatch.setattr(transfer_group_commit, "window", 0.05)
+    batches_before = transfer_group_commit.stats()["batches_committed"]
+
+    async def session_per_request():
+        async with session_factory() as request_session:
+            yield request_session
+    app.dependency_overrides[get_db] = session_per_request
+
+    payload = {"from_account_id": sender_id, "to_identifier": "grouped_receiver@test.com", "amount": 400}
+    responses = await asyncio.gather(*(client.post("/transfers/", headers=headers, json=payload) for _ in range(3)))
+
+    assert sorted(r.status_code for r in responses) == [200, 200, 400]
+    assert [r.json()["detail"] for r in responses if r.status_code == 400] == ["Insufficient Funds"]
+    assert transfer_group_commit.stats()["batches_committed"] == batches_before + 1
@@ -1,11 +1,14 @@
 import pytest_asyncio
 import pytest
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_db
+from app.db.instrumentation import instrument_engine
+from app.api.deps import get_read_db
 
 # Use an in-memory SQLite database for test isolation
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -16,6 +19,9 @@ engine = create_async_engine(
     connect_args={"check_same_thread": False}
 )
 
+# Per-request query counts are attributed the same way as on the app's engines
+instrument_engine(engine, "test")
+
 TestingSessionLocal = async_sessionmaker(
     bind=engine,
     autocommit=False,
@@ -40,6 +46,29 @@ async def session() -> AsyncSession:
     async with TestingSessionLocal() as session:
         yield session
 
+@pytest.fixture
+def session_factory():
+    # For components that open their own sessions (e.g. background engines)
+    return TestingSessionLocal
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+@pytest.fixture
+def query_counter():
+    # Counts SQL statements sent to the test database while the fixture is active
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter)
+
 @pytest_asyncio.fixture
 async def client(session: AsyncSession):
     # Override the app dependency to inject the isolated test session
@@ -47,6 +76,8 @@ async def client(session: AsyncSession):
         yield session
         
     app.dependency_overrides[get_db] = override_get_db
+    # Reads share the same session; the in-memory database has no separate read pool
+    app.dependency_overrides[get_read_db] = override_get_db
     
     # We use ASGITransport from httpx for FastAPI 0.112+ async testing
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import select
+from app.models.account import Account
+from app.models.user import User
+from app.services.account_cache import AccountCache, account_cache, user_accounts_cache
+from app.services.transfer_service import TransferService
+
+async def _make_user(session, email):
+    user = User(email=email, hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+@pytest.mark.asyncio
+async def test_insert_writes_snapshot_on_commit(session):
+    user = await _make_user(session, "cache_insert@test.com")
+    acc = Account(user_id=user.id, account_number="ac1", currency="EUR", balance=0)
+    session.add(acc)
+    await session.flush()
+    # Nothing is visible before the commit
+    assert AccountCache.get(acc.id) is None
+
+    await session.commit()
+    snapshot = AccountCache.get(acc.id)
+    assert snapshot.currency == "EUR"
+    assert snapshot.user_id == user.id
+
+@pytest.mark.asyncio
+async def test_transfers_write_through_and_rollbacks_do_not(session):
+    user = await _make_user(session, "cache_transfer@test.com")
+    acc1 = Account(user_id=user.id, account_number="ac2", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="ac3", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+    acc1_id, acc2_id = acc1.id, acc2.id
+
+    await TransferService.transfer_funds(acc1_id, acc2_id, 300, session)
+    assert AccountCache.get(acc1_id).balance == 700
+    assert AccountCache.get(acc2_id).balance == 300
+
+    # all_or_nothing batch rolls back: the cache keeps the committed balances
+    outcomes = await TransferService.transfer_funds_batch(
+        [(acc1_id, acc2_id, 100), (acc1_id, acc2_id, 100000)], session, atomic=True
+    )
+    assert outcomes[1] is not None
+    assert AccountCache.get(acc1_id).balance == 700
+
+    await TransferService.transfer_funds_batch([(acc1_id, acc2_id, 100), (acc2_id, acc1_id, 50)], session)
+    assert AccountCache.get(acc1_id).balance == 650
+    assert AccountCache.get(acc2_id).balance == 350
+
+@pytest.mark.asyncio
+async def test_orm_update_invalidates_account_and_owner_list(session):
+    user = await _make_user(session, "cache_update@test.com")
+    acc = Account(user_id=user.id, account_number="ac4", currency="USD", balance=0)
+    session.add(acc)
+    await session.commit()
+
+    AccountCache.store_for_user(user.id, [acc], AccountCache.generation())
+    assert AccountCache.get_for_user(user.id)[0].id == acc.id
+
+    acc.balance = 500
+    await session.commit()
+    assert acc.id not in account_cache
+    assert user.id not in user_accounts_cache
+
+@pytest.mark.asyncio
+async def test_read_racing_a_write_is_not_cached(session):
+    user = await _make_user(session, "cache_race@test.com")
+    acc1 = Account(user_id=user.id, account_number="ac5", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="ac6", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+    account_cache.invalidate(acc1.id)
+
+    # A reader captured the generation and loaded the row, then a transfer committed
+    generation = AccountCache.generation()
+    loaded = (await session.execute(select(Account).where(Account.id == acc1.id))).scalar_one()
+    await TransferService.transfer_funds(acc1.id, acc2.id, 100, session)
+
+    AccountCache.store([loaded], generation)
+    assert acc1.id not in account_cache
+
+@pytest.mark.asyncio
+async def test_owned_account_ids_are_cached_until_an_account_is_added(session, query_counter):
+    from app.api.deps import load_owned_account_ids
+
+    user = await _make_user(session, "cache_owned@test.com")
+    acc1 = Account(user_id=user.id, account_number="ac7", currency="USD", balance=0)
+    session.add(acc1)
+    await session.commit()
+    user_id, acc1_id = user.id, acc1.id
+
+    query_counter.reset()
+    assert await load_owned_account_ids(session, user_id) == {acc1_id}
+    assert await load_owned_account_ids(session, user_id) == {acc1_id}
+    assert query_counter.count == 1
+
+    acc2 = Account(user_id=user_id, account_number="ac8", currency="USD", balance=0)
+    session.add(acc2)
+    await session.commit()
+    assert await load_owned_account_ids(session, user_id) == {acc1_id, acc2.id}
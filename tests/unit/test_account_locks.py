@@ -0,0 +1,70 @@
+import asyncio
+import uuid
+import pytest
+from app.services.account_locks import AccountLockManager
+from app.models.account import Account
+from app.models.user import User
+
+@pytest.mark.asyncio
+async def test_concurrent_debits_do_not_lose_updates(session, session_factory):
+    user = User(email="locks@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="lk1", currency="USD", balance=100)
+    acc2 = Account(user_id=user.id, account_number="lk2", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    manager = AccountLockManager()
+
+    async def debit():
+        async with session_factory() as s:
+            return await manager.transfer_funds(acc1.id, acc2.id, 80, s)
+
+    results = await asyncio.gather(debit(), debit(), return_exceptions=True)
+
+    # Only one 80 debit fits into a balance of 100
+    assert results.count(True) == 1
+    assert any(isinstance(r, ValueError) and "Insufficient Funds" in str(r) for r in results)
+
+    await session.refresh(acc1)
+    await session.refresh(acc2)
+    assert acc1.balance == 20
+    assert acc2.balance == 80
+
+    stats = manager.stats()
+    assert stats["tracked_locks"] == 0
+    assert stats["contended_acquisitions"] >= 1
+    # The second transfer queues on whichever of the two locks sorts first
+    first = min(str(acc1.id), str(acc2.id))
+    assert stats["accounts"][first]["max_queue_depth"] >= 1
+
+@pytest.mark.asyncio
+async def test_unrelated_accounts_do_not_block():
+    manager = AccountLockManager()
+    a, b, c, d = (uuid.uuid4() for _ in range(4))
+
+    async def inner():
+        async with manager.acquire(c, d):
+            return manager.stats()["tracked_locks"]
+
+    async with manager.acquire(a, b):
+        # Would hang if disjoint accounts shared a lock
+        assert await asyncio.wait_for(inner(), timeout=1) == 4
+
+    assert manager.stats()["contended_acquisitions"] == 0
+    assert manager.stats()["tracked_locks"] == 0
+
+@pytest.mark.asyncio
+async def test_opposite_direction_transfers_do_not_deadlock():
+    manager = AccountLockManager()
+    a, b = uuid.uuid4(), uuid.uuid4()
+
+    async def hold(first, second):
+        async with manager.acquire(first, second):
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(asyncio.gather(hold(a, b), hold(b, a)), timeout=1)
+    assert manager.stats()["tracked_locks"] == 0
@@ -58,3 +58,105 @@ async def test_get_account_not_found(session):
     import uuid
     with pytest.raises(ValueError, match="Account not found"):
         await AccountService.get_account_balance(session, uuid.uuid4())
+
+@pytest.mark.asyncio
+async def test_get_transactions_cursor_pagination(session):
+    from datetime import datetime
+    from app.models.transaction import Transaction
+    user = User(email="cursor@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc = Account(user_id=user.id, account_number="776", currency="USD", balance=100)
+    session.add(acc)
+    await session.commit()
+    await session.refresh(acc)
+
+    # Two rows share a timestamp so the id tie-breaker is exercised
+    same_time = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(5):
+        ts = same_time if i < 2 else datetime(2026, 1, 1, 12, 0, i)
+        session.add(Transaction(account_id=acc.id, amount=i, type="deposit", timestamp=ts))
+    await session.commit()
+
+    seen = []
+    after = None
+    while True:
+        page = await AccountService.get_transactions(session, acc.id, limit=2, after=after)
+        seen.extend(tx.id for tx in page)
+        after = AccountService.next_cursor(page, 2)
+        if after is None:
+            break
+
+    everything = await AccountService.get_transactions(session, acc.id, limit=10)
+    assert seen == [tx.id for tx in everything]
+    assert len(seen) == 5
+
+@pytest.mark.asyncio
+async def test_get_transactions_invalid_cursor(session):
+    import uuid
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        await AccountService.get_transactions(session, uuid.uuid4(), after="not-a-cursor")
+
+@pytest.mark.asyncio
+async def test_counterparty_cache_invalidated_on_email_change(session):
+    from app.services.account_service import counterparty_cache
+    user = User(email="before@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc = Account(user_id=user.id, account_number="775", currency="USD", balance=0)
+    session.add(acc)
+    await session.commit()
+    await session.refresh(acc)
+
+    names = await AccountService.get_counterparty_names(session, [acc.id])
+    assert names[acc.id] == "before@test.com"
+    assert acc.id in counterparty_cache
+
+    user.email = "after@test.com"
+    await session.commit()
+    assert acc.id not in counterparty_cache
+
+    names = await AccountService.get_counterparty_names(session, [acc.id])
+    assert names[acc.id] == "after@test.com"
+
+@pytest.mark.asyncio
+async def test_get_period_summary(session):
+    from datetime import datetime
+    from app.models.transaction import Transaction
+    user = User(email="summary@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    # Opening balance 1000, then +500 (Jan), -200 (Feb), +300 (Feb), -100 (Mar) => 1500 today
+    acc = Account(user_id=user.id, account_number="774", currency="USD", balance=1500)
+    session.add(acc)
+    await session.commit()
+    await session.refresh(acc)
+
+    session.add_all([
+        Transaction(account_id=acc.id, amount=500, type="credit", timestamp=datetime(2026, 1, 15)),
+        Transaction(account_id=acc.id, amount=-200, type="transfer_out", timestamp=datetime(2026, 2, 3)),
+        Transaction(account_id=acc.id, amount=300, type="credit", timestamp=datetime(2026, 2, 20)),
+        Transaction(account_id=acc.id, amount=-100, type="transfer_out", timestamp=datetime(2026, 3, 1)),
+    ])
+    await session.commit()
+
+    february = await AccountService.get_period_summary(
+        session, acc.id, acc.balance, datetime(2026, 2, 1), datetime(2026, 3, 1)
+    )
+    assert february["starting_balance"] == 1500
+    assert february["ending_balance"] == 1600
+    assert february["total_credits"] == 300
+    assert february["total_debits"] == 200
+    assert february["transaction_count"] == 2
+    assert {t["type"]: t["count"] for t in february["totals_by_type"]} == {"credit": 1, "transfer_out": 1}
+
+    everything = await AccountService.get_period_summary(session, acc.id, acc.balance)
+    assert everything["starting_balance"] == 1000
+    assert everything["ending_balance"] == 1500
+    assert everything["transaction_count"] == 4
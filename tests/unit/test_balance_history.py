@@ -0,0 +1,101 @@
+import pytest
+from datetime import date, datetime, timezone
+from sqlalchemy import select
+from app.models.account import Account
+from app.models.daily_balance import DailyBalance
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.balance_history import BalanceHistoryService
+from app.services.transfer_service import TransferService
+
+async def _make_account(session, email, number, balance):
+    user = User(email=email, hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    acc = Account(user_id=user.id, account_number=number, currency="USD", balance=balance)
+    session.add(acc)
+    await session.commit()
+    await session.refresh(acc)
+    return acc
+
+@pytest.mark.asyncio
+async def test_transfer_maintains_checkpoints(session):
+    acc1 = await _make_account(session, "checkpoint1@test.com", "881", 1000)
+    acc2 = await _make_account(session, "checkpoint2@test.com", "882", 0)
+    # Captured up front: the failed transfer below rolls back and expires the instances
+    acc1_id, acc2_id = acc1.id, acc2.id
+
+    await TransferService.transfer_funds(acc1_id, acc2_id, 300, session)
+    await TransferService.transfer_funds(acc1_id, acc2_id, 200, session)
+
+    today = datetime.now(timezone.utc).date()
+    result = await session.execute(
+        select(DailyBalance.account_id, DailyBalance.closing_balance).where(DailyBalance.day == today)
+    )
+    closing = dict(result.all())
+    assert closing[acc1_id] == 500
+    assert closing[acc2_id] == 500
+
+    # A rejected transfer leaves the checkpoints alone
+    with pytest.raises(ValueError, match="Insufficient Funds"):
+        await TransferService.transfer_funds(acc1_id, acc2_id, 10000, session)
+    assert await session.scalar(
+        select(DailyBalance.closing_balance).where(DailyBalance.account_id == acc1_id, DailyBalance.day == today)
+    ) == 500
+
+@pytest.mark.asyncio
+async def test_backfill_and_history(session):
+    # Opening balance 1000, then +500 (Jan 15), -200 and +300 (Feb 3), -100 (Mar 1) => 1500 today
+    acc = await _make_account(session, "history@test.com", "883", 1500)
+    session.add_all([
+        Transaction(account_id=acc.id, amount=500, type="credit", timestamp=datetime(2026, 1, 15, 9)),
+        Transaction(account_id=acc.id, amount=-200, type="transfer_out", timestamp=datetime(2026, 2, 3, 8)),
+        Transaction(account_id=acc.id, amount=300, type="credit", timestamp=datetime(2026, 2, 3, 17)),
+        Transaction(account_id=acc.id, amount=-100, type="transfer_out", timestamp=datetime(2026, 3, 1, 12)),
+    ])
+    await session.commit()
+
+    # Before the backfill the opening balance is derived from the transactions since the start
+    before = await BalanceHistoryService.get_history(
+        session, acc.id, acc.balance, date(2026, 1, 1), date(2026, 1, 3)
+    )
+    assert [p["balance"] for p in before] == [1000, 1000, 1000]
+
+    assert await BalanceHistoryService.backfill(session, [acc.id]) == 3
+
+    daily = await BalanceHistoryService.get_history(
+        session, acc.id, acc.balance, date(2026, 2, 2), date(2026, 2, 4)
+    )
+    assert daily == [
+        {"date": date(2026, 2, 2), "balance": 1500},
+        {"date": date(2026, 2, 3), "balance": 1600},
+        {"date": date(2026, 2, 4), "balance": 1600},
+    ]
+
+    monthly = await BalanceHistoryService.get_history(
+        session, acc.id, acc.balance, date(2026, 1, 1), date(2026, 3, 10), interval="month"
+    )
+    assert monthly == [
+        {"date": date(2026, 1, 31), "balance": 1500},
+        {"date": date(2026, 2, 28), "balance": 1600},
+        {"date": date(2026, 3, 10), "balance": 1500},
+    ]
+
+    weekly = await BalanceHistoryService.get_history(
+        session, acc.id, acc.balance, date(2026, 1, 12), date(2026, 1, 25), interval="week"
+    )
+    assert weekly == [
+        {"date": date(2026, 1, 18), "balance": 1500},
+        {"date": date(2026, 1, 25), "balance": 1500},
+    ]
+
+@pytest.mark.asyncio
+async def test_history_rejects_bad_ranges(session):
+    acc = await _make_account(session, "history_bad@test.com", "884", 0)
+    with pytest.raises(ValueError, match="must end on or after"):
+        await BalanceHistoryService.get_history(session, acc.id, 0, date(2026, 2, 1), date(2026, 1, 1))
+    with pytest.raises(ValueError, match="too long"):
+        await BalanceHistoryService.get_history(session, acc.id, 0, date(2020, 1, 1), date(2026, 1, 1))
+    with pytest.raises(ValueError, match="interval"):
+        await BalanceHistoryService.get_history(session, acc.id, 0, date(2026, 1, 1), date(2026, 1, 2), "year")
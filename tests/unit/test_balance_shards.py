@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import delete, func, select
+
+from app.models.account import Account
+from app.models.balance_shard import BalanceShard
+from app.models.daily_balance import DailyBalance
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.account_cache import AccountCache
+from app.services.balance_shards import BalanceCompactor, BalanceShardService
+from app.services.transfer_service import BalanceShardMissingError, ImmutableJournalError, TransferService
+
+async def _accounts(session, email, *balances):
+    user = User(email=email, hashed_password="pw")
+    session.add(user)
+    await session.flush()
+    accounts = [
+        Account(user_id=user.id, account_number=f"hs{email[:3]}{i}", currency="USD", balance=balance)
+        for i, balance in enumerate(balances)
+    ]
+    session.add_all(accounts)
+    await session.commit()
+    return [account.id for account in accounts]
+
+async def _load(session, account_id):
+    session.expire_all()
+    return await session.scalar(select(Account).where(Account.id == account_id))
+
+@pytest.mark.asyncio
+async def test_credits_to_hot_account_land_in_shards(session):
+    payer_id, merchant_id = await _accounts(session, "s01@shards.com", 100000, 500)
+    await BalanceShardService.set_shard_count(session, merchant_id, 4)
+    AccountCache.store([await _load(session, merchant_id)], AccountCache.generation())
+
+    for _ in range(20):
+        await TransferService.transfer_funds(payer_id, merchant_id, 1000, session)
+
+    # A shard credit cannot write the new total through, so the snapshot is dropped
+    assert AccountCache.get(merchant_id) is None
+    merchant = await _load(session, merchant_id)
+    # The accounts row is untouched; the credits are spread over the shards and summed on read
+    assert merchant.balance == 500
+    assert merchant.total_balance == 500 + 20000
+    shards = (await session.execute(select(BalanceShard.balance).where(BalanceShard.account_id == merchant_id))).scalars().all()
+    assert len(shards) == 4 and sum(shards) == 20000
+
+    assert await BalanceShardService.compact(session) == 1
+    merchant = await _load(session, merchant_id)
+    assert (merchant.balance, merchant.total_balance) == (20500, 20500)
+    checkpoint = await session.scalar(select(DailyBalance.closing_balance).where(DailyBalance.account_id == merchant_id))
+    assert checkpoint == 20500
+
+@pytest.mark.asyncio
+async def test_debits_from_hot_account_count_its_shards(session):
+    payer_id, merchant_id, supplier_id = await _accounts(session, "s02@shards.com", 10000, 0, 0)
+    await BalanceShardService.set_shard_count(session, merchant_id, 2)
+    await TransferService.transfer_funds(payer_id, merchant_id, 6000, session)
+
+    # Everything the merchant holds is in its shards; the debit may take the row below zero
+    await TransferService.transfer_funds(merchant_id, supplier_id, 4000, session)
+    with pytest.raises(ValueError, match="Insufficient Funds"):
+        await TransferService.transfer_funds(merchant_id, supplier_id, 2001, session)
+
+    merchant = await _load(session, merchant_id)
+    assert (merchant.balance, merchant.total_balance) == (-4000, 2000)
+
+    # Making it a regular account again folds the shards back in
+    await BalanceShardService.set_shard_count(session, merchant_id, 0)
+    merchant = await _load(session, merchant_id)
+    assert (merchant.shard_count, merchant.balance, merchant.total_balance) == (0, 2000, 2000)
+    assert await session.scalar(select(func.count()).select_from(BalanceShard).where(BalanceShard.account_id == merchant_id)) == 0
+
+@pytest.mark.asyncio
+async def test_transfers_book_balanced_immutable_journal_entries(session):
+    payer_id, payee_id = await _accounts(session, "s03@shards.com", 5000, 0)
+    await TransferService.transfer_funds_batch([(payer_id, payee_id, 1000), (payer_id, payee_id, 250)], session)
+
+    entries = (await session.execute(
+        select(Transaction.entry_id, func.count(), func.sum(Transaction.amount))
+        .where(Transaction.account_id.in_([payer_id, payee_id]))
+        .group_by(Transaction.entry_id)
+    )).all()
+    assert len(entries) == 2
+    assert all(entry_id is not None and lines == 2 and total == 0 for entry_id, lines, total in entries)
+
+    line = await session.scalar(select(Transaction).where(Transaction.account_id == payee_id).limit(1))
+    line.amount = 1
+    with pytest.raises(ImmutableJournalError):
+        await session.commit()
+    await session.rollback()
+
+@pytest.mark.asyncio
+async def test_compactor_folds_shards_in_the_background(session, session_factory):
+    payer_id, merchant_id = await _accounts(session, "s04@shards.com", 3000, 0)
+    await BalanceShardService.set_shard_count(session, merchant_id, 3)
+    await TransferService.transfer_funds(payer_id, merchant_id, 3000, session)
+
+    compactor = BalanceCompactor(session_factory=session_factory)
+    assert await compactor.run_once() == 1
+    assert await compactor.run_once() == 0
+    merchant = await _load(session, merchant_id)
+    assert (merchant.balance, merchant.total_balance) == (3000, 3000)
+
+@pytest.mark.asyncio
+async def test_credit_to_missing_shard_is_rolled_back(session):
+    payer_id, merchant_id = await _accounts(session, "s05@shards.com", 1000, 0)
+    await BalanceShardService.set_shard_count(session, merchant_id, 2)
+    await session.execute(delete(BalanceShard).where(BalanceShard.account_id == merchant_id))
+    await session.commit()
+
+    with pytest.raises(BalanceShardMissingError):
+        await TransferService.transfer_funds(payer_id, merchant_id, 100, session)
+    payer = await _load(session, payer_id)
+    assert payer.balance == 1000
@@ -0,0 +1,69 @@
+import pytest
+
+from benchmarks.report import Sample, compare, percentile, summarize
+from benchmarks.workload import parse_mix, run_workload, seed_users
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+def test_summarize_reports_latency_errors_and_queries():
+    samples = {
+        "dashboard": [Sample(0.001, 200, 0), Sample(0.003, 200, 2)],
+        "transfer": [Sample(0.010, 400, 5), Sample(0.020, 200, None)],
+    }
+    report = summarize(samples, elapsed_seconds=2.0)
+
+    assert report["overall"]["requests"] == 4
+    assert report["overall"]["errors"] == 1
+    assert report["overall"]["throughput_rps"] == 2.0
+    assert report["overall"]["queries_per_request"] == pytest.approx(7 / 3, abs=0.01)
+    assert report["operations"]["dashboard"]["p50_ms"] == 1.0
+    assert report["operations"]["transfer"]["statuses"] == {"200": 1, "400": 1}
+
+def test_compare_flags_only_moves_beyond_tolerance():
+    baseline = summarize({"dashboard": [Sample(0.010, 200, 1)] * 100}, elapsed_seconds=1.0)
+    same = summarize({"dashboard": [Sample(0.0105, 200, 1)] * 100}, elapsed_seconds=1.0)
+    assert compare(same, baseline, tolerance=0.15) == []
+
+    slower = summarize({"dashboard": [Sample(0.020, 200, 3)] * 50}, elapsed_seconds=1.0)
+    regressions = {(r["scope"], r["metric"]) for r in compare(slower, baseline, tolerance=0.15)}
+    assert ("overall", "throughput_rps") in regressions
+    assert ("dashboard", "p95_ms") in regressions
+    assert ("dashboard", "queries_per_request") in regressions
+
+def test_parse_mix_validates_operations():
+    assert parse_mix("login=1, transfer=2.5,statement") == {"login": 1.0, "transfer": 2.5, "statement": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("withdraw=1")
+    with pytest.raises(ValueError):
+        parse_mix("login=0")
+
+@pytest.mark.asyncio
+async def test_workload_runs_every_operation_against_the_app(client, session_factory):
+    users = await seed_users(session_factory, 4, seed=1, email_prefix="benchtest")
+    mix = {"login": 1, "dashboard": 1, "history": 1, "transfer": 1, "statement": 1}
+
+    # The test client shares one session across requests, so requests run one at a time
+    report = await run_workload(client, users, mix, requests=25, concurrency=1, warmup=5, seed=1)
+
+    assert report["overall"]["requests"] == 25
+    assert report["overall"]["errors"] == 0
+    assert report["overall"]["queries_per_request"] is not None
+    assert set(report["operations"]) <= set(mix)
+    assert report["config"]["mix"] == mix
+
+def test_serialization_fast_path_matches_legacy_output():
+    import json
+    from benchmarks.serialization import encode_json, encode_legacy, make_rows, run
+
+    rows = make_rows(20, seed=3)
+    assert json.loads(encode_json(rows)) == json.loads(encode_legacy(rows))
+
+    report = run(rows=5, repeat=2)
+    assert {"legacy_json", "fast_json"} <= set(report["encoders"])
+    assert report["encoders"]["legacy_json"]["speedup"] == 1.0
@@ -0,0 +1,51 @@
+from app.core.cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=1)
+
+    clock.now = 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    clock.now = 6
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expirations"] == 2
+    assert len(cache) == 0
+
+def test_cache_peek_leaves_order_and_counters_alone():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    assert cache.peek("missing") is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+
+    # "a" is still the least recently used
+    cache.set("c", 3)
+    assert "a" not in cache
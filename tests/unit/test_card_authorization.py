@@ -0,0 +1,136 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.account import Account
+from app.models.card import Card
+from app.models.card_hold import CardHold
+from app.models.daily_balance import DailyBalance
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.card_authorization import CardAuthorizationEngine
+from app.services.transfer_service import TransferService
+
+async def _card_holder(session, email, account_number, card_number, balance):
+    user = User(email=email, hashed_password="pw")
+    session.add(user)
+    await session.flush()
+    account = Account(user_id=user.id, account_number=account_number, currency="USD", balance=balance)
+    session.add(account)
+    await session.flush()
+    card = Card(account_id=account.id, card_number=card_number, cvc="123", expiry="12/99")
+    session.add(card)
+    await session.commit()
+    return account.id, card
+
+@pytest.mark.asyncio
+async def test_authorize_reserves_available_balance(session, session_factory):
+    account_id, card = await _card_holder(session, "auth1@cards.com", "cd1", "4000000000000001", 10000)
+    engine = CardAuthorizationEngine(session_factory=session_factory)
+    await engine.warm()
+
+    first = await engine.authorize(session, card.card_number, "123", "12/99", 6000, "coffee-shop")
+    assert first.approved and first.hold_id is not None
+    assert engine.held(account_id) == 6000
+
+    # Only 4000 is left once the first hold is counted
+    second = await engine.authorize(session, card.card_number, "123", "12/99", 5000, "shop")
+    assert second == (False, None, "insufficient_funds")
+
+    # An unknown card and a wrong CVC look the same to the caller
+    assert (await engine.authorize(session, "4999999999999999", "123", "12/99", 1, "shop")).reason == "invalid_card"
+    assert (await engine.authorize(session, card.card_number, "999", "12/99", 1, "shop")).reason == "invalid_card"
+
+    await engine.flush()
+    saved = await session.scalar(select(CardHold).where(CardHold.id == first.hold_id))
+    assert (saved.amount, saved.status, saved.merchant) == (6000, "held", "coffee-shop")
+
+@pytest.mark.asyncio
+async def test_transfers_cannot_spend_held_funds(session, session_factory):
+    account_id, card = await _card_holder(session, "auth2@cards.com", "cd2", "4000000000000002", 10000)
+    other_id, _ = await _card_holder(session, "auth3@cards.com", "cd3", "4000000000000003", 0)
+    engine = CardAuthorizationEngine(session_factory=session_factory)
+    await engine.warm()
+
+    await engine.authorize(session, card.card_number, "123", "12/99", 8000, "shop")
+    await engine.flush()
+
+    with pytest.raises(ValueError, match="Insufficient Funds"):
+        await TransferService.transfer_funds(account_id, other_id, 3000, session)
+    await TransferService.transfer_funds(account_id, other_id, 2000, session)
+
+@pytest.mark.asyncio
+async def test_capture_and_release_settle_holds_in_batches(session, session_factory):
+    account_id, card = await _card_holder(session, "auth4@cards.com", "cd4", "4000000000000004", 10000)
+    engine = CardAuthorizationEngine(session_factory=session_factory)
+    await engine.warm()
+
+    full = await engine.authorize(session, card.card_number, "123", "12/99", 3000, "shop")
+    partial = await engine.authorize(session, card.card_number, "123", "12/99", 2000, "shop")
+    freed = await engine.authorize(session, card.card_number, "123", "12/99", 1000, "shop")
+
+    results = await engine.capture(session, [(full.hold_id, None), (partial.hold_id, 1500), (full.hold_id, None)], "shop")
+    assert results == [("captured", None), ("captured", None), ("failed", "Hold not found or already settled")]
+    assert await engine.release(session, [freed.hold_id], "other-shop") == [("failed", "Hold not found or already settled")]
+    assert await engine.release(session, [freed.hold_id], "shop") == [("released", None)]
+    assert engine.held(account_id) == 0
+
+    session.expire_all()
+    account = await session.scalar(select(Account).where(Account.id == account_id))
+    assert account.balance == 10000 - 3000 - 1500
+    captures = (await session.execute(
+        select(Transaction.amount).where(Transaction.account_id == account_id, Transaction.type == "card_capture")
+    )).scalars().all()
+    assert sorted(captures) == [-3000, -1500]
+    checkpoint = await session.scalar(select(DailyBalance.closing_balance).where(DailyBalance.account_id == account_id))
+    assert checkpoint == account.balance
+    statuses = dict((await session.execute(select(CardHold.id, CardHold.status).where(CardHold.account_id == account_id))).all())
+    assert statuses == {full.hold_id: "captured", partial.hold_id: "captured", freed.hold_id: "released"}
+
+@pytest.mark.asyncio
+async def test_warm_reloads_open_holds(session, session_factory):
+    account_id, card = await _card_holder(session, "auth5@cards.com", "cd5", "4000000000000005", 10000)
+    engine = CardAuthorizationEngine(session_factory=session_factory)
+    await engine.warm()
+    await engine.authorize(session, card.card_number, "123", "12/99", 7000, "shop")
+    await engine.stop()
+
+    restarted = CardAuthorizationEngine(session_factory=session_factory)
+    await restarted.warm()
+    assert restarted.held(account_id) == 7000
+    assert (await restarted.authorize(session, card.card_number, "123", "12/99", 4000, "shop")).reason == "insufficient_funds"
+
+@pytest.mark.asyncio
+async def test_repeated_credential_failures_are_throttled(session, session_factory):
+    _, card = await _card_holder(session, "auth6@cards.com", "cd6", "4000000000000006", 10000)
+    engine = CardAuthorizationEngine(session_factory=session_factory, max_card_failures=3, max_merchant_failures=5)
+    await engine.warm()
+
+    for cvc in ("001", "002", "003"):
+        assert (await engine.authorize(session, card.card_number, cvc, "12/99", 1, "shop")).reason == "invalid_card"
+    # Locked out per card number, even with the right details
+    assert (await engine.authorize(session, card.card_number, "123", "12/99", 1, "shop")).reason == "too_many_attempts"
+
+    # And per merchant, whichever card numbers it tries
+    await engine.authorize(session, "4999999999999990", "123", "12/99", 1, "prober")
+    for pan in ("4999999999999991", "4999999999999992", "4999999999999993", "4999999999999994"):
+        await engine.authorize(session, pan, "123", "12/99", 1, "prober")
+    assert (await engine.authorize(session, "4999999999999995", "123", "12/99", 1, "prober")).reason == "too_many_attempts"
+
+@pytest.mark.asyncio
+async def test_transfers_cannot_spend_holds_before_they_are_saved(session, session_factory, monkeypatch):
+    from app.services.card_authorization import card_authorizations
+    monkeypatch.setattr(card_authorizations, "session_factory", session_factory)
+    account_id, card = await _card_holder(session, "auth7@cards.com", "cd7", "4000000000000007", 10000)
+    other_id, _ = await _card_holder(session, "auth8@cards.com", "cd8", "4000000000000008", 0)
+    card_authorizations.register_card(card)
+
+    # No flush: the hold only exists in memory until the write-behind window ends
+    assert (await card_authorizations.authorize(session, card.card_number, "123", "12/99", 8000, "shop")).approved
+    with pytest.raises(ValueError, match="Insufficient Funds"):
+        await TransferService.transfer_funds(account_id, other_id, 3000, session)
+    await TransferService.transfer_funds(account_id, other_id, 2000, session)
+
+    await card_authorizations.flush()
+    assert card_authorizations.unsaved_held(account_id) == 0
+    with pytest.raises(ValueError, match="Insufficient Funds"):
+        await TransferService.transfer_funds(account_id, other_id, 1, session)
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import text
+from app.core.config import Settings
+from app.db.session import build_engine
+
+def test_profile_defaults_and_env_overrides(monkeypatch):
+    monkeypatch.setenv("APP_PROFILE", "prod")
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    settings = Settings()
+
+    assert settings.resolved("db_echo") is False
+    assert settings.resolved("db_pool_size") == 10
+    pragmas = settings.sqlite_pragmas()
+    assert list(pragmas)[0] == "busy_timeout"
+    assert pragmas["journal_mode"] == "WAL"
+    # Explicit variables win over the profile
+    assert pragmas["synchronous"] == "NORMAL"
+
+def test_invalid_settings_are_rejected(monkeypatch):
+    monkeypatch.setenv("APP_PROFILE", "staging")
+    with pytest.raises(ValueError):
+        Settings()
+    monkeypatch.setenv("APP_PROFILE", "dev")
+    monkeypatch.setenv("SQLITE_JOURNAL_MODE", "WAL; DROP TABLE users")
+    with pytest.raises(ValueError):
+        Settings()
+
+def test_memory_database_skips_pool_sizing_and_wal():
+    settings = Settings(database_url="sqlite+aiosqlite:///:memory:", app_profile="bench")
+    assert "pool_size" not in settings.engine_options()
+    assert "journal_mode" not in settings.sqlite_pragmas()
+
+def test_summary_masks_credentials():
+    settings = Settings(database_url="postgresql+asyncpg://bank:hunter2@db/bank")
+    summary = settings.summary()
+    assert "hunter2" not in summary["database_url"]
+    assert summary["pragmas"] == {}
+
+@pytest.mark.asyncio
+async def test_build_engine_applies_pragmas_per_connection(tmp_path):
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}", app_profile="bench")
+    engine = build_engine(settings)
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 0
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 10000
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_read_only_engine_refuses_writes(tmp_path):
+    from sqlalchemy.exc import OperationalError
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'ro.db'}", app_profile="prod")
+    writer = build_engine(settings)
+    reader = build_engine(settings, read_only=True)
+    try:
+        async with writer.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT x FROM t"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+    finally:
+        await reader.dispose()
+        await writer.dispose()
+
+def test_reads_follow_recent_writes_to_the_primary():
+    import uuid
+    from app.db.session import (
+        AsyncReadSessionLocal, AsyncSessionLocal, mark_recent_write, recent_writers, session_factory_for
+    )
+    user_id = uuid.uuid4()
+    assert session_factory_for(user_id) is AsyncReadSessionLocal
+
+    mark_recent_write(user_id)
+    assert session_factory_for(user_id) is AsyncSessionLocal
+
+    # Once the window lapses reads go back to the read pool
+    recent_writers.invalidate(user_id)
+    assert session_factory_for(user_id) is AsyncReadSessionLocal
@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from app.services.group_commit import GroupCommitTransferEngine
+from app.models.account import Account
+from app.models.user import User
+
+@pytest.mark.asyncio
+async def test_group_commit_batches_concurrent_transfers(session, session_factory):
+    user = User(email="group@commit.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="gc1", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="gc2", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    engine = GroupCommitTransferEngine(session_factory=session_factory, max_batch_size=10, window_ms=50)
+    results = await asyncio.gather(
+        engine.submit(acc1.id, acc2.id, 400),
+        engine.submit(acc1.id, acc2.id, 400),
+        # Only 200 left after the first two legs, so this one must fail on its own
+        engine.submit(acc1.id, acc2.id, 400),
+        return_exceptions=True,
+    )
+
+    assert results[0] is True
+    assert results[1] is True
+    assert isinstance(results[2], ValueError)
+    assert "Insufficient Funds" in str(results[2])
+
+    # All three requests shared a single commit
+    assert engine.stats()["batches_committed"] == 1
+    assert engine.stats()["transfers_committed"] == 2
+
+    await session.refresh(acc1)
+    await session.refresh(acc2)
+    assert acc1.balance == 200
+    assert acc2.balance == 800
+
+@pytest.mark.asyncio
+async def test_group_commit_flushes_when_batch_is_full(session, session_factory):
+    user = User(email="group@full.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="gc3", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="gc4", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    # A window this long would time the test out if size-based flushing did not kick in
+    engine = GroupCommitTransferEngine(session_factory=session_factory, max_batch_size=2, window_ms=60000)
+    results = await asyncio.wait_for(
+        asyncio.gather(engine.submit(acc1.id, acc2.id, 100), engine.submit(acc1.id, acc2.id, 100)),
+        timeout=5,
+    )
+    assert results == [True, True]
+
+@pytest.mark.asyncio
+async def test_group_commit_rejects_invalid_amount(session_factory):
+    import uuid
+    engine = GroupCommitTransferEngine(session_factory=session_factory)
+    with pytest.raises(ValueError, match="Transfer amount must be strictly positive"):
+        await engine.submit(uuid.uuid4(), uuid.uuid4(), 0)
+    assert engine.stats()["pending"] == 0
+
+@pytest.mark.asyncio
+async def test_group_commit_isolates_a_clashing_record(session, session_factory):
+    from sqlalchemy.exc import IntegrityError
+    from app.services.idempotency_service import IdempotencyService
+
+    user = User(email="group@clash.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="gc5", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="gc6", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    def record():
+        return [IdempotencyService.build_record(user.id, "clash-1", "hash", 200, {"status": "success"})]
+
+    engine = GroupCommitTransferEngine(session_factory=session_factory, max_batch_size=3, window_ms=60000)
+    results = await asyncio.gather(
+        engine.submit(acc1.id, acc2.id, 100, record()),
+        engine.submit(acc1.id, acc2.id, 200, record()),
+        engine.submit(acc1.id, acc2.id, 300),
+        return_exceptions=True,
+    )
+
+    # The duplicate key only fails its own transfer; the batch falls back to one commit each
+    assert results[0] is True
+    assert isinstance(results[1], IntegrityError)
+    assert results[2] is True
+    assert engine.stats()["transfers_committed"] == 2
+
+    await session.refresh(acc1)
+    assert acc1.balance == 600
+
+@pytest.mark.asyncio
+async def test_group_commit_queries_are_not_counted_against_the_submitting_request(session, session_factory):
+    from app.core.metrics import RequestStats, current_request_stats
+
+    user = User(email="group@stats.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="gc7", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="gc8", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    engine = GroupCommitTransferEngine(session_factory=session_factory, max_batch_size=1)
+    stats = RequestStats({"method": "POST"})
+    token = current_request_stats.set(stats)
+    try:
+        # The batch is cut, and its flush task started, from inside this request
+        assert await engine.submit(acc1.id, acc2.id, 100) is True
+    finally:
+        current_request_stats.reset(token)
+
+    assert engine.stats()["transfers_committed"] == 1
+    assert stats.queries == 0
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.core.hashing import PasswordHasher, HashingSaturatedError
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    try:
+        running = asyncio.ensure_future(hasher.run(time.sleep, 0.2))
+        queued = asyncio.ensure_future(hasher.run(time.sleep, 0.01))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HashingSaturatedError):
+            await hasher.run(time.sleep, 0.01)
+
+        await asyncio.gather(running, queued)
+        stats = hasher.stats()
+        assert stats["completed"] == 2
+        assert stats["rejected"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["max_seconds"] >= 0.2
+    finally:
+        hasher.shutdown()
+
+def _blocking_job():
+    """
+    A stand-in for bcrypt that blocks its worker thread until released.
+    """
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        return release.wait(5)
+    return job, started, release
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+@pytest.mark.asyncio
+async def test_hasher_keeps_event_loop_responsive():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    job, started, release = _blocking_job()
+    try:
+        hashing = asyncio.ensure_future(hasher.run(job))
+        # The loop keeps running other tasks while the blocking call holds the pool's only worker
+        await asyncio.wait_for(_until(started.is_set), timeout=5)
+        assert not hashing.done()
+        release.set()
+        assert await hashing is True
+    finally:
+        release.set()
+        hasher.shutdown()
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_its_slot_until_the_hash_ends():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    job, started, release = _blocking_job()
+    try:
+        caller = asyncio.ensure_future(hasher.run(job))
+        await asyncio.wait_for(_until(started.is_set), timeout=5)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+
+        # The bcrypt job is still running on the only worker
+        assert hasher.stats()["in_flight"] == 1
+        with pytest.raises(HashingSaturatedError):
+            await hasher.run(time.sleep, 0.01)
+
+        release.set()
+        await asyncio.wait_for(_until(lambda: hasher.stats()["in_flight"] == 0), timeout=5)
+
+        def fail():
+            raise ValueError("bad salt")
+        with pytest.raises(ValueError):
+            await hasher.run(fail)
+        # Only the hash that ran to completion counts, failures stay out of the latency stats
+        assert hasher.stats()["completed"] == 1
+        assert hasher.stats()["in_flight"] == 0
+    finally:
+        release.set()
+        hasher.shutdown()
@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+
+from app.models.idempotency_key import IdempotencyKey
+from app.models.user import User
+from app.core.config import get_settings
+from app.services.idempotency_service import IdempotencyService, idempotency_cache
+
+IDEMPOTENCY_KEY_RETENTION_HOURS = get_settings().idempotency_key_retention_hours
+
+async def _user_with_keys(session, email, *ages_hours):
+    user = User(email=email, hashed_password="pw")
+    session.add(user)
+    await session.flush()
+    now = datetime.now(timezone.utc)
+    for index, age in enumerate(ages_hours):
+        record = IdempotencyService.build_record(user.id, f"key-{index}", "hash", 200, {"status": "success"})
+        record.created_at = now - timedelta(hours=age)
+        session.add(record)
+    await session.commit()
+    return user.id
+
+async def _keys(session, user_id):
+    result = await session.execute(select(IdempotencyKey.key).where(IdempotencyKey.user_id == user_id))
+    return sorted(result.scalars().all())
+
+@pytest.mark.asyncio
+async def test_expired_key_is_ignored_and_freed_for_reuse(session):
+    user_id = await _user_with_keys(session, "idem1@test.com", 1, IDEMPOTENCY_KEY_RETENTION_HOURS + 1)
+
+    assert (await IdempotencyService.lookup(session, user_id, "key-0")).status_code == 200
+    assert await IdempotencyService.lookup(session, user_id, "key-1") is None
+    assert await _keys(session, user_id) == ["key-0"]
+
+    # The key can be stored again for a new request
+    session.add(IdempotencyService.build_record(user_id, "key-1", "other", 200, {"status": "success"}))
+    await session.commit()
+    assert (await IdempotencyService.lookup(session, user_id, "key-1")).request_hash == "other"
+
+@pytest.mark.asyncio
+async def test_purge_deletes_only_expired_keys(session):
+    user_id = await _user_with_keys(session, "idem2@test.com", 0, IDEMPOTENCY_KEY_RETENTION_HOURS - 1, IDEMPOTENCY_KEY_RETENTION_HOURS + 1, 24 * 30)
+
+    # Other tests' expired keys may be purged as well
+    assert await IdempotencyService.purge_expired(session) >= 2
+    assert await _keys(session, user_id) == ["key-0", "key-1"]
+
+@pytest.mark.asyncio
+async def test_cached_key_expires_with_its_retention_window(session, monkeypatch):
+    # Created one minute before the end of its retention window
+    user_id = await _user_with_keys(session, "idem3@test.com", IDEMPOTENCY_KEY_RETENTION_HOURS - 1 / 60)
+
+    now = [1000.0]
+    monkeypatch.setattr(idempotency_cache, "_clock", lambda: now[0])
+    assert await IdempotencyService.lookup(session, user_id, "key-0") is not None
+    assert idempotency_cache.peek((user_id, "key-0")) is not None
+
+    # Well inside the cache TTL, but past the key's retention
+    now[0] += 90
+    assert idempotency_cache.peek((user_id, "key-0")) is None
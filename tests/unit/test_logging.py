@@ -0,0 +1,49 @@
+import io
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+from app.core.logging import DroppingQueueHandler, JsonFormatter, LOG_FORMAT, SamplingFilter
+
+def _record(name: str, level: int, msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(_record("app", logging.INFO, "line %d", i))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+def test_records_are_encoded_on_the_listener_thread():
+    log_queue = queue.Queue()
+    handler = DroppingQueueHandler(log_queue)
+    handler.handle(_record("app.transfers", logging.INFO, "moved %s cents", 500))
+
+    # Arguments are merged up front but nothing has been formatted yet
+    queued = log_queue.get_nowait()
+    assert queued.msg == "moved 500 cents" and queued.args is None
+    assert not hasattr(queued, "asctime")
+
+    stream = io.StringIO()
+    sink = logging.StreamHandler(stream)
+    sink.setFormatter(JsonFormatter(LOG_FORMAT))
+    listener = QueueListener(log_queue, sink)
+    listener.start()
+    handler.handle(_record("app.transfers", logging.INFO, "moved %s cents", 700))
+    listener.stop()
+
+    entry = json.loads(stream.getvalue().splitlines()[-1])
+    assert entry["message"] == "moved 700 cents"
+    assert entry["name"] == "app.transfers"
+
+def test_sampling_filter_by_logger_prefix():
+    sampler = SamplingFilter({"sqlalchemy.engine": 0.25, "noisy": 0})
+
+    kept = [sampler.filter(_record("sqlalchemy.engine.Engine", logging.INFO, "SELECT")) for _ in range(8)]
+    assert kept.count(True) == 2
+
+    assert not sampler.filter(_record("noisy.child", logging.INFO, "chatter"))
+    # Warnings and unsampled loggers always pass
+    assert sampler.filter(_record("noisy.child", logging.WARNING, "problem"))
+    assert sampler.filter(_record("app.main", logging.INFO, "hello"))
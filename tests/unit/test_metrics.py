@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import text
+from app.core.config import Settings
+from app.core.metrics import Registry, db_pool_checkout_wait
+from app.db.instrumentation import TimedAsyncAdaptedQueuePool
+from app.db.session import build_engine
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"')
+    latency.observe(0.1)
+    latency.observe(0.5)
+    latency.observe(3)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a"} 1' in lines
+    assert 'requests_total{route="/b\\""} 2' in lines
+    # Buckets are cumulative and upper-inclusive
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 3.6" in lines
+    assert "latency_seconds_count 3" in lines
+
+def test_registry_rejects_wrong_labels_and_duplicates():
+    registry = Registry()
+    counter = registry.counter("things_total", "Things.", ("kind",))
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.counter("things_total", "Again.")
+
+@pytest.mark.asyncio
+async def test_sized_pools_time_checkouts(tmp_path):
+    settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", app_profile="prod")
+    engine = build_engine(settings, read_only=True)
+    try:
+        assert isinstance(engine.sync_engine.pool, TimedAsyncAdaptedQueuePool)
+        before = db_pool_checkout_wait.count(pool="read")
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        assert db_pool_checkout_wait.count(pool="read") == before + 1
+    finally:
+        await engine.dispose()
+
+def test_normalize_statement_groups_by_shape():
+    from app.db.instrumentation import normalize_statement
+    statement = "SELECT id\n  FROM accounts WHERE id IN (?, ?, ?) AND number = '100-2' AND balance > 10"
+    assert normalize_statement(statement) == "SELECT id FROM accounts WHERE id IN (?...) AND number = ? AND balance > ?"
+
+@pytest.mark.asyncio
+async def test_queries_attributed_to_request_and_slow_ones_logged(caplog):
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.core.metrics import RequestStats, current_request_stats
+    from app.db.instrumentation import instrument_engine
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    # Any positive threshold below the statement's duration logs it
+    instrument_engine(engine, "slow-test", slow_query_threshold_ms=1e-6)
+
+    class Route:
+        path = "/accounts/{account_id}"
+
+    stats = RequestStats({"method": "GET", "route": Route()})
+    token = current_request_stats.set(stats)
+    try:
+        with caplog.at_level("WARNING", logger="app.db.slow_query"):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1 WHERE 2 > 1"))
+    finally:
+        current_request_stats.reset(token)
+        await engine.dispose()
+
+    assert stats.queries == 1
+    assert stats.db_seconds > 0
+    record = next(r for r in caplog.records if r.name == "app.db.slow_query")
+    assert record.route == "/accounts/{account_id}"
+    assert record.method == "GET"
+    assert record.statement == "SELECT ? WHERE ? > ?"
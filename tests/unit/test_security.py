@@ -0,0 +1,42 @@
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from app.core.security import create_access_token, get_current_user, principal_cache
+from app.models.user import User
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_principal(session, query_counter):
+    user = User(email="principal@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    token = create_access_token({"sub": str(user.id)}, expires_delta=timedelta(minutes=5))
+
+    first = await get_current_user(token, session)
+    query_counter.reset()
+    second = await get_current_user(token, session)
+
+    assert second.id == first.id
+    assert second.email == "principal@test.com"
+    assert query_counter.count == 0
+    assert principal_cache.stats()["hits"] >= 1
+
+@pytest.mark.asyncio
+async def test_get_current_user_cache_invalidated_on_deactivation(session):
+    user = User(email="deactivated@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    token = create_access_token({"sub": str(user.id)}, expires_delta=timedelta(minutes=5))
+    await get_current_user(token, session)
+    assert str(user.id) in principal_cache
+
+    user.is_active = False
+    await session.commit()
+    assert str(user.id) not in principal_cache
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token, session)
+    assert exc.value.detail == "Inactive user"
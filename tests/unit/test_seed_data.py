@@ -0,0 +1,48 @@
+from collections import defaultdict
+from datetime import datetime
+
+from seed_data import SHARD_USERS, SeedOptions, build_shard
+
+OPTIONS = SeedOptions(users=40, transfers_per_user=5, days=30, end=datetime(2026, 1, 1), seed=11, hashed_password="x")
+
+def test_shard_balances_match_transactions_and_checkpoints():
+    rows = build_shard(OPTIONS, 0)
+
+    assert len(rows["users"]) == 40
+    assert len(rows["accounts"]) == 80
+    totals = defaultdict(int)
+    for tx in sorted(rows["transactions"], key=lambda tx: tx["timestamp"]):
+        totals[tx["account_id"]] += tx["amount"]
+        assert totals[tx["account_id"]] >= 0
+    for account in rows["accounts"]:
+        assert account["balance"] == totals[account["id"]]
+
+    # The last checkpoint of each account is its current balance
+    latest = {}
+    for checkpoint in sorted(rows["daily_balances"], key=lambda row: row["day"]):
+        latest[checkpoint["account_id"]] = checkpoint["closing_balance"]
+    assert latest == {account["id"]: account["balance"] for account in rows["accounts"]}
+
+    # Transfers are double-entry: debits and credits cancel out
+    assert sum(tx["amount"] for tx in rows["transactions"] if tx["type"] != "deposit") == 0
+
+    # Each transfer's two lines share a journal entry that sums to zero; deposits have none
+    entries = defaultdict(list)
+    for tx in rows["transactions"]:
+        if tx["type"] == "deposit":
+            assert tx["entry_id"] is None
+        else:
+            entries[tx["entry_id"]].append(tx)
+    assert None not in entries and entries
+    for lines in entries.values():
+        assert sorted(tx["type"] for tx in lines) == ["credit", "transfer_out"]
+        assert sum(tx["amount"] for tx in lines) == 0
+
+def test_shards_are_reproducible_and_disjoint():
+    options = OPTIONS._replace(users=SHARD_USERS + 3, transfers_per_user=0)
+    assert build_shard(options, 1) == build_shard(options, 1)
+
+    first, second = build_shard(options, 0), build_shard(options, 1)
+    assert len(second["users"]) == 3
+    for table, key in (("users", "email"), ("accounts", "account_number"), ("cards", "card_number")):
+        assert not {row[key] for row in first[table]} & {row[key] for row in second[table]}
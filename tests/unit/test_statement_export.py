@@ -0,0 +1,45 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services import statement_export
+from app.services.statement_export import StatementExportService
+
+@pytest.mark.asyncio
+async def test_statement_export_streams_in_chunks_and_stops_on_disconnect(session, monkeypatch):
+    user = User(email="export@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    acc = Account(user_id=user.id, account_number="778", currency="USD", balance=0)
+    session.add(acc)
+    await session.commit()
+    await session.refresh(acc)
+
+    base = datetime(2026, 1, 1)
+    session.add_all([
+        Transaction(account_id=acc.id, amount=i + 1, type="credit", timestamp=base + timedelta(minutes=i))
+        for i in range(25)
+    ])
+    await session.commit()
+
+    monkeypatch.setattr(statement_export, "STATEMENT_EXPORT_CHUNK_SIZE", 10)
+    chunks = [chunk async for chunk in StatementExportService.iter_export(session, acc.id, "ndjson")]
+    assert len(chunks) == 3
+    assert sum(len(chunk.splitlines()) for chunk in chunks) == 25
+
+    checks = []
+    async def disconnect_after_first_chunk():
+        checks.append(True)
+        return len(checks) > 1
+
+    partial = [
+        chunk async for chunk in StatementExportService.iter_export(
+            session, acc.id, "csv", is_disconnected=disconnect_after_first_chunk
+        )
+    ]
+    # Header plus the first chunk, then the export stops
+    assert len(partial) == 2
+    assert len(partial[1].splitlines()) == 10
@@ -67,3 +67,48 @@ async def test_transfer_same_account(session):
 
     with pytest.raises(ValueError, match="Cannot transfer to the same account"):
         await TransferService.transfer_funds(acc.id, acc.id, 500, session)
+
+@pytest.mark.asyncio
+async def test_transfer_failure_leaves_balances_untouched(session):
+    import uuid
+    user = User(email="cas@transfers.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="666", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="667", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+    acc1_id, acc2_id = acc1.id, acc2.id
+
+    # The credit to acc2 is applied first and must be undone when the debit fails
+    with pytest.raises(ValueError, match="Insufficient Funds"):
+        await TransferService.transfer_funds(acc1_id, acc2_id, 5000, session)
+    with pytest.raises(ValueError, match="Account not found"):
+        await TransferService.transfer_funds(uuid.uuid4(), acc2_id, 100, session)
+
+    await session.refresh(acc1)
+    await session.refresh(acc2)
+    assert acc1.balance == 1000
+    assert acc2.balance == 0
+
+@pytest.mark.asyncio
+async def test_transfer_lock_conflict_retries_then_gives_up(session, monkeypatch):
+    import uuid
+    from sqlalchemy.exc import OperationalError
+    from app.services import transfer_service
+    from app.services.transfer_service import TransferConflictError
+
+    attempts = []
+
+    async def locked(*args, **kwargs):
+        attempts.append(1)
+        raise OperationalError("UPDATE accounts", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(TransferService, "apply_transfer", staticmethod(locked))
+    monkeypatch.setattr(transfer_service, "TRANSFER_RETRY_BACKOFF_MS", 0)
+
+    with pytest.raises(TransferConflictError):
+        await TransferService.transfer_funds(uuid.uuid4(), uuid.uuid4(), 100, session)
+    assert len(attempts) == transfer_service.TRANSFER_MAX_ATTEMPTS
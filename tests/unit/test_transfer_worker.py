@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import select
+from app.services.transfer_service import TransferService
+from app.services.transfer_worker import TransferQueue, TransferWorkerPool
+from app.models.account import Account
+from app.models.dead_letter_transfer import DeadLetterTransfer
+from app.models.transfer_job import TransferJob
+from app.models.user import User
+
+@pytest.mark.asyncio
+async def test_transient_failures_retry_then_dead_letter(session, session_factory, monkeypatch):
+    user = User(email="dlq@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="dlq1", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="dlq2", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    job = await TransferQueue.enqueue(session, user.id, acc1.id, acc2.id, 100)
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("ledger unavailable")
+
+    monkeypatch.setattr(TransferService, "apply_transfer", staticmethod(broken))
+
+    workers = TransferWorkerPool(session_factory=session_factory, max_attempts=2, backoff_base_ms=0)
+    # First attempt re-queues the job, second one exhausts the retries
+    assert await workers.run_until_empty() == 2
+    assert workers.stats()["retried"] == 1
+    assert workers.stats()["dead_lettered"] == 1
+
+    async with session_factory() as check:
+        stored = (await check.execute(select(TransferJob).where(TransferJob.id == job.id))).scalar_one()
+        assert stored.status == "dead_lettered"
+        assert stored.attempts == 2
+
+        dead = (await check.execute(select(DeadLetterTransfer).where(DeadLetterTransfer.job_id == job.id))).scalar_one()
+        assert dead.error == "ledger unavailable"
+        assert dead.amount == 100
+
+@pytest.mark.asyncio
+async def test_requeue_stale_processing_jobs(session, session_factory):
+    user = User(email="stale@test.com", hashed_password="pw")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    acc1 = Account(user_id=user.id, account_number="stale1", currency="USD", balance=1000)
+    acc2 = Account(user_id=user.id, account_number="stale2", currency="USD", balance=0)
+    session.add_all([acc1, acc2])
+    await session.commit()
+
+    job = await TransferQueue.enqueue(session, user.id, acc1.id, acc2.id, 100)
+    # Simulate a crash after the job was claimed but before it was applied
+    job.status = "processing"
+    await session.commit()
+
+    workers = TransferWorkerPool(session_factory=session_factory)
+    await workers.requeue_stale()
+    assert await workers.run_until_empty() == 1
+
+    await session.refresh(acc2)
+    assert acc2.balance == 100